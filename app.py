@@ -1,8 +1,16 @@
 from flask import Flask
 from flask_cors import CORS  # Add this
+from werkzeug.middleware.proxy_fix import ProxyFix
 import logging
+import threading
+import time
 
-from config import API_KEY
+import bs_dates
+import html_parsing
+import metrics
+import shared_snapshots
+from responses import mark_stale_responses
+from config import API_KEY, TRUSTED_PROXY_HOPS, WARMUP_ON_START
 from routes.home import home_bp
 from routes.auto_post import auto_post_bp
 from routes.top_performers import top_performers_bp
@@ -13,25 +21,82 @@ from routes.upcoming_issues import upcoming_issues_bp
 from routes.stock_movement_summary import stock_movement_summary_bp
 from routes.market_insights import market_insights_bp
 from routes.watchlist import watchlist_bp
+from routes.live_stream import live_stream_bp
+from routes.market_history import market_history_bp
+from routes.dashboard import dashboard_bp
+from routes.metrics import metrics_bp
 
 logging.basicConfig(level=logging.INFO)
 
-app = Flask(__name__)
-
-# ✅ Enable CORS
-CORS(app, resources={r"/api/*": {"origins": "*"}})  # Or set a specific origin like "https://hamrosharemarket.com"
-
-# Register all blueprints
-app.register_blueprint(home_bp)
-app.register_blueprint(auto_post_bp, url_prefix='/api')
-app.register_blueprint(top_performers_bp)
-app.register_blueprint(prospectus_bp)
-app.register_blueprint(cdsc_data_bp)
-app.register_blueprint(market_indices_bp)
-app.register_blueprint(upcoming_issues_bp)
-app.register_blueprint(stock_movement_summary_bp)
-app.register_blueprint(market_insights_bp, url_prefix='/api')
-app.register_blueprint(watchlist_bp, url_prefix='/api')
+
+def warm_up():
+    """Load the dependencies the routes import on first use."""
+    import numpy  # noqa: F401 (tick recording and history)
+    import requests  # noqa: F401 (every upstream fetch)
+    html_parsing.warm_up()
+    bs_dates.warm_up()
+
+
+def _run_warm_up(hook):
+    start = time.perf_counter()
+    try:
+        hook()
+        logging.info(f"[Startup] warm-up finished in {time.perf_counter() - start:.2f}s")
+    except Exception as e:
+        logging.error(f"[Startup] warm-up failed: {e}")
+
+
+def create_app(warm_up_hook=None):
+    """Build the app with every route registered.
+
+    Heavy libraries (bs4, requests, NumPy) are imported by the code that
+    needs them on first use, so building the app only costs Flask itself.
+    `warm_up_hook` (default: warm_up() when WARMUP_ON_START is set) runs on
+    a background thread, letting the worker serve while it loads them.
+    """
+    app = Flask(__name__)
+
+    # Behind the proxy, request.remote_addr (the rate limiters' client key) is the client, not the proxy
+    if TRUSTED_PROXY_HOPS:
+        app.wsgi_app = ProxyFix(app.wsgi_app, x_for=TRUSTED_PROXY_HOPS)
+
+    # ✅ Enable CORS
+    CORS(app, resources={r"/api/*": {"origins": "*"}}, expose_headers=['X-Next-Cursor', 'X-Snapshot-Stale'])  # Or set a specific origin like "https://hamrosharemarket.com"
+
+    # Register all blueprints
+    app.register_blueprint(home_bp)
+    app.register_blueprint(auto_post_bp, url_prefix='/api')
+    app.register_blueprint(top_performers_bp)
+    app.register_blueprint(prospectus_bp)
+    app.register_blueprint(cdsc_data_bp)
+    app.register_blueprint(market_indices_bp)
+    app.register_blueprint(upcoming_issues_bp)
+    app.register_blueprint(stock_movement_summary_bp)
+    app.register_blueprint(market_insights_bp, url_prefix='/api')
+    app.register_blueprint(watchlist_bp, url_prefix='/api')
+    app.register_blueprint(live_stream_bp, url_prefix='/api')
+    app.register_blueprint(market_history_bp, url_prefix='/api')
+    app.register_blueprint(dashboard_bp, url_prefix='/api')
+    app.register_blueprint(metrics_bp)
+
+    # Request, phase and upstream timings, exposed on /metrics
+    metrics.instrument_app(app)
+
+    # Flag responses served from a last-known-good snapshot while an upstream is down
+    mark_stale_responses(app)
+
+    # Share upstream snapshots between workers; one elected process polls upstream
+    shared_snapshots.start()
+
+    if warm_up_hook is None and WARMUP_ON_START:
+        warm_up_hook = warm_up
+    if warm_up_hook is not None:
+        threading.Thread(target=_run_warm_up, args=(warm_up_hook,), name='warm-up', daemon=True).start()
+    return app
+
+
+# `gunicorn app:app` and `python app.py` use the default app
+app = create_app()
 
 if __name__ == '__main__':
     app.run(host='0.0.0.0', port=8080)
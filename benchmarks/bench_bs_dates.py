@@ -0,0 +1,87 @@
+"""Benchmark the AD->BS lookup table against the original pyBSDate conversion.
+
+Before timing, every AD date from 1900-01-01 to 2050-12-31 (plus a few
+malformed strings) is converted both ways and the results, including
+"Invalid Date" and raised exception types, must match exactly.
+
+    python benchmarks/bench_bs_dates.py [--repeat 5]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+from datetime import date, datetime, timedelta
+
+from pyBSDate import convert_AD_to_BS
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bs_dates import convert_ad_string_to_bs  # noqa: E402
+
+
+def legacy_convert(date_str):
+    """convert_date_to_bs as it was before the lookup table (minus the empty check)."""
+    ad_date = datetime.strptime(date_str, "%Y-%m-%d")
+    try:
+        bs_date_tuple = convert_AD_to_BS(ad_date.year, ad_date.month, ad_date.day)
+        return datetime(*bs_date_tuple).strftime("%Y-%m-%d")
+    except ValueError:
+        return "Invalid Date"
+
+
+def outcome(fn, date_str):
+    try:
+        return fn(date_str)
+    except Exception as e:
+        return type(e).__name__
+
+
+def verify():
+    day = date(1900, 1, 1)
+    checked = 0
+    while day <= date(2050, 12, 31):
+        date_str = day.isoformat()
+        expected, actual = outcome(legacy_convert, date_str), outcome(convert_ad_string_to_bs, date_str)
+        if expected != actual:
+            sys.exit(f"{date_str}: table gives {actual!r}, pyBSDate gives {expected!r}")
+        day += timedelta(days=1)
+        checked += 1
+    for date_str in ['2023-02-30', '2023-1-5', '2023-13-01', '20230101', 'not a date', '']:
+        if outcome(legacy_convert, date_str) != outcome(convert_ad_string_to_bs, date_str):
+            sys.exit(f"{date_str!r}: table and pyBSDate disagree")
+        checked += 1
+    return checked
+
+
+def time_per_call(fn, samples, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for date_str in samples:
+            fn(date_str)
+        best = min(best, time.perf_counter() - start)
+    return best / len(samples) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    convert_ad_string_to_bs('2024-01-01')
+    print(f"table build: {(time.perf_counter() - start) * 1000:.1f} ms")
+
+    print(f"verified {verify()} inputs: identical results")
+
+    random.seed(0)
+    samples = [(date(2015, 1, 1) + timedelta(days=random.randrange(5000))).isoformat() for _ in range(20000)]
+    legacy_us = time_per_call(legacy_convert, samples, args.repeat)
+    table_us = time_per_call(convert_ad_string_to_bs, samples, args.repeat)
+    print(f"pyBSDate:     {legacy_us:8.2f} us/call")
+    print(f"lookup table: {table_us:8.2f} us/call  ({legacy_us / table_us:.0f}x faster)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,190 @@
+"""Throughput, latency and memory of every endpoint against fake upstreams.
+
+Starts the fake upstream in-process (fixtures, optional latency and error
+injection), then for each endpoint launches a fresh gunicorn on the app and
+drives it at rising concurrency. Each endpoint gets its own server so the
+peak RSS (VmHWM of the master and its workers) is attributable to it.
+
+    python benchmarks/bench_endpoints.py --concurrency 1,10,50,200 --output results.json
+    python benchmarks/bench_endpoints.py --baseline results.json   # compare with an earlier run
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+from bench_serving import ROOT, free_port, wait_for_port
+from fake_upstream import FakeUpstream
+from loadgen import run_load
+
+API_KEY = 'bench'
+
+# name -> (path, request headers)
+ENDPOINTS = {
+    'home': ('/?api_key=' + API_KEY, None),
+    'top_performers': ('/get_top_performers?indicator=gainers&limit=10', None),
+    'prospectus': ('/get_prospectus?pages=1', None),
+    'cdsc_data': ('/api/v1/cdsc/data', {'x-api-key': API_KEY}),
+    'market_indices': ('/get_market_indices?type=all_indices', None),
+    'upcoming_issues': ('/get_upcoming_issues?type=all&limit=20', None),
+    'stock_movement_summary': ('/get_stock_movement_summary', None),
+    'stock_movement_by_sector': ('/get_stock_movement_summary?group=sector', None),
+    'auto_post_close': ('/api/v2/post/nepse/close', {'view-mode': API_KEY}),
+    'insights_status': ('/api/v1/market/insights/status', {'view-mode': API_KEY}),
+    'insights_index': ('/api/v1/market/insights/index', {'view-mode': API_KEY}),
+    'insights_subindex': ('/api/v1/market/insights/subindex', {'view-mode': API_KEY}),
+    'companies_symbol': ('/api/watchlist/get_companies_symbol?stocks=watchlist', None),
+    'companies_data': ('/api/watchlist/get_companies_data?stocks=NABIL,NICA', None),
+    'companies_data_all': ('/api/watchlist/get_companies_data', None),
+    'dashboard': ('/api/v1/dashboard?resource=status&resource=index&resource=movement&resource=top:gainers:10',
+                  {'view-mode': API_KEY}),
+    'metrics': ('/metrics', {'view-mode': API_KEY}),
+}
+# The SSE stream never completes a response and history needs recorded ticks,
+# so neither fits a request/response load test.
+
+
+def git_revision():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def process_tree(pid):
+    """pid and all of its descendants, from /proc."""
+    pids, pending = [], [pid]
+    while pending:
+        current = pending.pop()
+        pids.append(current)
+        try:
+            for task in os.listdir(f'/proc/{current}/task'):
+                with open(f'/proc/{current}/task/{task}/children') as f:
+                    pending.extend(int(child) for child in f.read().split())
+        except OSError:
+            pass
+    return pids
+
+
+def peak_rss_kb(pid):
+    """Sum and per-process maximum of VmHWM (peak resident set) over a process tree."""
+    peaks = []
+    for member in process_tree(pid):
+        try:
+            with open(f'/proc/{member}/status') as f:
+                for line in f:
+                    if line.startswith('VmHWM:'):
+                        peaks.append(int(line.split()[1]))
+                        break
+        except OSError:
+            pass
+    return {"total_kb": sum(peaks), "max_process_kb": max(peaks, default=0)}
+
+
+def start_server(port, args, upstream_url, state_dir):
+    env = dict(os.environ, SERVER_MODE=args.mode, UPSTREAM_BASE_URL=upstream_url, API_KEY=API_KEY,
+               RATE_LIMIT_ENABLED='0', SHARED_SNAPSHOTS_ENABLED='1' if args.shared_snapshots else '0',
+               SHARED_SNAPSHOT_DIR=os.path.join(state_dir, 'snapshots'), TICK_DIR=os.path.join(state_dir, 'ticks'),
+               METRICS_DIR=os.path.join(state_dir, 'metrics'), DATA_DIR=state_dir)
+    if args.no_cache:
+        env['CACHE_MAX_ENTRIES'] = '0'
+    command = [sys.executable, '-m', 'gunicorn', '-w', str(args.workers), '-b', f'127.0.0.1:{port}',
+               '--backlog', '2048', 'app:app']
+    process = subprocess.Popen(command, cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    wait_for_port(port)
+    return process
+
+
+def bench_endpoint(name, args, upstream_url):
+    path, headers = ENDPOINTS[name]
+    port = free_port()
+    with tempfile.TemporaryDirectory(prefix='bench-endpoints-') as state_dir:
+        server = start_server(port, args, upstream_url, state_dir)
+        url = f"http://127.0.0.1:{port}{path}"
+        levels = []
+        try:
+            run_load(url, 2, 1, headers)  # warm up: first upstream fetch, imports, pools
+            for concurrency in args.concurrency:
+                stats = run_load(url, concurrency, args.duration, headers)
+                stats['concurrency'] = concurrency
+                levels.append(stats)
+                print(f"{name:<26} c={concurrency:<5} rps={stats['rps']:<9} p50={stats['p50_ms']}ms "
+                      f"p95={stats['p95_ms']}ms p99={stats['p99_ms']}ms errors={stats['errors']}")
+            memory = peak_rss_kb(server.pid)
+        finally:
+            server.terminate()
+            server.wait()
+    print(f"{name:<26} peak RSS {memory['total_kb'] // 1024} MiB total, "
+          f"{memory['max_process_kb'] // 1024} MiB largest process")
+    return {"endpoint": name, "path": path, "levels": levels, "peak_rss": memory}
+
+
+def compare(results, baseline):
+    """Print throughput and p99 changes against an earlier results file."""
+    previous = {
+        (entry['endpoint'], level['concurrency']): level
+        for entry in baseline['endpoints'] for level in entry['levels']
+    }
+    print(f"\nCompared with {baseline.get('revision') or 'baseline'}:")
+    for entry in results['endpoints']:
+        for level in entry['levels']:
+            before = previous.get((entry['endpoint'], level['concurrency']))
+            if before is None or not before['rps']:
+                continue
+            rps_change = (level['rps'] - before['rps']) / before['rps'] * 100
+            print(f"{entry['endpoint']:<26} c={level['concurrency']:<5} rps {rps_change:+.1f}%  "
+                  f"p99 {before['p99_ms']} -> {level['p99_ms']}ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--endpoints', default=','.join(ENDPOINTS), help='comma-separated endpoint names')
+    parser.add_argument('--concurrency', default='1,10,50,200', help='comma-separated concurrency levels')
+    parser.add_argument('--duration', type=float, default=5, help='seconds per concurrency level')
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--mode', default='sync', choices=('sync', 'async'))
+    parser.add_argument('--latency-ms', type=float, default=50)
+    parser.add_argument('--jitter-ms', type=float, default=0)
+    parser.add_argument('--error-rate', type=float, default=0)
+    parser.add_argument('--error-status', type=int, default=503)
+    parser.add_argument('--no-cache', action='store_true', help='disable the snapshot cache')
+    parser.add_argument('--shared-snapshots', action='store_true', help='enable cross-worker snapshots')
+    parser.add_argument('--output', help='write results as JSON to this file')
+    parser.add_argument('--baseline', help='earlier JSON results to compare against')
+    args = parser.parse_args()
+    args.concurrency = [int(level) for level in args.concurrency.split(',')]
+
+    names = [name.strip() for name in args.endpoints.split(',') if name.strip()]
+    unknown = [name for name in names if name not in ENDPOINTS]
+    if unknown:
+        parser.error(f"unknown endpoints: {', '.join(unknown)}")
+
+    results = {
+        "revision": git_revision(),
+        "timestamp": int(time.time()),
+        "settings": {
+            "mode": args.mode, "workers": args.workers, "duration": args.duration,
+            "latency_ms": args.latency_ms, "jitter_ms": args.jitter_ms, "error_rate": args.error_rate,
+            "error_status": args.error_status, "cache": not args.no_cache,
+            "shared_snapshots": args.shared_snapshots,
+        },
+        "endpoints": [],
+    }
+    with FakeUpstream(latency_ms=args.latency_ms, jitter_ms=args.jitter_ms,
+                      error_rate=args.error_rate, error_status=args.error_status) as upstream:
+        for name in names:
+            results['endpoints'].append(bench_endpoint(name, args, upstream.base_url))
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+    if args.baseline:
+        with open(args.baseline) as f:
+            compare(results, json.load(f))
+
+
+if __name__ == '__main__':
+    main()
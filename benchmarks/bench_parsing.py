@@ -0,0 +1,117 @@
+"""Compare the targeted scraper parsers against the original full-tree parse.
+
+Checks that both produce identical output for the saved fixture pages, then
+reports mean parse time and peak traced memory per implementation.
+
+    python benchmarks/bench_parsing.py [--repeat 200]
+"""
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+
+from bs4 import BeautifulSoup
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import html_parsing  # noqa: E402
+from routes.cdsc_data import parse_cdsc_html  # noqa: E402
+from routes.prospectus import parse_prospectus_rows  # noqa: E402
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+
+
+# --- Original implementations (full html.parser tree) ---
+
+def legacy_cdsc(html_content):
+    soup = BeautifulSoup(html_content, "html.parser")
+    div = soup.find("div", class_="fun-factor-area")
+    h4_elements = div.find_all("h4")
+    data = []
+    important_positions = [8, 10, 11, 12, 13]
+    for i in range(0, len(h4_elements), 2):
+        imp_value = "true" if int(i / 2) in important_positions else "false"
+        data.append({
+            "id": str(int(i / 2)),
+            "dataKey": h4_elements[i + 1].text.strip(),
+            "dataValue": h4_elements[i].text.strip(),
+            "imp": imp_value
+        })
+    data.sort(key=lambda x: x['imp'], reverse=True)
+    return data
+
+
+def legacy_prospectus(content):
+    page_data = []
+    soup = BeautifulSoup(content, 'html.parser')
+    table = soup.find('table', class_='table')
+    for row in table.select('tbody tr'):
+        row_data = row.find_all('td')
+        if len(row_data) == 4:
+            file_url = row_data[3].find('a').get('href', '') if row_data[3].find('a') else row_data[2].find('a').get('href', '')
+            page_data.append({
+                "title": row_data[0].get_text(strip=True),
+                "date": row_data[1].get_text(strip=True),
+                "english": row_data[2].find('a').get('href', '') if row_data[2].find('a') else '',
+                "nepali": row_data[3].find('a').get('href', '') if row_data[3].find('a') else '',
+                "fileUrl": file_url
+            })
+    return page_data
+
+
+def measure(fn, markup, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn(markup)
+    elapsed_ms = (time.perf_counter() - start) * 1000 / repeat
+
+    tracemalloc.start()
+    fn(markup)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed_ms, peak / 1024
+
+
+def available_parsers():
+    parsers = ['html.parser']
+    try:
+        import lxml  # noqa: F401
+        parsers.append('lxml')
+    except ImportError:
+        pass
+    return parsers
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=200)
+    args = parser.parse_args()
+
+    cases = [
+        ('cdsc', 'cdsc_home.html', legacy_cdsc, parse_cdsc_html, 'r'),
+        ('prospectus', 'sebon_prospectus.html', legacy_prospectus, parse_prospectus_rows, 'rb'),
+    ]
+
+    print(f"{'case':<12}{'implementation':<28}{'ms/parse':>10}{'peak KiB':>10}")
+    for name, fixture, legacy_fn, targeted_fn, mode in cases:
+        with open(os.path.join(FIXTURES, fixture), mode) as f:
+            markup = f.read()
+
+        expected = legacy_fn(markup)
+        ms, kib = measure(legacy_fn, markup, args.repeat)
+        print(f"{name:<12}{'full tree (html.parser)':<28}{ms:>10.3f}{kib:>10.0f}")
+
+        for parser_name in available_parsers():
+            html_parsing.HTML_PARSER = parser_name
+            actual = targeted_fn(markup)
+            if actual != expected:
+                sys.exit(f"{name}: targeted parse with {parser_name} differs from the original output")
+            ms, kib = measure(targeted_fn, markup, args.repeat)
+            print(f"{name:<12}{'targeted (' + parser_name + ')':<28}{ms:>10.3f}{kib:>10.0f}")
+
+    print("Outputs identical to the original implementation.")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,86 @@
+"""Compare sync and async (gevent) gunicorn serving against slow fake upstreams.
+
+Starts the fake upstream in-process, then for each SERVER_MODE launches
+gunicorn on the app and drives one endpoint with N concurrent clients.
+The snapshot cache is disabled by default so every request pays the
+upstream round trip, which is what the worker model has to absorb.
+
+    python benchmarks/bench_serving.py --concurrency 500 --latency-ms 200
+"""
+import argparse
+import json
+import os
+import socket
+import subprocess
+import sys
+import time
+
+from fake_upstream import FakeUpstream
+from loadgen import run_load
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def wait_for_port(port, timeout=30):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            with socket.create_connection(('127.0.0.1', port), timeout=1):
+                return
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError(f"server on port {port} did not start")
+
+
+def start_server(mode, port, workers, upstream_url, cache):
+    env = dict(os.environ, SERVER_MODE=mode, UPSTREAM_BASE_URL=upstream_url, API_KEY='bench', RATE_LIMIT_ENABLED='0')
+    if not cache:
+        env['CACHE_MAX_ENTRIES'] = '0'
+    command = [sys.executable, '-m', 'gunicorn', '-w', str(workers), '-b', f'127.0.0.1:{port}',
+               '--backlog', '2048', 'app:app']
+    process = subprocess.Popen(command, cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    wait_for_port(port)
+    return process
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--path', default='/api/watchlist/get_companies_data?stocks=NABIL,NICA')
+    parser.add_argument('--concurrency', type=int, default=500)
+    parser.add_argument('--duration', type=float, default=15)
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--latency-ms', type=float, default=200)
+    parser.add_argument('--cache', action='store_true', help='keep the snapshot cache enabled')
+    parser.add_argument('--modes', default='sync,async')
+    parser.add_argument('--output', help='write results as JSON to this file')
+    args = parser.parse_args()
+
+    results = []
+    with FakeUpstream(latency_ms=args.latency_ms) as upstream:
+        for mode in args.modes.split(','):
+            port = free_port()
+            server = start_server(mode, port, args.workers, upstream.base_url, args.cache)
+            try:
+                run_load(f"http://127.0.0.1:{port}{args.path}", 10, 2)  # warm up
+                stats = run_load(f"http://127.0.0.1:{port}{args.path}", args.concurrency, args.duration)
+            finally:
+                server.terminate()
+                server.wait()
+            stats.update(mode=mode, workers=args.workers, concurrency=args.concurrency, path=args.path)
+            results.append(stats)
+            print(f"{mode:<6} rps={stats['rps']:<8} p50={stats['p50_ms']}ms p99={stats['p99_ms']}ms "
+                  f"requests={stats['requests']} errors={stats['errors']}")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
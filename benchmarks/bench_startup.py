@@ -0,0 +1,155 @@
+"""Startup cost of the app: import time and time to first response.
+
+Import time comes from `python -X importtime -c "import app"` (the
+cumulative time of the app module, plus the share of the heavy third-party
+packages that are loaded while importing it). Time to first response is
+measured from launching a single-worker gunicorn until it answers the
+home route, then how long the first request to each data endpoint takes
+against the fake upstream, where any deferred imports are paid.
+
+    python benchmarks/bench_startup.py --runs 5 --output startup.json
+    python benchmarks/bench_startup.py --baseline startup.json   # compare with an earlier run
+    python benchmarks/bench_startup.py --warmup --settle-ms 1000  # WARMUP_ON_START, requests after it ran
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.error
+import urllib.request
+
+from bench_endpoints import API_KEY, ENDPOINTS, git_revision
+from bench_serving import ROOT, free_port
+from fake_upstream import FakeUpstream
+
+HEAVY_PACKAGES = ('flask', 'requests', 'bs4', 'numpy', 'pyBSDate', 'pytz')
+FIRST_REQUESTS = ('top_performers', 'prospectus', 'upcoming_issues', 'companies_data')
+
+
+def app_env(state_dir, upstream_url=None, warmup=False):
+    env = dict(os.environ, API_KEY=API_KEY, RATE_LIMIT_ENABLED='0', SHARED_SNAPSHOTS_ENABLED='0',
+               TICK_DIR=os.path.join(state_dir, 'ticks'), DATA_DIR=state_dir,
+               WARMUP_ON_START='1' if warmup else '0')
+    if upstream_url:
+        env['UPSTREAM_BASE_URL'] = upstream_url
+    return env
+
+
+def import_times(env):
+    """Cumulative import time (ms) of the app module and of each heavy package it pulls in."""
+    output = subprocess.run([sys.executable, '-X', 'importtime', '-c', 'import app'], cwd=ROOT, env=env,
+                            capture_output=True, text=True, check=True).stderr
+    times = {}
+    for line in output.splitlines():
+        if not line.startswith('import time:') or '|' not in line:
+            continue
+        _, cumulative, name = line.split('|')
+        if cumulative.strip().isdigit():
+            times.setdefault(name.strip(), int(cumulative) / 1000)
+    return {name: round(times.get(name, 0.0), 1) for name in ('app',) + HEAVY_PACKAGES}
+
+
+def get(url, timeout=30):
+    start = time.perf_counter()
+    with urllib.request.urlopen(url, timeout=timeout) as response:
+        response.read()
+    return (time.perf_counter() - start) * 1000
+
+
+def first_responses(env, app_spec, settle_ms=0):
+    """(ms from launch until / answers, {endpoint: ms for its first request after settle_ms})."""
+    port = free_port()
+    command = [sys.executable, '-m', 'gunicorn', '-w', '1', '-b', f'127.0.0.1:{port}', app_spec]
+    launched = time.perf_counter()
+    server = subprocess.Popen(command, cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    base = f"http://127.0.0.1:{port}"
+    try:
+        deadline = launched + 30
+        while True:
+            try:
+                get(f"{base}/?api_key={API_KEY}", timeout=1)
+                break
+            except (urllib.error.URLError, ConnectionError, OSError):
+                if time.perf_counter() > deadline:
+                    raise RuntimeError("server did not answer")
+                time.sleep(0.005)
+        ready_ms = (time.perf_counter() - launched) * 1000
+        time.sleep(settle_ms / 1000)  # e.g. give a warm-up hook time to finish
+        first = {}
+        for name in FIRST_REQUESTS:
+            path, headers = ENDPOINTS[name]
+            request = urllib.request.Request(base + path, headers=headers or {})
+            start = time.perf_counter()
+            with urllib.request.urlopen(request, timeout=30) as response:
+                response.read()
+            first[name] = round((time.perf_counter() - start) * 1000, 1)
+    finally:
+        server.terminate()
+        server.wait()
+    return round(ready_ms, 1), first
+
+
+def median_of(samples):
+    return {key: round(statistics.median(sample[key] for sample in samples), 1) for key in samples[0]}
+
+
+def compare(results, baseline):
+    print(f"\nCompared with {baseline.get('revision') or 'baseline'}:")
+    for section in ('import_ms', 'first_request_ms'):
+        for name, value in results[section].items():
+            before = baseline.get(section, {}).get(name)
+            if before:
+                print(f"{section:<17} {name:<16} {before} -> {value}ms ({(value - before) / before * 100:+.1f}%)")
+    before = baseline.get('ready_ms')
+    if before:
+        print(f"{'ready_ms':<34} {before} -> {results['ready_ms']}ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--runs', type=int, default=5, help='repetitions; medians are reported')
+    parser.add_argument('--app', default='app:app', help='gunicorn application spec')
+    parser.add_argument('--warmup', action='store_true', help='start with WARMUP_ON_START=1')
+    parser.add_argument('--settle-ms', type=float, default=0, help='idle time between ready and the first requests')
+    parser.add_argument('--latency-ms', type=float, default=0)
+    parser.add_argument('--output', help='write results as JSON to this file')
+    parser.add_argument('--baseline', help='earlier JSON results to compare against')
+    args = parser.parse_args()
+
+    imports, readiness, firsts = [], [], []
+    with FakeUpstream(latency_ms=args.latency_ms) as upstream, \
+            tempfile.TemporaryDirectory(prefix='bench-startup-') as state_dir:
+        for _ in range(args.runs):
+            imports.append(import_times(app_env(state_dir, warmup=args.warmup)))
+            env = app_env(state_dir, upstream.base_url, args.warmup)
+            ready_ms, first = first_responses(env, args.app, args.settle_ms)
+            readiness.append(ready_ms)
+            firsts.append(first)
+
+    results = {
+        "revision": git_revision(),
+        "timestamp": int(time.time()),
+        "settings": {"runs": args.runs, "app": args.app, "warmup": args.warmup, "settle_ms": args.settle_ms,
+                     "latency_ms": args.latency_ms},
+        "import_ms": median_of(imports),
+        "ready_ms": round(statistics.median(readiness), 1),
+        "first_request_ms": median_of(firsts),
+    }
+    print("import (ms):        " + "  ".join(f"{name}={value}" for name, value in results['import_ms'].items()))
+    print(f"ready (ms):         {results['ready_ms']}")
+    print("first request (ms): " + "  ".join(f"{name}={value}" for name, value in results['first_request_ms'].items()))
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+    if args.baseline:
+        with open(args.baseline) as f:
+            compare(results, json.load(f))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,133 @@
+"""Local stand-in for the upstream sites, serving the saved fixtures.
+
+Upstream URLs are mapped as /<host><path>, matching UPSTREAM_BASE_URL:
+
+    python benchmarks/fake_upstream.py --port 9100 --latency-ms 150 --error-rate 0.05
+    UPSTREAM_BASE_URL=http://127.0.0.1:9100 gunicorn app:app
+"""
+import argparse
+import os
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+
+# (host, path) -> (fixture file, content type)
+ROUTES = {
+    ('nepalipaisa.com', '/api/GetIndexLive'): ('nepalipaisa_index_live.json', 'application/json'),
+    ('nepalipaisa.com', '/api/GetSubIndexLive'): ('nepalipaisa_sub_index_live.json', 'application/json'),
+    ('nepalipaisa.com', '/api/GetNepseLive'): ('nepalipaisa_nepse_live.json', 'application/json'),
+    ('nepalipaisa.com', '/api/GetTopMarketMovers'): ('nepalipaisa_top_movers.json', 'application/json'),
+    ('chukul.com', '/api/data/symbol/'): ('chukul_symbols.json', 'application/json'),
+    ('chukul.com', '/api/data/intrahistorydata/performance/'): ('chukul_performance.json', 'application/json'),
+    ('chukul.com', '/api/tools/market/status/'): ('chukul_market_status.json', 'application/json'),
+    ('www.sharesansar.com', '/existing-issues'): ('sharesansar_existing_issues.json', 'application/json'),
+    ('www.cdsc.com.np', '/'): ('cdsc_home.html', 'text/html; charset=utf-8'),
+    ('www.sebon.gov.np', '/prospectus'): ('sebon_prospectus.html', 'text/html; charset=utf-8'),
+}
+PDF_SIZE = 2 * 1024 * 1024
+
+
+def load_fixtures():
+    bodies = {}
+    for key, (name, content_type) in ROUTES.items():
+        with open(os.path.join(FIXTURES, name), 'rb') as f:
+            bodies[key] = (f.read(), content_type)
+    return bodies
+
+
+def make_handler(bodies, latency, jitter=0, error_rate=0, error_status=503):
+    """Request handler serving `bodies`.
+
+    Each request sleeps `latency` plus up to `jitter` seconds; a fraction
+    `error_rate` of requests is answered with `error_status` instead.
+    """
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def _delay_and_fail(self, include_body=True):
+            delay = latency + (random.uniform(0, jitter) if jitter else 0)
+            if delay:
+                time.sleep(delay)
+            if error_rate and random.random() < error_rate:
+                self._send(error_status, b'upstream error', 'text/plain', include_body=include_body)
+                return True
+            return False
+
+        def _resolve(self):
+            path = self.path.split('?', 1)[0]
+            host, _, rest = path.lstrip('/').partition('/')
+            return host, '/' + rest
+
+        def _send(self, status, body, content_type, include_body=True, length=None):
+            self.send_response(status)
+            self.send_header('Content-Type', content_type)
+            self.send_header('Content-Length', str(len(body) if length is None else length))
+            self.end_headers()
+            if include_body:
+                self.wfile.write(body)
+
+        def do_GET(self):
+            if self._delay_and_fail():
+                return
+            entry = bodies.get(self._resolve())
+            if entry is None:
+                self._send(404, b'{}', 'application/json')
+            else:
+                self._send(200, entry[0], entry[1])
+
+        def do_HEAD(self):
+            if self._delay_and_fail(include_body=False):
+                return
+            host, path = self._resolve()
+            if path.endswith('.pdf'):
+                self._send(200, b'', 'application/pdf', include_body=False, length=PDF_SIZE)
+            else:
+                self._send(404, b'', 'text/plain', include_body=False)
+
+        def log_message(self, format, *args):
+            pass
+
+    return Handler
+
+
+class FakeUpstream:
+    """Threaded fake upstream server; use as a context manager."""
+
+    def __init__(self, port=0, latency_ms=0, jitter_ms=0, error_rate=0, error_status=503):
+        handler = make_handler(load_fixtures(), latency_ms / 1000, jitter_ms / 1000, error_rate, error_status)
+        self.server = ThreadingHTTPServer(('127.0.0.1', port), handler)
+        self.server.daemon_threads = True
+        self.server.request_queue_size = 1024
+        self.base_url = f"http://127.0.0.1:{self.server.server_port}"
+
+    def __enter__(self):
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *exc):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--port', type=int, default=9100)
+    parser.add_argument('--latency-ms', type=float, default=0)
+    parser.add_argument('--jitter-ms', type=float, default=0, help='extra random latency, 0..N ms')
+    parser.add_argument('--error-rate', type=float, default=0, help='fraction of requests that fail')
+    parser.add_argument('--error-status', type=int, default=503)
+    args = parser.parse_args()
+    with FakeUpstream(args.port, args.latency_ms, args.jitter_ms, args.error_rate, args.error_status) as upstream:
+        print(f"Fake upstream listening on {upstream.base_url}")
+        try:
+            while True:
+                time.sleep(3600)
+        except KeyboardInterrupt:
+            pass
+
+
+if __name__ == '__main__':
+    main()
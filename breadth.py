@@ -0,0 +1,145 @@
+import threading
+
+from performance_table import normalize_symbol
+
+# (category, label) in response order
+CATEGORIES = (
+    ("advanced", "Advanced"),
+    ("declined", "Declined"),
+    ("unchanged", "Unchanged"),
+    ("positiveCircuit", "+ve Circuit"),
+    ("negativeCircuit", "-ve Circuit"),
+)
+
+
+def classify(percentage_change):
+    """Breadth category for a percentage change, or None if it fits none (e.g. NaN)."""
+    if percentage_change is None:
+        return "unchanged"
+    elif percentage_change > 9.9:
+        return "positiveCircuit"
+    elif -10.0 < percentage_change <= -9.9:
+        return "negativeCircuit"
+    elif percentage_change > 0:
+        return "advanced"
+    elif percentage_change < 0:
+        return "declined"
+    elif percentage_change == 0:
+        return "unchanged"
+    return None
+
+
+def summarize(counts):
+    return [
+        {"id": i, "label": label, "category": category, "count": counts.get(category, 0)}
+        for i, (category, label) in enumerate(CATEGORIES)
+    ]
+
+
+def _bump(counts, category, delta):
+    if category is not None:
+        counts[category] = counts.get(category, 0) + delta
+
+
+class BreadthEngine:
+    """Advance/decline counters maintained incrementally across performance snapshots.
+
+    Each snapshot is walked once to find rows whose category changed; only
+    those rows touch the counters. Per-sector and per-type counters are
+    built the first time they are asked for (they need the company list)
+    and then maintained the same way.
+    """
+
+    def __init__(self):
+        self._rows = None
+        self._categories = {}  # row key -> category
+        self._counts = {}
+        self._summary = summarize({})
+        self._companies = None
+        self._groups = None     # row key -> (sector_id, type)
+        self._by_sector = {}    # sector_id -> counts
+        self._by_type = {}      # type -> counts
+        self._grouped = None    # cached {"sector": [...], "type": [...]}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _row_keys(rows):
+        seen = {}
+        for row in rows:
+            symbol = normalize_symbol(row['symbol'])
+            occurrence = seen.get(symbol, 0)
+            seen[symbol] = occurrence + 1
+            yield (symbol, occurrence), row
+
+    def apply(self, rows):
+        """Fold a performance snapshot into the counters (no-op for the same snapshot)."""
+        with self._lock:
+            if rows is self._rows:
+                return
+            changed = False
+            previous = self._categories
+            current = {}
+            for key, row in self._row_keys(rows):
+                category = classify(row.get('percentage_change'))
+                current[key] = category
+                old = previous.get(key, ())
+                if old != category:
+                    self._move(key, old, category)
+                    changed = True
+            for key, old in previous.items():
+                if key not in current:
+                    self._move(key, old, ())
+                    changed = True
+            self._categories = current
+            self._rows = rows
+            if changed:
+                self._summary = summarize(self._counts)
+                self._grouped = None
+
+    def _move(self, key, old, new):
+        # `()` marks "not present" so it can be told apart from a None category.
+        for counts in self._counters_for(key):
+            if old != ():
+                _bump(counts, old, -1)
+            if new != ():
+                _bump(counts, new, 1)
+
+    def _counters_for(self, key):
+        yield self._counts
+        if self._groups is not None:
+            sector_id, company_type = self._groups.get(key[0], (None, None))
+            yield self._by_sector.setdefault(sector_id, {})
+            yield self._by_type.setdefault(company_type, {})
+
+    def summary(self):
+        """Market-wide breadth in the /get_stock_movement_summary shape; O(1)."""
+        return self._summary
+
+    def grouped(self, companies):
+        """Breadth per sector and per instrument type, joined from the company list."""
+        with self._lock:
+            if companies is not self._companies:
+                self._groups = {
+                    normalize_symbol(company['symbol']): (str(company['sector_id']), str(company['type']))
+                    for company in companies
+                }
+                self._companies = companies
+                self._by_sector = {}
+                self._by_type = {}
+                for key, category in self._categories.items():
+                    sector_id, company_type = self._groups.get(key[0], (None, None))
+                    _bump(self._by_sector.setdefault(sector_id, {}), category, 1)
+                    _bump(self._by_type.setdefault(company_type, {}), category, 1)
+                self._grouped = None
+            if self._grouped is None:
+                self._grouped = {
+                    "sector": [
+                        {"sectorId": sector_id if sector_id is not None else "unknown", "summary": summarize(counts)}
+                        for sector_id, counts in sorted(self._by_sector.items(), key=lambda item: str(item[0]))
+                    ],
+                    "type": [
+                        {"type": company_type if company_type is not None else "unknown", "summary": summarize(counts)}
+                        for company_type, counts in sorted(self._by_type.items(), key=lambda item: str(item[0]))
+                    ],
+                }
+            return self._grouped
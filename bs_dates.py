@@ -0,0 +1,135 @@
+import calendar
+import threading
+from datetime import date, datetime
+
+from pyBSDate import convert_AD_to_BS
+from pyBSDate.DateMap import DATE_MAP
+
+_table = None        # AD day ordinal - _first_ordinal -> "YYYY-MM-DD" / "Invalid Date" / None
+_first_ordinal = None
+_by_string = {}      # ISO string -> table entry; bounded by the table size
+_table_lock = threading.Lock()
+_MISSING = object()
+
+
+def _format_bs(year, month, day):
+    # BS months run to 32 days; like datetime(*bs).strftime() this only
+    # accepts days that also exist in the same Gregorian month.
+    if day > calendar.monthrange(year, month)[1]:
+        return "Invalid Date"
+    return f"{year:04d}-{month:02d}-{day:02d}"
+
+
+def _month_days(bs_year):
+    year_data = DATE_MAP.get(str(bs_year))
+    return year_data['daysonmonth'] if year_data else None
+
+
+def _walk_forward(bs_year):
+    """BS dates from 1 Baisakh of `bs_year` onwards; None once the data runs out."""
+    year, month, day = bs_year, 1, 1
+    while True:
+        month_days = _month_days(year)
+        if month_days is None:
+            while True:
+                yield None
+        yield year, month, day
+        day += 1
+        if day > month_days[month - 1]:
+            day, month = 1, month + 1
+            if month > 12:
+                month, year = 1, year + 1
+
+
+def _walk_backward(bs_year):
+    """BS dates before 1 Baisakh of `bs_year`, nearest first; None once the data runs out."""
+    year, month = bs_year - 1, 12
+    while True:
+        month_days = _month_days(year)
+        if month_days is None:
+            while True:
+                yield None
+        for day in range(month_days[month - 1], 0, -1):
+            yield year, month, day
+        month -= 1
+        if month < 1:
+            month, year = 12, year - 1
+
+
+def _build_table():
+    """Precompute convert_AD_to_BS for every AD date pyBSDate can convert.
+
+    pyBSDate anchors each AD year Y on 1 Baisakh of BS year Y + 57 and
+    counts days forwards or backwards from it; the table follows the same
+    rule, one AD year at a time, so results match it exactly.
+    """
+    bs_years = sorted(int(year) for year in DATE_MAP)
+    first = date(bs_years[0] - 57, 1, 1).toordinal()
+    table = []  # None: LookupError (outside the BS calendar data)
+
+    for ad_year in range(bs_years[0] - 57, bs_years[-1] - 57 + 1):
+        bs_year = ad_year + 57
+        anchor = date(*map(int, DATE_MAP[str(bs_year)]['1stbaisakh'].split('-')))
+        anchor_day_of_year = anchor.timetuple().tm_yday
+        days_in_year = 366 if calendar.isleap(ad_year) else 365
+        before = anchor_day_of_year - 1  # AD days of this year that fall before the anchor
+
+        backward = _walk_backward(bs_year)
+        earlier = [next(backward) for _ in range(before)]
+        earlier.reverse()
+        forward = _walk_forward(bs_year)
+        later = [next(forward) for _ in range(days_in_year - before)]
+
+        for bs_date in earlier + later:
+            table.append(None if bs_date is None else _format_bs(*bs_date))
+
+    return first, table
+
+
+def _ensure_table():
+    global _table, _first_ordinal
+    if _table is None:
+        with _table_lock:
+            if _table is None:
+                _first_ordinal, _table = _build_table()
+    return _first_ordinal, _table
+
+
+def warm_up():
+    """Build the conversion table ahead of the first request that needs it."""
+    _ensure_table()
+
+
+def convert_ad_string_to_bs(date_str):
+    """BS date string for an AD "YYYY-MM-DD" string.
+
+    Same results and errors as parsing with strptime and converting with
+    pyBSDate: "Invalid Date" when the BS day does not exist in the
+    Gregorian month, ValueError for malformed input and LookupError
+    outside pyBSDate's range. Canonical ISO strings are answered from a
+    dense table indexed by day ordinal and remembered per string.
+    """
+    result = _by_string.get(date_str, _MISSING)
+    if result is not _MISSING:
+        if result is None:
+            raise LookupError("BS date out of conversion range")
+        return result
+    if len(date_str) == 10 and date_str[4] == '-' and date_str[7] == '-' and date_str[:4].isdigit() \
+            and date_str[5:7].isdigit() and date_str[8:].isdigit():
+        first, table = _ensure_table()
+        index = date(int(date_str[:4]), int(date_str[5:7]), int(date_str[8:])).toordinal() - first
+        if 0 <= index < len(table):
+            result = _by_string[date_str] = table[index]
+            if result is None:
+                raise LookupError("BS date out of conversion range")
+            return result
+    return _convert_with_pybsdate(date_str)
+
+
+def _convert_with_pybsdate(date_str):
+    ad_date = datetime.strptime(date_str, "%Y-%m-%d")
+    try:
+        bs_date_tuple = convert_AD_to_BS(ad_date.year, ad_date.month, ad_date.day)
+        return datetime(*bs_date_tuple).strftime("%Y-%m-%d")
+    except ValueError:
+        return "Invalid Date"
@@ -0,0 +1,267 @@
+import logging
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+
+from config import CACHE_TTLS, CACHE_MAX_ENTRIES, LAST_GOOD_MAX_AGE
+
+
+class TTLCache:
+    """Bounded LRU cache whose entries expire after a per-entry TTL."""
+
+    def __init__(self, max_entries):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()  # key -> (expires_at, value)
+        self._lock = threading.Lock()
+        self.hits = {}
+        self.misses = {}
+        self.evictions = 0
+
+    def get(self, feed, key):
+        """Return (found, value) and count the lookup against the feed."""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > now:
+                self._entries.move_to_end(key)
+                self.hits[feed] = self.hits.get(feed, 0) + 1
+                return True, entry[1]
+            if entry is not None:
+                del self._entries[key]
+            self.misses[feed] = self.misses.get(feed, 0) + 1
+            return False, None
+
+    def set(self, key, value, ttl):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            feeds = sorted(set(self.hits) | set(self.misses))
+            return {
+                "size": len(self._entries),
+                "maxEntries": self.max_entries,
+                "evictions": self.evictions,
+                "feeds": {
+                    feed: {"hits": self.hits.get(feed, 0), "misses": self.misses.get(feed, 0)}
+                    for feed in feeds
+                },
+            }
+
+
+class SingleFlight:
+    """Coalesce concurrent calls for the same key into one execution."""
+
+    def __init__(self):
+        self._calls = {}  # key -> _Call
+        self._lock = threading.Lock()
+        self.coalesced = 0
+
+    def do(self, key, fn):
+        with self._lock:
+            call = self._calls.get(key)
+            if call is not None:
+                self.coalesced += 1
+                leader = False
+            else:
+                call = self._calls[key] = _Call()
+                leader = True
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.result
+
+
+class _Call:
+    __slots__ = ('done', 'result', 'error')
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+snapshot_cache = TTLCache(CACHE_MAX_ENTRIES)
+inflight = SingleFlight()
+_refresh_listeners = {}  # feed -> [callback(key, value)]
+_shared_store = None     # cross-process snapshot store, see shared_snapshots.py
+_local = threading.local()
+_last_good = OrderedDict()  # key -> (fetched at, epoch s, value); outlives the TTL
+_last_good_lock = threading.Lock()
+
+
+def use_shared_store(store):
+    """Consult `store` (read(feed, key) / publish(feed, key, value)) before fetching upstream."""
+    global _shared_store
+    _shared_store = store
+
+
+@contextmanager
+def forced_refresh(ttl=None):
+    """Within this block cached_fetch always calls its loader (used by the refresher).
+
+    `ttl` overrides how long the fetched snapshots stay fresh, e.g. to hold
+    the closing snapshot until the next trading session.
+    """
+    _local.forced = True
+    _local.ttl = ttl
+    try:
+        yield
+    finally:
+        _local.forced = False
+        _local.ttl = None
+
+
+def staleness_sink():
+    """List collecting the ages of stale snapshots served on this thread, if any."""
+    return getattr(_local, 'stale', None)
+
+
+def set_staleness_sink(sink):
+    _local.stale = sink
+
+
+@contextmanager
+def collect_staleness(sink):
+    """Within this block, append the age of every stale snapshot served to `sink`."""
+    previous = staleness_sink()
+    _local.stale = sink
+    try:
+        yield
+    finally:
+        _local.stale = previous
+
+
+def _remember_good(key, value, fetched_at):
+    with _last_good_lock:
+        _last_good[key] = (fetched_at, value)
+        _last_good.move_to_end(key)
+        while len(_last_good) > CACHE_MAX_ENTRIES:
+            _last_good.popitem(last=False)
+
+
+def _last_known_good(feed, key):
+    """(value, age) of the newest snapshot not older than LAST_GOOD_MAX_AGE, or None."""
+    with _last_good_lock:
+        entry = _last_good.get(key)
+    if entry is not None and time.time() - entry[0] <= LAST_GOOD_MAX_AGE:
+        return entry[1], time.time() - entry[0]
+    if _shared_store is not None:
+        # e.g. a freshly started worker while the upstream is down
+        shared = _shared_store.read(feed, key, max_age=LAST_GOOD_MAX_AGE)
+        if shared is not None:
+            return shared[0], shared[1]
+    return None
+
+
+def on_refresh(feed, callback):
+    """Call `callback(key, value)` whenever a fresh snapshot of `feed` is loaded."""
+    _refresh_listeners.setdefault(feed, []).append(callback)
+
+
+def _notify(feed, key, value):
+    for callback in _refresh_listeners.get(feed, ()):
+        try:
+            callback(key, value)
+        except Exception as e:
+            logging.error(f"[Cache] refresh listener for {feed} failed: {e}")
+
+
+def cache_key(url, params=None):
+    """Normalise an upstream URL (dropping the `_=` cache-buster) into a cache key."""
+    parts = urlsplit(url)
+    query = [(k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True) if k != '_']
+    if params:
+        query.extend((k, str(v)) for k, v in params.items() if k != '_')
+    return urlunsplit((parts.scheme, parts.netloc, parts.path, urlencode(sorted(query)), ''))
+
+
+def cached_fetch(feed, key, loader):
+    """Return the cached snapshot for `key`, calling `loader()` on a miss.
+
+    Concurrent misses for the same key share a single `loader()` call.
+    `None` results are treated as failed fetches and are never cached.
+    When the loader fails (raises or returns `None`) the last-known-good
+    snapshot is served instead, and its age is reported to the staleness
+    sink so the response can be marked stale.
+    """
+    forced = getattr(_local, 'forced', False)
+    if not forced:
+        found, value = snapshot_cache.get(feed, key)
+        if found:
+            return value
+
+    def load():
+        if _shared_store is not None and not forced:
+            shared = _shared_store.read(feed, key)
+            if shared is not None:
+                value, age, remaining = shared
+                # Re-check the shared segment at least once per TTL: the refresher
+                # may replace a snapshot it is holding (e.g. when trading resumes).
+                snapshot_cache.set(key, value, max(min(remaining, CACHE_TTLS[feed]), 0.5))
+                _remember_good(key, value, time.time() - age)
+                return value
+        value = loader()
+        if value is not None:
+            ttl = (getattr(_local, 'ttl', None) if forced else None) or CACHE_TTLS[feed]
+            snapshot_cache.set(key, value, ttl)
+            _remember_good(key, value, time.time())
+            if _shared_store is not None:
+                _shared_store.publish(feed, key, value, ttl)
+            _notify(feed, key, value)
+        return value
+
+    if forced:
+        return load()  # the refresher must see failures, not stale data
+    try:
+        value = inflight.do(key, load)
+    except Exception as e:
+        fallback = _last_known_good(feed, key)
+        if fallback is None:
+            raise
+        logging.warning(f"[Cache] {feed} fetch failed ({e}); serving last-known-good snapshot")
+        return _serve_stale(fallback)
+    if value is None:
+        fallback = _last_known_good(feed, key)
+        if fallback is not None:
+            logging.warning(f"[Cache] {feed} fetch returned no data; serving last-known-good snapshot")
+            return _serve_stale(fallback)
+    return value
+
+
+def _serve_stale(fallback):
+    value, age = fallback
+    sink = staleness_sink()
+    if sink is not None:
+        sink.append(age)
+    return value
+
+
+def cache_stats():
+    """Counters for the shared snapshot cache and request coalescing."""
+    stats = snapshot_cache.stats()
+    stats["coalesced"] = inflight.coalesced
+    return stats
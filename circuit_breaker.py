@@ -0,0 +1,97 @@
+import logging
+import threading
+import time
+from collections import deque
+
+from config import (
+    CIRCUIT_WINDOW,
+    CIRCUIT_MIN_CALLS,
+    CIRCUIT_ERROR_RATE,
+    CIRCUIT_SLOW_CALL_SECONDS,
+    CIRCUIT_OPEN_SECONDS,
+    CIRCUIT_HALF_OPEN_PROBES,
+)
+
+CLOSED, OPEN, HALF_OPEN = 'closed', 'open', 'half_open'
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of contacting an upstream whose circuit is open."""
+
+
+class CircuitBreaker:
+    """Error-rate and latency circuit breaker for one upstream host.
+
+    The last CIRCUIT_WINDOW calls are kept; a call fails if it raised,
+    returned a 5xx or took longer than CIRCUIT_SLOW_CALL_SECONDS. Once
+    CIRCUIT_MIN_CALLS calls are in the window and the failure rate reaches
+    CIRCUIT_ERROR_RATE the circuit opens and calls are refused. After
+    CIRCUIT_OPEN_SECONDS up to CIRCUIT_HALF_OPEN_PROBES probe calls go
+    through; a successful probe closes the circuit, a failed one reopens it.
+    """
+
+    def __init__(self, host):
+        self.host = host
+        self.state = CLOSED
+        self._outcomes = deque(maxlen=CIRCUIT_WINDOW)  # True for failed calls
+        self._opened_at = 0.0
+        self._probes = 0
+        self._lock = threading.Lock()
+
+    def allow(self):
+        with self._lock:
+            if self.state == CLOSED:
+                return True
+            if self.state == OPEN:
+                if time.monotonic() - self._opened_at < CIRCUIT_OPEN_SECONDS:
+                    return False
+                self.state = HALF_OPEN
+                self._probes = 0
+            if self._probes >= CIRCUIT_HALF_OPEN_PROBES:
+                return False
+            self._probes += 1
+            return True
+
+    def record(self, ok, seconds):
+        """Report the outcome of a call that allow() let through."""
+        failed = not ok or seconds > CIRCUIT_SLOW_CALL_SECONDS
+        with self._lock:
+            if self.state == HALF_OPEN:
+                self._probes = max(self._probes - 1, 0)
+                if failed:
+                    self._open()
+                else:
+                    self.state = CLOSED
+                    self._outcomes.clear()
+                    logging.info(f"[Circuit] {self.host} recovered; circuit closed")
+                return
+            if self.state == OPEN:
+                return  # a call that started before the circuit opened
+            self._outcomes.append(failed)
+            if len(self._outcomes) >= CIRCUIT_MIN_CALLS \
+                    and sum(self._outcomes) / len(self._outcomes) >= CIRCUIT_ERROR_RATE:
+                self._open()
+
+    def _open(self):
+        self.state = OPEN
+        self._opened_at = time.monotonic()
+        self._outcomes.clear()
+        logging.warning(f"[Circuit] {self.host} failing; circuit open for {CIRCUIT_OPEN_SECONDS}s")
+
+
+_breakers = {}  # upstream host -> CircuitBreaker
+_lock = threading.Lock()
+
+
+def breaker_for(host):
+    with _lock:
+        breaker = _breakers.get(host)
+        if breaker is None:
+            breaker = _breakers[host] = CircuitBreaker(host)
+        return breaker
+
+
+def circuit_states():
+    """{host: state} for every upstream contacted by this process."""
+    with _lock:
+        return {host: breaker.state for host, breaker in _breakers.items()}
@@ -1,3 +1,166 @@
 import os
 
 API_KEY = os.environ.get('API_KEY')
+
+# --- Upstream snapshot cache ---
+# Seconds each upstream feed stays fresh before it is fetched again.
+CACHE_TTLS = {
+    'index_live': 5,           # nepalipaisa GetIndexLive / GetSubIndexLive
+    'performance': 5,          # chukul intrahistorydata/performance
+    'market_status': 10,       # chukul tools/market/status
+    'nepse_live': 10,          # nepalipaisa GetNepseLive
+    'upcoming_issues': 600,    # sharesansar existing-issues
+    'cdsc': 3600,              # cdsc.com.np home page
+    'symbols': 6 * 3600,       # chukul data/symbol
+    'prospectus': 6 * 3600,    # sebon prospectus pages
+}
+CACHE_MAX_ENTRIES = int(os.environ.get('CACHE_MAX_ENTRIES', 256))
+
+# --- Upstream HTTP client ---
+HTTP_CONNECT_TIMEOUT = float(os.environ.get('HTTP_CONNECT_TIMEOUT', 3.05))
+HTTP_READ_TIMEOUT = float(os.environ.get('HTTP_READ_TIMEOUT', 10))
+HTTP_MAX_RETRIES = int(os.environ.get('HTTP_MAX_RETRIES', 2))
+HTTP_BACKOFF_BASE = float(os.environ.get('HTTP_BACKOFF_BASE', 0.25))  # seconds, doubled per retry
+HTTP_POOL_SIZE = int(os.environ.get('HTTP_POOL_SIZE', 10))  # keep-alive connections per host
+HTTP_MAX_CONCURRENCY_PER_HOST = int(os.environ.get('HTTP_MAX_CONCURRENCY_PER_HOST', 8))
+
+# --- Parallel fan-out for multi-feed endpoints ---
+FANOUT_MAX_WORKERS = int(os.environ.get('FANOUT_MAX_WORKERS', 16))
+FANOUT_DEADLINE = float(os.environ.get('FANOUT_DEADLINE', 12))  # seconds per request
+
+# --- Local persistent storage ---
+DATA_DIR = os.environ.get('DATA_DIR', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data'))
+PROSPECTUS_SIZE_DB = os.path.join(DATA_DIR, 'prospectus_sizes.sqlite3')
+UPCOMING_ISSUES_DB = os.path.join(DATA_DIR, 'upcoming_issues.sqlite3')
+
+# --- HTML scraping ---
+# 'html.parser' (stdlib) or 'lxml' when it is installed.
+HTML_PARSER = os.environ.get('HTML_PARSER', 'html.parser')
+
+# --- Prospectus listing ---
+# Each page is its own cached (and shared) snapshot, so requests are kept to a small page range.
+PROSPECTUS_MAX_PAGE = int(os.environ.get('PROSPECTUS_MAX_PAGE', 20))
+PROSPECTUS_MAX_PAGES_PER_REQUEST = int(os.environ.get('PROSPECTUS_MAX_PAGES_PER_REQUEST', 5))
+
+# --- Live streaming (SSE) ---
+# Each open stream holds its worker; a sync gunicorn worker would serve nothing
+# else and be killed at its 30s timeout, so streams need SERVER_MODE=async (gevent).
+SERVER_MODE = os.environ.get('SERVER_MODE', 'sync')  # also read by gunicorn.conf.py
+STREAM_ENABLED = SERVER_MODE == 'async'
+STREAM_REFRESH_INTERVAL = float(os.environ.get('STREAM_REFRESH_INTERVAL', 3))  # seconds between shared refreshes
+STREAM_HEARTBEAT_INTERVAL = float(os.environ.get('STREAM_HEARTBEAT_INTERVAL', 15))
+STREAM_QUEUE_SIZE = int(os.environ.get('STREAM_QUEUE_SIZE', 32))  # pending updates before a slow client is dropped
+STREAM_CHANGE_FIELDS = ('ltp', 'volume', 'change', 'percentage_change')
+
+# --- Conditional responses (ETag / since= deltas) ---
+DELTA_HISTORY_VERSIONS = int(os.environ.get('DELTA_HISTORY_VERSIONS', 16))  # versions kept per response variant
+DELTA_HISTORY_VARIANTS = int(os.environ.get('DELTA_HISTORY_VARIANTS', 128))  # distinct query variants tracked
+# Candidate fields naming an index row in GetIndexLive / GetSubIndexLive, first present wins.
+INDEX_KEY_FIELDS = ('indexName', 'index', 'sindex', 'name')
+
+# --- Pre-encoded response bodies ---
+COMPRESS_MIN_BYTES = int(os.environ.get('COMPRESS_MIN_BYTES', 1024))  # smaller bodies are sent uncompressed
+GZIP_LEVEL = int(os.environ.get('GZIP_LEVEL', 6))
+BROTLI_QUALITY = int(os.environ.get('BROTLI_QUALITY', 5))
+
+# Send every upstream request to this base URL instead (e.g. local stand-in
+# servers for benchmarking): https://chukul.com/api/... -> {base}/chukul.com/api/...
+UPSTREAM_BASE_URL = os.environ.get('UPSTREAM_BASE_URL')
+
+# --- Intraday tick history ---
+TICK_DIR = os.path.join(DATA_DIR, 'ticks')
+TICK_TIMEZONE = 'Asia/Kathmandu'
+TICK_MIN_INTERVAL = float(os.environ.get('TICK_MIN_INTERVAL', 5))  # seconds between recorded snapshots
+# series -> (row fields recorded as float64 columns, max distinct keys per trading day)
+TICK_SERIES = {
+    'stocks': (('ltp', 'volume', 'percentage_change'), 512),
+    'indices': (('indexValue', 'difference', 'percentChange'), 64),
+    'sub_indices': (('indexValue', 'difference', 'percentChange'), 64),
+}
+TICK_MAX_POINTS = 2000
+
+# --- Rate limiting (token buckets shared by all workers on the host) ---
+RATE_LIMIT_ENABLED = os.environ.get('RATE_LIMIT_ENABLED', '1') != '0'
+# blueprint -> requests per minute per client IP (also the burst size)
+RATE_LIMITS = {
+    'cdsc_data': 10,
+    'auto_post': 60,
+    'market_insights': 120,
+    'watchlist': 120,
+    'dashboard': 60,
+}
+RATE_LIMIT_SETS = int(os.environ.get('RATE_LIMIT_SETS', 2048))  # client slots = sets x 4
+RATE_LIMIT_FILE = os.environ.get(
+    'RATE_LIMIT_FILE',
+    '/dev/shm/hsmmarketdata-ratelimit' if os.path.isdir('/dev/shm') else os.path.join(DATA_DIR, 'ratelimit.bin'),
+)
+# Proxies in front of the app whose X-Forwarded-For entry is trusted. The
+# client IP is taken that many hops from the right. Leave at 0 unless a proxy
+# always sets the header: without one, clients would pick their own rate-limit
+# bucket by sending it. The Render deployment (Procfile.txt) sets 1 for its load balancer.
+TRUSTED_PROXY_HOPS = int(os.environ.get('TRUSTED_PROXY_HOPS', 0))
+
+# --- Cross-worker shared snapshots ---
+SHARED_SNAPSHOTS_ENABLED = os.environ.get('SHARED_SNAPSHOTS_ENABLED', '1') != '0'
+SHARED_SNAPSHOT_DIR = os.environ.get(
+    'SHARED_SNAPSHOT_DIR',
+    '/dev/shm/hsmmarketdata-snapshots' if os.path.isdir('/dev/shm') else os.path.join(DATA_DIR, 'snapshots'),
+)
+SHARED_SNAPSHOT_FEEDS = (
+    'performance', 'symbols', 'index_live', 'market_status', 'nepse_live',
+    'upcoming_issues', 'prospectus', 'cdsc',
+)
+SHARED_REFRESH_FRACTION = 0.8  # refresher refetches a feed after this fraction of its TTL
+# Segment files kept on the host (and decoded snapshots kept per worker); the refresher
+# prunes the oldest beyond this, and any too old to serve as a last-known-good fallback.
+SHARED_SNAPSHOT_MAX_ENTRIES = int(os.environ.get('SHARED_SNAPSHOT_MAX_ENTRIES', 256))
+SHARED_SNAPSHOT_PRUNE_INTERVAL = float(os.environ.get('SHARED_SNAPSHOT_PRUNE_INTERVAL', 60))  # seconds
+
+# --- Market-hours-aware prefetching (run by the elected snapshot refresher) ---
+MARKET_TIMEZONE = os.environ.get('MARKET_TIMEZONE', 'Asia/Kathmandu')
+MARKET_TRADING_DAYS = (6, 0, 1, 2, 3)  # datetime.weekday(): Sunday to Thursday
+MARKET_OPEN_TIME = os.environ.get('MARKET_OPEN_TIME', '11:00')
+MARKET_CLOSE_TIME = os.environ.get('MARKET_CLOSE_TIME', '15:00')
+MARKET_STATUS_MARGIN = float(os.environ.get('MARKET_STATUS_MARGIN', 15 * 60))  # seconds around the session to poll status
+# Feeds that move while the market trades; the rest refresh on a slow cadence once it closes
+PREFETCH_LIVE_FEEDS = ('performance', 'index_live', 'market_status', 'nepse_live')
+PREFETCH_LIVE_INTERVAL = float(os.environ.get('PREFETCH_LIVE_INTERVAL', 0))  # seconds; 0 = feed TTL x SHARED_REFRESH_FRACTION
+PREFETCH_CLOSED_INTERVAL = float(os.environ.get('PREFETCH_CLOSED_INTERVAL', 3600))  # slow feeds while closed
+
+# --- Upstream circuit breakers and last-known-good fallback ---
+CIRCUIT_WINDOW = int(os.environ.get('CIRCUIT_WINDOW', 20))  # recent calls per upstream host
+CIRCUIT_MIN_CALLS = int(os.environ.get('CIRCUIT_MIN_CALLS', 5))  # calls in the window before it can trip
+CIRCUIT_ERROR_RATE = float(os.environ.get('CIRCUIT_ERROR_RATE', 0.5))  # failed or slow fraction that opens it
+CIRCUIT_SLOW_CALL_SECONDS = float(os.environ.get('CIRCUIT_SLOW_CALL_SECONDS', 5))
+CIRCUIT_OPEN_SECONDS = float(os.environ.get('CIRCUIT_OPEN_SECONDS', 30))  # before half-open probes start
+CIRCUIT_HALF_OPEN_PROBES = int(os.environ.get('CIRCUIT_HALF_OPEN_PROBES', 1))  # concurrent probe calls
+LAST_GOOD_MAX_AGE = float(os.environ.get('LAST_GOOD_MAX_AGE', 24 * 3600))  # oldest snapshot served as a fallback
+
+# --- Field projection and cursor pagination (watchlist company lists) ---
+PAGE_MAX_LIMIT = int(os.environ.get('PAGE_MAX_LIMIT', 500))  # rows per page
+
+# --- Batched dashboard endpoint ---
+DASHBOARD_MAX_RESOURCES = int(os.environ.get('DASHBOARD_MAX_RESOURCES', 12))  # specs per request
+DASHBOARD_MAX_WORKERS = int(os.environ.get('DASHBOARD_MAX_WORKERS', 16))
+
+# --- Metrics ---
+METRICS_ENABLED = os.environ.get('METRICS_ENABLED', '1') != '0'
+METRICS_LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)  # seconds
+METRICS_SIZE_BUCKETS = (1024, 4096, 16384, 65536, 262144, 1048576, 4194304)  # bytes
+METRICS_DIR = os.environ.get(  # one file per gunicorn worker; /metrics merges them
+    'METRICS_DIR',
+    '/dev/shm/hsmmarketdata-metrics' if os.path.isdir('/dev/shm') else os.path.join(DATA_DIR, 'metrics'),
+)
+METRICS_FLUSH_INTERVAL = float(os.environ.get('METRICS_FLUSH_INTERVAL', 5))  # seconds between a worker's writes
+
+# --- Upcoming issues store (refreshed incrementally from sharesansar) ---
+UPCOMING_PAGE_SIZE = int(os.environ.get('UPCOMING_PAGE_SIZE', 50))  # rows per upstream page
+UPCOMING_MAX_ROWS = int(os.environ.get('UPCOMING_MAX_ROWS', 500))  # deepest a refresh pages, per issue type
+# An incremental refresh stops at the first page with nothing new or changed; a full
+# one walks every page and drops issues the upstream no longer lists.
+UPCOMING_FULL_SYNC_INTERVAL = float(os.environ.get('UPCOMING_FULL_SYNC_INTERVAL', 6 * 3600))
+
+# --- Startup ---
+# bs4, requests and NumPy are imported on first use; with warm-up on, each worker
+# loads them (and builds the BS date table) on a background thread right after boot.
+WARMUP_ON_START = os.environ.get('WARMUP_ON_START', '0') == '1'
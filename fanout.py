@@ -0,0 +1,42 @@
+from concurrent.futures import ThreadPoolExecutor, wait
+
+import metrics
+from cache import collect_staleness, staleness_sink
+from config import FANOUT_MAX_WORKERS, FANOUT_DEADLINE
+
+_executor = ThreadPoolExecutor(max_workers=FANOUT_MAX_WORKERS, thread_name_prefix='fanout')
+
+
+class DeadlineExceeded(Exception):
+    """Raised in place of a result that did not arrive before the deadline."""
+
+
+def fan_out(fn, args_list, deadline=FANOUT_DEADLINE, executor=None):
+    """Call `fn(*args)` for every entry of `args_list` concurrently.
+
+    Results come back in input order. A call that raises, or that is still
+    running when `deadline` seconds have passed, is returned as its
+    exception instance so the caller can decide how to merge partial data.
+    Calls that fan out again themselves must run on their own `executor`,
+    or they can starve the shared pool waiting on their own sub-calls.
+    """
+    route, sink = metrics.current_route(), staleness_sink()
+    futures = [(executor or _executor).submit(_call_in_context, route, sink, fn, args) for args in args_list]
+    wait(futures, timeout=deadline)
+
+    results = []
+    for future, args in zip(futures, args_list):
+        if not future.done():
+            future.cancel()
+            results.append(DeadlineExceeded(f"{fn.__name__}{tuple(args)} exceeded {deadline}s"))
+        elif future.exception() is not None:
+            results.append(future.exception())
+        else:
+            results.append(future.result())
+    return results
+
+
+def _call_in_context(route, sink, fn, args):
+    # Phases timed and stale snapshots served on the pool thread count towards the request that fanned out
+    with metrics.route_context(route), collect_staleness(sink):
+        return fn(*args)
@@ -0,0 +1,15 @@
+# Loaded automatically by gunicorn from the working directory.
+#
+# SERVER_MODE=sync  (default) one request per worker at a time; the SSE
+#                   market stream is refused, as each stream would hold a
+#                   worker until the timeout kills it.
+# SERVER_MODE=async gevent workers: blocking socket I/O in requests, the
+#                   fan-out executor and SSE streams is made cooperative,
+#                   so a worker keeps serving while it waits on upstreams.
+import os
+
+server_mode = os.environ.get('SERVER_MODE', 'sync')
+
+if server_mode == 'async':
+    worker_class = 'gevent'
+    worker_connections = int(os.environ.get('WORKER_CONNECTIONS', 1000))
@@ -0,0 +1,35 @@
+import logging
+
+from config import HTML_PARSER
+
+
+def parse_subtree(markup, name, class_):
+    """Parse only the `<name class="class_">` elements of `markup`.
+
+    Everything outside the matching elements is discarded while parsing,
+    so the tree that gets built is just the part the scraper reads.
+    """
+    from bs4 import BeautifulSoup, SoupStrainer, FeatureNotFound  # deferred: bs4 is slow to import
+
+    strainer = SoupStrainer(name, class_=_has_class(class_))
+    try:
+        return BeautifulSoup(markup, HTML_PARSER, parse_only=strainer)
+    except FeatureNotFound:
+        logging.warning(f"HTML parser '{HTML_PARSER}' is not installed; falling back to html.parser")
+        return BeautifulSoup(markup, 'html.parser', parse_only=strainer)
+
+
+def warm_up():
+    """Import bs4 and its tree builder ahead of the first scrape."""
+    parse_subtree('<table class="warm-up"></table>', 'table', 'warm-up')
+
+
+def _has_class(class_):
+    # While parsing, some bs4 versions hand the strainer the raw attribute
+    # string ("table table-striped") rather than the split list of classes.
+    def match(value):
+        if not value:
+            return False
+        classes = value.split() if isinstance(value, str) else value
+        return class_ in classes
+    return match
@@ -0,0 +1,154 @@
+import random
+import threading
+import time
+from collections import OrderedDict
+from urllib.parse import urlsplit
+
+import metrics
+from circuit_breaker import CLOSED, HALF_OPEN, OPEN, CircuitOpenError, breaker_for, circuit_states
+
+from config import (
+    HTTP_CONNECT_TIMEOUT,
+    HTTP_READ_TIMEOUT,
+    HTTP_MAX_RETRIES,
+    HTTP_BACKOFF_BASE,
+    HTTP_POOL_SIZE,
+    HTTP_MAX_CONCURRENCY_PER_HOST,
+    UPSTREAM_BASE_URL,
+)
+
+# Only these are safe to replay after a dropped connection or a 5xx.
+IDEMPOTENT_METHODS = {'GET', 'HEAD'}
+RETRY_STATUSES = {502, 503, 504}
+
+_sessions = {}    # host -> requests.Session with its own keep-alive pool
+_host_slots = {}  # host -> BoundedSemaphore capping in-flight requests
+_lock = threading.Lock()
+
+_validated = OrderedDict()  # url -> last 200 response carrying an ETag / Last-Modified
+_VALIDATED_MAX = 64
+
+_CIRCUIT_GAUGE = {CLOSED: 0, HALF_OPEN: 0.5, OPEN: 1}
+
+metrics.register_gauge(
+    'hsm_upstream_circuit_open', 'Circuit breaker state per upstream host: 0 closed, 0.5 half-open, 1 open.',
+    ('host',), lambda: {(host,): _CIRCUIT_GAUGE[state] for host, state in circuit_states().items()})
+
+
+def _host_state(host):
+    with _lock:
+        session = _sessions.get(host)
+        if session is None:
+            # requests is imported by the first upstream call, not at app startup
+            import requests
+            from requests.adapters import HTTPAdapter
+
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=HTTP_POOL_SIZE, max_retries=0)
+            session.mount('http://', adapter)
+            session.mount('https://', adapter)
+            _sessions[host] = session
+            _host_slots[host] = threading.BoundedSemaphore(HTTP_MAX_CONCURRENCY_PER_HOST)
+        return session, _host_slots[host]
+
+
+def _redirect_upstream(url):
+    parts = urlsplit(url)
+    target = f"{UPSTREAM_BASE_URL.rstrip('/')}/{parts.netloc}{parts.path}"
+    return f"{target}?{parts.query}" if parts.query else target
+
+
+def _backoff(attempt):
+    """Full-jitter exponential backoff."""
+    return random.uniform(0, HTTP_BACKOFF_BASE * (2 ** attempt))
+
+
+def request(method, url, **kwargs):
+    """Send a request over the pooled session for the URL's host.
+
+    Idempotent methods are retried on connection errors, timeouts and
+    gateway errors; the last response or exception is surfaced unchanged.
+    While the host's circuit is open, CircuitOpenError is raised at once
+    instead of waiting on the failing upstream; callers handling upstream
+    failures catch it alongside requests.RequestException.
+    """
+    import requests
+
+    method = method.upper()
+    upstream_host = urlsplit(url).netloc  # metrics label, before any UPSTREAM_BASE_URL rewrite
+    if UPSTREAM_BASE_URL:
+        url = _redirect_upstream(url)
+    host = urlsplit(url).netloc
+    session, slots = _host_state(host)
+    kwargs.setdefault('timeout', (HTTP_CONNECT_TIMEOUT, HTTP_READ_TIMEOUT))
+    retries = HTTP_MAX_RETRIES if method in IDEMPOTENT_METHODS else 0
+    breaker = breaker_for(upstream_host)
+
+    with metrics.phase('fetch'):
+        for attempt in range(retries + 1):
+            if not breaker.allow():
+                raise CircuitOpenError(f"Circuit open for {upstream_host}")
+            start = time.perf_counter()
+            if not slots.acquire(timeout=HTTP_READ_TIMEOUT):
+                breaker.record(False, time.perf_counter() - start)
+                raise requests.exceptions.Timeout(f"Too many concurrent requests to {host}")
+            try:
+                response = session.request(method, url, **kwargs)
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout):
+                elapsed = time.perf_counter() - start
+                breaker.record(False, elapsed)
+                metrics.record_upstream(upstream_host, method, 'error', elapsed)
+                if attempt == retries:
+                    raise
+            except Exception:
+                breaker.record(False, time.perf_counter() - start)
+                raise
+            else:
+                elapsed = time.perf_counter() - start
+                breaker.record(response.status_code < 500, elapsed)
+                # Bodies are already read (no stream=True callers), so len() is free
+                size = None if method == 'HEAD' or kwargs.get('stream') else len(response.content)
+                metrics.record_upstream(upstream_host, method, response.status_code, elapsed, size)
+                if response.status_code not in RETRY_STATUSES or attempt == retries:
+                    return response
+                response.close()
+            finally:
+                slots.release()
+            time.sleep(_backoff(attempt))
+
+
+def get(url, **kwargs):
+    return request('GET', url, **kwargs)
+
+
+def head(url, **kwargs):
+    kwargs.setdefault('allow_redirects', False)  # match requests.head()
+    return request('HEAD', url, **kwargs)
+
+
+def conditional_get(url, **kwargs):
+    """GET that revalidates with If-None-Match / If-Modified-Since.
+
+    When the upstream answers 304 the previous 200 response is returned
+    again, so callers always see a full response.
+    """
+    with _lock:
+        previous = _validated.get(url)
+    headers = dict(kwargs.pop('headers', None) or {})
+    if previous is not None:
+        if previous.headers.get('ETag'):
+            headers['If-None-Match'] = previous.headers['ETag']
+        if previous.headers.get('Last-Modified'):
+            headers['If-Modified-Since'] = previous.headers['Last-Modified']
+
+    response = get(url, headers=headers, **kwargs)
+    if response.status_code == 304 and previous is not None:
+        return previous
+    if response.status_code == 200 and (response.headers.get('ETag') or response.headers.get('Last-Modified')):
+        response.content  # read the body now so it can be replayed later
+        with _lock:
+            _validated[url] = response
+            _validated.move_to_end(url)
+            while len(_validated) > _VALIDATED_MAX:
+                _validated.popitem(last=False)
+    return response
@@ -0,0 +1,136 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+
+from config import UPCOMING_ISSUES_DB
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS upcoming_issues (
+    symbol TEXT NOT NULL,
+    issue_type TEXT NOT NULL,
+    status TEXT NOT NULL,
+    opening_date_ad TEXT,
+    position INTEGER NOT NULL,
+    fingerprint TEXT NOT NULL,
+    record TEXT NOT NULL,
+    updated_at REAL NOT NULL,
+    PRIMARY KEY (symbol, issue_type)
+);
+CREATE INDEX IF NOT EXISTS upcoming_issues_by_position ON upcoming_issues (issue_type, position);
+CREATE INDEX IF NOT EXISTS upcoming_issues_by_status ON upcoming_issues (issue_type, status, position);
+CREATE INDEX IF NOT EXISTS upcoming_issues_by_opening ON upcoming_issues (issue_type, opening_date_ad);
+CREATE TABLE IF NOT EXISTS upcoming_issue_syncs (
+    issue_type TEXT PRIMARY KEY,
+    synced_at REAL NOT NULL,
+    full_synced_at REAL NOT NULL
+);
+"""
+
+
+class IssueStore:
+    """SQLite store of normalized upcoming issues, keyed by (symbol, issue type).
+
+    Each row keeps the formatted record served to clients next to a
+    fingerprint of the upstream entry it was built from, so a refresh only
+    re-formats entries that are new or changed. `position` follows the
+    upstream listing order: the rows seen by a refresh move ahead of all
+    older ones, and a full refresh renumbers the type and drops what the
+    upstream no longer lists. The file lives under DATA_DIR and is shared by
+    every worker; each thread keeps its own connection.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+        self._write_lock = threading.Lock()
+
+    def _conn(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=5)
+            conn.execute("PRAGMA journal_mode=WAL")  # readers in other workers never wait on a refresh
+            conn.executescript(_SCHEMA)
+            self._local.conn = conn
+        return conn
+
+    def sync_state(self, issue_type):
+        """(synced_at, full_synced_at) of the last refresh of `issue_type`, or None."""
+        return self._conn().execute(
+            "SELECT synced_at, full_synced_at FROM upcoming_issue_syncs WHERE issue_type = ?", (issue_type,)).fetchone()
+
+    def fingerprints(self, issue_type):
+        """{symbol: fingerprint} of every stored issue of `issue_type`."""
+        return dict(self._conn().execute(
+            "SELECT symbol, fingerprint FROM upcoming_issues WHERE issue_type = ?", (issue_type,)))
+
+    def apply(self, issue_type, seen, changed, full=False):
+        """Record one refresh of `issue_type`.
+
+        `seen` lists the symbols the upstream returned, in its order;
+        `changed` maps the new or changed ones to (fingerprint, record).
+        """
+        now = time.time()
+        conn = self._conn()
+        with self._write_lock, conn:
+            if full:
+                placeholders = ",".join("?" * len(seen))
+                conn.execute(f"DELETE FROM upcoming_issues WHERE issue_type = ? AND symbol NOT IN ({placeholders})",
+                             (issue_type, *seen))
+                base = 0
+            else:
+                first = conn.execute("SELECT MIN(position) FROM upcoming_issues WHERE issue_type = ?",
+                                     (issue_type,)).fetchone()[0]
+                base = (first or 0) - len(seen)
+            positions = {symbol: base + offset for offset, symbol in enumerate(seen)}
+
+            conn.executemany(
+                "INSERT OR REPLACE INTO upcoming_issues "
+                "(symbol, issue_type, status, opening_date_ad, position, fingerprint, record, updated_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                [(symbol, issue_type, record['status'], _iso_date(record['openingDateAd']), positions[symbol],
+                  fingerprint, json.dumps(record), now)
+                 for symbol, (fingerprint, record) in changed.items()])
+            conn.executemany(
+                "UPDATE upcoming_issues SET position = ? WHERE symbol = ? AND issue_type = ?",
+                [(position, symbol, issue_type) for symbol, position in positions.items() if symbol not in changed])
+
+            previous = conn.execute("SELECT full_synced_at FROM upcoming_issue_syncs WHERE issue_type = ?",
+                                    (issue_type,)).fetchone()
+            full_synced_at = now if full or previous is None else previous[0]
+            conn.execute("INSERT OR REPLACE INTO upcoming_issue_syncs (issue_type, synced_at, full_synced_at) "
+                         "VALUES (?, ?, ?)", (issue_type, now, full_synced_at))
+
+    def query(self, issue_types, statuses=None, opening_from=None, opening_to=None, limit=20):
+        """Stored records of each type in upstream order, at most `limit` per type.
+
+        `statuses` restricts to those status labels; `opening_from` and
+        `opening_to` (inclusive "YYYY-MM-DD") to issues opening in that range.
+        """
+        clauses, params = ["issue_type = ?"], []
+        if statuses:
+            clauses.append(f"status IN ({','.join('?' * len(statuses))})")
+            params.extend(statuses)
+        if opening_from is not None:
+            clauses.append("opening_date_ad >= ?")
+            params.append(opening_from)
+        if opening_to is not None:
+            clauses.append("opening_date_ad <= ?")
+            params.append(opening_to)
+        sql = f"SELECT record FROM upcoming_issues WHERE {' AND '.join(clauses)} ORDER BY position LIMIT ?"
+
+        conn = self._conn()
+        records = []
+        for issue_type in issue_types:
+            records.extend(json.loads(record) for record, in conn.execute(sql, (issue_type, *params, limit)))
+        return records
+
+
+def _iso_date(value):
+    # "In Progress" and other placeholders are stored as NULL so range filters skip them
+    return value if isinstance(value, str) and len(value) == 10 and value[4] == '-' and value[7] == '-' else None
+
+
+issue_store = IssueStore(UPCOMING_ISSUES_DB)
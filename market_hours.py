@@ -0,0 +1,119 @@
+import logging
+import time
+from datetime import datetime, timedelta
+
+import pytz
+
+from config import (
+    CACHE_TTLS,
+    SHARED_REFRESH_FRACTION,
+    MARKET_TIMEZONE,
+    MARKET_TRADING_DAYS,
+    MARKET_OPEN_TIME,
+    MARKET_CLOSE_TIME,
+    MARKET_STATUS_MARGIN,
+    PREFETCH_LIVE_FEEDS,
+    PREFETCH_LIVE_INTERVAL,
+    PREFETCH_CLOSED_INTERVAL,
+)
+
+_tz = pytz.timezone(MARKET_TIMEZONE)
+
+
+def _at(day, hh_mm):
+    hour, minute = map(int, hh_mm.split(':'))
+    return _tz.localize(datetime(day.year, day.month, day.day, hour, minute)).timestamp()
+
+
+def session_bounds(day):
+    """(open, close) epoch seconds of the trading session on a Nepal-time date, or None."""
+    if day.weekday() not in MARKET_TRADING_DAYS:
+        return None
+    return _at(day, MARKET_OPEN_TIME), _at(day, MARKET_CLOSE_TIME)
+
+
+def in_session(now=None, margin=0):
+    """True if `now` falls within a scheduled session, widened by `margin` seconds."""
+    now = time.time() if now is None else now
+    bounds = session_bounds(datetime.fromtimestamp(now, _tz).date())
+    return bounds is not None and bounds[0] - margin <= now < bounds[1] + margin
+
+
+def next_session_open(now=None):
+    """Epoch seconds of the next scheduled session open after `now`."""
+    now = time.time() if now is None else now
+    day = datetime.fromtimestamp(now, _tz).date()
+    for offset in range(8):
+        bounds = session_bounds(day + timedelta(days=offset))
+        if bounds is not None and bounds[0] > now:
+            return bounds[0]
+    return now + 24 * 3600  # no trading days configured
+
+
+class PrefetchSchedule:
+    """Decides when the refresher fetches each task and how long the result stays fresh.
+
+    While the market trades, live feeds refresh every PREFETCH_LIVE_INTERVAL
+    (by default just inside their TTL) and slow feeds on their own TTL. Once
+    the market-status feed reports closed, every live task fetches one final
+    snapshot that is held until the next session opens, and slow feeds drop
+    to PREFETCH_CLOSED_INTERVAL. Market status keeps being polled around the
+    scheduled session so the opening is noticed. If the status feed is
+    unavailable the session clock decides.
+    """
+
+    def __init__(self):
+        self.market_open = None  # last is_open reported by the market-status feed
+        self.closed_since = None
+        self._held_until = {}    # task -> expiry of its last closing snapshot
+        self._fetched_at = {}    # task -> time of its last fetch
+
+    def observe(self, feed, value, now=None):
+        """Record a refreshed snapshot; the market-status feed drives open/closed."""
+        if feed != 'market_status' or not isinstance(value, dict) or 'is_open' not in value:
+            return
+        self._set_open(bool(value['is_open']), now)
+
+    def _set_open(self, is_open, now=None):
+        now = time.time() if now is None else now
+        if is_open == self.market_open:
+            return
+        self.market_open = is_open
+        self.closed_since = None if is_open else now
+        logging.info(f"[Prefetch] market {'open' if is_open else 'closed'}; "
+                     f"{'live' if is_open else 'closing snapshot, then slow'} cadence")
+
+    def is_open(self, now=None):
+        if self.market_open is None:
+            return in_session(now)
+        return self.market_open
+
+    def plan(self, task, feed, now=None):
+        """Return (seconds until the task is next due, ttl for a fetch now or None to skip it)."""
+        now = time.time() if now is None else now
+        ttl = CACHE_TTLS[feed]
+        live_feed = feed in PREFETCH_LIVE_FEEDS
+
+        if self.is_open(now):
+            interval = (PREFETCH_LIVE_INTERVAL or ttl * SHARED_REFRESH_FRACTION) if live_feed \
+                else ttl * SHARED_REFRESH_FRACTION
+            return interval, max(ttl, interval / SHARED_REFRESH_FRACTION)
+
+        if not live_feed:
+            interval = max(PREFETCH_CLOSED_INTERVAL, ttl * SHARED_REFRESH_FRACTION)
+            return interval, max(ttl, interval / SHARED_REFRESH_FRACTION)
+
+        if feed == 'market_status' and in_session(now, MARKET_STATUS_MARGIN):
+            return ttl * SHARED_REFRESH_FRACTION, ttl  # watch for the opening bell
+
+        # Closed: one closing snapshot per task, held until the next session opens.
+        closed_since = self.closed_since if self.closed_since is not None else 0
+        held_until = self._held_until.get(task, 0)
+        if self._fetched_at.get(task, 0) >= closed_since and now < held_until:
+            return min(held_until - now, 60), None
+        until = next_session_open(now)
+        self._held_until[task] = until
+        return min(until - now, 60), until - now
+
+    def fetched(self, task, now=None):
+        self._fetched_at[task] = time.time() if now is None else now
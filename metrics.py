@@ -0,0 +1,417 @@
+import atexit
+import json
+import logging
+import os
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from functools import wraps
+
+from flask import g, request
+from flask.json.provider import DefaultJSONProvider
+
+from cache import cache_stats
+from config import (
+    METRICS_ENABLED, METRICS_LATENCY_BUCKETS, METRICS_SIZE_BUCKETS, METRICS_DIR, METRICS_FLUSH_INTERVAL,
+)
+
+try:
+    import fcntl
+except ImportError:  # not available on Windows; retiring a worker's file is then unlocked
+    fcntl = None
+
+_local = threading.local()  # .route: URL rule of the request being served on this thread
+
+
+class Counter:
+    def __init__(self, name, help, labelnames):
+        self.name = name
+        self.help = help
+        self.labelnames = labelnames
+        self._values = {}  # label values -> count
+        self._lock = threading.Lock()
+
+    def inc(self, labels, amount=1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def state(self):
+        """[[label values, count], ...] of this process, as written to its worker file."""
+        with self._lock:
+            return [[list(labels), value] for labels, value in self._values.items()]
+
+    def render(self, lines, values):
+        """Append the samples of `values` ({label values: count}, merged across workers)."""
+        lines.append(f"# HELP {self.name} {self.help}")
+        lines.append(f"# TYPE {self.name} counter")
+        for labels, value in values.items():
+            lines.append(f"{self.name}{_labels(self.labelnames, labels)} {value}")
+
+
+class Histogram:
+    """Cumulative-bucket histogram; one observe() is a bisect and three additions under a lock."""
+
+    def __init__(self, name, help, labelnames, buckets):
+        self.name = name
+        self.help = help
+        self.labelnames = labelnames
+        self.buckets = tuple(buckets)
+        self._series = {}  # label values -> [bucket counts (last is +Inf), sum, count]
+        self._lock = threading.Lock()
+
+    def observe(self, labels, value):
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def state(self):
+        """[[label values, [bucket counts, sum, count]], ...] of this process."""
+        with self._lock:
+            return [[list(labels), [list(series[0]), series[1], series[2]]] for labels, series in self._series.items()]
+
+    def render(self, lines, series):
+        """Append the samples of `series` ({label values: [bucket counts, sum, count]}, merged across workers)."""
+        lines.append(f"# HELP {self.name} {self.help}")
+        lines.append(f"# TYPE {self.name} histogram")
+        names = self.labelnames + ('le',)
+        for labels, (counts, total, count) in series.items():
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + ('+Inf',), counts):
+                cumulative += bucket_count
+                lines.append(f"{self.name}_bucket{_labels(names, labels + (_number(bound),))} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(self.labelnames, labels)} {total}")
+            lines.append(f"{self.name}_count{_labels(self.labelnames, labels)} {count}")
+
+
+def _number(value):
+    return value if isinstance(value, str) else repr(float(value))
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(names, values, worker=None):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if worker is not None:  # gauges stay per worker; counters and histograms are summed
+        pairs.append(f'worker="{worker}"')
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+# --- Metric families ---
+
+request_seconds = Histogram(
+    'hsm_request_duration_seconds', 'Time to build each response, by route.',
+    ('route', 'method', 'status'), METRICS_LATENCY_BUCKETS)
+phase_seconds = Histogram(
+    'hsm_phase_duration_seconds', 'Time spent in each phase (fetch, parse, transform, serialize) per route.',
+    ('route', 'phase'), METRICS_LATENCY_BUCKETS)
+upstream_seconds = Histogram(
+    'hsm_upstream_request_duration_seconds', 'Latency of each upstream HTTP attempt.',
+    ('host', 'method'), METRICS_LATENCY_BUCKETS)
+upstream_responses = Counter(
+    'hsm_upstream_responses_total', 'Upstream HTTP attempts by status code ("error" for connection failures).',
+    ('host', 'method', 'status'))
+upstream_bytes = Histogram(
+    'hsm_upstream_response_bytes', 'Size of upstream response bodies.',
+    ('host',), METRICS_SIZE_BUCKETS)
+
+_families = [request_seconds, phase_seconds, upstream_seconds, upstream_responses, upstream_bytes]
+_gauges = []  # (name, help, label names, collect() -> {label values: value})
+
+
+def register_gauge(name, help, labelnames, collect):
+    """Expose a gauge whose samples are read from `collect()` at scrape time."""
+    _gauges.append((name, help, labelnames, collect))
+
+
+def current_route():
+    return getattr(_local, 'route', None) or 'background'
+
+
+@contextmanager
+def route_context(route):
+    """Attribute phases recorded in this block (e.g. on a fan-out thread) to `route`."""
+    previous = getattr(_local, 'route', None)
+    _local.route = route
+    try:
+        yield
+    finally:
+        _local.route = previous
+
+
+@contextmanager
+def phase(name):
+    """Time the enclosed block as phase `name` of the current route."""
+    if not METRICS_ENABLED:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        phase_seconds.observe((current_route(), name), time.perf_counter() - start)
+
+
+def timed(name):
+    """Decorator form of phase()."""
+    def decorator(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            with phase(name):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def record_upstream(host, method, status, seconds, size=None):
+    if not METRICS_ENABLED:
+        return
+    _ensure_flusher()
+    upstream_seconds.observe((host, method), seconds)
+    upstream_responses.inc((host, method, str(status)))
+    if size is not None:
+        upstream_bytes.observe((host,), size)
+
+
+class InstrumentedJSONProvider(DefaultJSONProvider):
+    """Flask's JSON provider with jsonify() timed as the serialize phase."""
+
+    def response(self, *args, **kwargs):
+        with phase('serialize'):
+            return super().response(*args, **kwargs)
+
+
+def instrument_app(app):
+    """Time every request by URL rule and time jsonify() as serialization."""
+    if not METRICS_ENABLED:
+        return
+    app.json = InstrumentedJSONProvider(app)
+
+    @app.before_request
+    def _start_timer():
+        _ensure_flusher()
+        g.metrics_start = time.perf_counter()
+        # Unmatched paths share one label so scanners cannot grow the series count
+        _local.route = request.url_rule.rule if request.url_rule is not None else 'unmatched'
+
+    @app.after_request
+    def _stop_timer(response):
+        start = g.pop('metrics_start', None)
+        if start is not None:
+            request_seconds.observe(
+                (current_route(), request.method, str(response.status_code)), time.perf_counter() - start)
+        _local.route = None
+        return response
+
+
+# --- Aggregation across gunicorn workers ---
+#
+# Each worker writes its samples to METRICS_DIR/<pid>.json every
+# METRICS_FLUSH_INTERVAL seconds and when it exits. A scrape, whichever
+# worker serves it, flushes its own file and then merges every file:
+# counters and histograms are summed, gauges keep a `worker` label. Files
+# of workers that have exited are folded into retired.json (gauges dropped),
+# so totals survive worker restarts without the directory growing.
+
+_RETIRED = 'retired.json'
+_flusher_pid = None
+_flusher_lock = threading.Lock()
+
+
+def _worker_path(pid):
+    return os.path.join(METRICS_DIR, f"{pid}.json")
+
+
+def _ensure_flusher():
+    """Start this process's flush thread; a no-op after the first call in each worker."""
+    global _flusher_pid
+    pid = os.getpid()
+    if _flusher_pid == pid:
+        return
+    with _flusher_lock:
+        if _flusher_pid == pid:
+            return
+        _flusher_pid = pid
+        try:
+            os.makedirs(METRICS_DIR, exist_ok=True)
+            _retire(pid)  # a file under our pid was left by an earlier process
+        except OSError as e:
+            logging.error(f"[Metrics] {e}")
+        threading.Thread(target=_flush_loop, name='metrics-flush', daemon=True).start()
+        atexit.register(_flush_quietly)
+
+
+def _flush_loop():
+    while True:
+        time.sleep(METRICS_FLUSH_INTERVAL)
+        _flush_quietly()
+
+
+def _flush_quietly():
+    try:
+        flush()
+    except OSError as e:
+        logging.error(f"[Metrics] {e}")
+
+
+def _local_state():
+    stats = cache_stats()
+    return {
+        "pid": os.getpid(),
+        "families": {family.name: family.state() for family in _families},
+        "gauges": {name: [[list(labels), value] for labels, value in collect().items()]
+                   for name, _, _, collect in _gauges},
+        "cache": {"feeds": stats["feeds"], "evictions": stats["evictions"], "coalesced": stats["coalesced"],
+                  "size": stats["size"]},
+    }
+
+
+def _write(path, state):
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, 'w') as f:
+        json.dump(state, f)
+    os.replace(tmp, path)  # readers see the old file or the new one, never a partial write
+
+
+def _read(path):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def flush():
+    """Write this worker's metrics to its file in METRICS_DIR."""
+    _write(_worker_path(os.getpid()), _local_state())
+
+
+def _alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except OSError:  # e.g. EPERM: the process exists
+        return True
+    return True
+
+
+def _retire(pid):
+    """Fold the counters and histograms of exited worker `pid` into retired.json and remove its file."""
+    with open(os.path.join(METRICS_DIR, 'retired.lock'), 'a') as lock:
+        if fcntl is not None:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+        state = _read(_worker_path(pid))
+        if state is None:
+            return
+        retired = _read(os.path.join(METRICS_DIR, _RETIRED)) or {}
+        families, cache = _merge([retired, state])
+        _write(os.path.join(METRICS_DIR, _RETIRED), {
+            "families": {name: [[list(labels), value] for labels, value in series.items()]
+                         for name, series in families.items()},
+            "cache": cache,
+        })
+        os.remove(_worker_path(pid))
+
+
+def _merge(states):
+    """({family name: {label values: summed value}}, summed cache counters) over `states`."""
+    families = {}
+    cache = {"feeds": {}, "evictions": 0, "coalesced": 0}
+    for state in states:
+        for name, series in state.get("families", {}).items():
+            merged = families.setdefault(name, {})
+            for labels, value in series:
+                labels = tuple(labels)
+                current = merged.get(labels)
+                if isinstance(value, list):  # histogram: [bucket counts, sum, count]
+                    if current is None:
+                        merged[labels] = [list(value[0]), value[1], value[2]]
+                    else:
+                        current[0] = [a + b for a, b in zip(current[0], value[0])]
+                        current[1] += value[1]
+                        current[2] += value[2]
+                else:
+                    merged[labels] = (current or 0) + value
+        stats = state.get("cache", {})
+        for feed, counts in stats.get("feeds", {}).items():
+            total = cache["feeds"].setdefault(feed, {"hits": 0, "misses": 0})
+            total["hits"] += counts["hits"]
+            total["misses"] += counts["misses"]
+        cache["evictions"] += stats.get("evictions", 0)
+        cache["coalesced"] += stats.get("coalesced", 0)
+    return families, cache
+
+
+def _worker_states():
+    """(states of the live workers, this one included; retired.json's state or None)."""
+    _ensure_flusher()
+    try:
+        flush()
+        names = os.listdir(METRICS_DIR)
+    except OSError as e:
+        logging.error(f"[Metrics] {e}")
+        return [_local_state()], None
+
+    live = []
+    for name in names:
+        pid = name[:-len('.json')]
+        if not name.endswith('.json') or not pid.isdigit():
+            continue
+        pid = int(pid)
+        if pid == os.getpid() or _alive(pid):
+            state = _read(os.path.join(METRICS_DIR, name))
+            if state is not None:
+                live.append(state)
+        else:
+            try:
+                _retire(pid)
+            except OSError as e:
+                logging.error(f"[Metrics] {e}")
+    return live, _read(os.path.join(METRICS_DIR, _RETIRED))
+
+
+def render():
+    """All metrics of every worker in the Prometheus text exposition format."""
+    live, retired = _worker_states()
+    families, cache = _merge(live + ([retired] if retired else []))
+
+    lines = []
+    for family in _families:
+        family.render(lines, families.get(family.name, {}))
+    for name, help, labelnames, _ in _gauges:
+        lines.append(f"# HELP {name} {help}")
+        lines.append(f"# TYPE {name} gauge")
+        for state in live:
+            for labels, value in state.get("gauges", {}).get(name, []):
+                lines.append(f"{name}{_labels(labelnames, labels, state['pid'])} {value}")
+
+    lines.append("# HELP hsm_cache_requests_total Snapshot cache lookups by feed and result.")
+    lines.append("# TYPE hsm_cache_requests_total counter")
+    for feed, counts in cache["feeds"].items():
+        for result in ("hits", "misses"):
+            lines.append(f"hsm_cache_requests_total{_labels(('feed', 'result'), (feed, result[:-1]))} {counts[result]}")
+    lines.append("# HELP hsm_cache_hit_ratio Fraction of snapshot cache lookups served from the cache.")
+    lines.append("# TYPE hsm_cache_hit_ratio gauge")
+    for feed, counts in cache["feeds"].items():
+        lookups = counts["hits"] + counts["misses"]
+        ratio = counts["hits"] / lookups if lookups else 0.0
+        lines.append(f"hsm_cache_hit_ratio{_labels(('feed',), (feed,))} {ratio}")
+    lines.append("# HELP hsm_cache_entries Snapshots currently held in each worker's cache.")
+    lines.append("# TYPE hsm_cache_entries gauge")
+    for state in live:
+        lines.append(f"hsm_cache_entries{_labels((), (), state['pid'])} {state.get('cache', {}).get('size', 0)}")
+    lines.append("# HELP hsm_cache_evictions_total Snapshots evicted to stay within CACHE_MAX_ENTRIES.")
+    lines.append("# TYPE hsm_cache_evictions_total counter")
+    lines.append(f"hsm_cache_evictions_total{_labels((), ())} {cache['evictions']}")
+    lines.append("# HELP hsm_cache_coalesced_total Concurrent misses that waited on another request's fetch.")
+    lines.append("# TYPE hsm_cache_coalesced_total counter")
+    lines.append(f"hsm_cache_coalesced_total{_labels((), ())} {cache['coalesced']}")
+    return "\n".join(lines) + "\n"
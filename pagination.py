@@ -0,0 +1,179 @@
+import base64
+import json
+import threading
+from bisect import bisect_left, bisect_right
+from collections import OrderedDict
+
+from config import PAGE_MAX_LIMIT
+
+KEY_FIELD = 'symbol'  # rows are keyed by symbol; it is kept in every projection as the tie-breaker
+SORTED_VIEWS_MAX = 16
+PAGES_MAX = 64
+
+_sorted_views = OrderedDict()  # (id(rows), field) -> (rows, sort keys, rows in sort order)
+_pages = OrderedDict()         # (id(rows), query) -> (rows, (page, next cursor))
+_lock = threading.Lock()
+
+
+class PageQueryError(ValueError):
+    """Invalid fields / sort / order / limit / after parameters; the message is shown to the client."""
+
+
+class PageQuery:
+    __slots__ = ('fields', 'sort', 'descending', 'limit', 'after')
+
+    def __init__(self, fields=None, sort=None, descending=False, limit=None, after=None):
+        self.fields = fields
+        self.sort = sort
+        self.descending = descending
+        self.limit = limit
+        self.after = after
+
+    @property
+    def is_identity(self):
+        """True when the rows can be served exactly as they are."""
+        return self.fields is None and self.sort is None and self.limit is None and self.after is None
+
+    def memo_key(self):
+        return (self.fields, self.sort, self.descending, self.limit, self.after)
+
+
+def parse_page_query(args):
+    """Read fields=, sort=, order=, limit= and after= from request args."""
+    fields = args.get('fields', default=None, type=str)
+    if fields is not None:
+        fields = tuple(dict.fromkeys([KEY_FIELD] + [field.strip() for field in fields.split(',') if field.strip()]))
+
+    order = args.get('order', default='asc', type=str).lower()
+    if order not in ('asc', 'desc'):
+        raise PageQueryError("Invalid order parameter")
+
+    limit = args.get('limit', default=None, type=str)
+    if limit is not None:
+        if not limit.isdigit() or int(limit) < 1:
+            raise PageQueryError("Invalid limit parameter")
+        limit = min(int(limit), PAGE_MAX_LIMIT)
+
+    after = args.get('after', default=None, type=str)
+    if after is not None:
+        after = decode_cursor(after)
+
+    sort = args.get('sort', default=None, type=str)
+    if sort is None and (limit is not None or after is not None):
+        sort = KEY_FIELD  # cursors need a stable order
+    return PageQuery(fields, sort, order == 'desc', limit, after)
+
+
+def _sort_key(row, field, position):
+    # Numbers before strings before missing values; ties broken by symbol, then snapshot position.
+    value = row.get(field)
+    if isinstance(value, bool) or value is None:
+        rank, value = (2, 0) if value is None else (0, int(value))
+    elif isinstance(value, (int, float)):
+        rank = 0
+    else:
+        rank, value = 1, str(value)
+    return (rank, value, str(row.get(KEY_FIELD)), position)
+
+
+def encode_cursor(key):
+    return base64.urlsafe_b64encode(json.dumps(key, separators=(',', ':')).encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor):
+    try:
+        rank, value, symbol, position = json.loads(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+        if rank not in (0, 1, 2) or not isinstance(value, (int, float, str)) or not isinstance(symbol, str) \
+                or not isinstance(position, int):
+            raise ValueError(cursor)
+        return (rank, value, symbol, position)
+    except (ValueError, TypeError):
+        raise PageQueryError("Invalid after cursor")
+
+
+def _sorted_view(rows, field, cache):
+    """(sort keys, rows) in ascending order; memoised per snapshot when `cache` is set."""
+    memo_key = (id(rows), field)
+    if cache:
+        with _lock:
+            view = _sorted_views.get(memo_key)
+        if view is not None and view[0] is rows:
+            return view[1], view[2]
+
+    keys = sorted(_sort_key(row, field, position) for position, row in enumerate(rows))
+    ordered = [rows[key[3]] for key in keys]  # references only, rows are not copied
+
+    if cache:
+        with _lock:
+            _sorted_views[memo_key] = (rows, keys, ordered)
+            _sorted_views.move_to_end(memo_key)
+            while len(_sorted_views) > SORTED_VIEWS_MAX:
+                _sorted_views.popitem(last=False)
+    return keys, ordered
+
+
+def _compute_page(rows, query, cache):
+    if query.sort is None:
+        selected = rows
+        next_key = None
+    else:
+        if rows and query.sort not in rows[0]:
+            raise PageQueryError("Invalid sort parameter")
+        keys, ordered = _sorted_view(rows, query.sort, cache)
+        try:
+            if query.descending:
+                end = len(keys) if query.after is None else bisect_left(keys, query.after)
+                start = 0 if query.limit is None else max(end - query.limit, 0)
+                selected = ordered[start:end][::-1]
+                next_key = keys[start] if query.limit is not None and start > 0 else None
+            else:
+                start = 0 if query.after is None else bisect_right(keys, query.after)
+                end = len(keys) if query.limit is None else min(start + query.limit, len(keys))
+                selected = ordered[start:end]
+                next_key = keys[end - 1] if query.limit is not None and end < len(keys) else None
+        except TypeError:
+            # the cursor's value is of a different type than this field's keys
+            raise PageQueryError("Invalid after cursor")
+
+    if query.fields is not None:
+        fields = query.fields
+        selected = [{field: row[field] for field in fields if field in row} for row in selected]
+    return selected, (encode_cursor(next_key) if next_key is not None else None)
+
+
+def page_rows(rows, query, cache=True):
+    """Project, sort and paginate `rows` (a snapshot list or a subset of one).
+
+    Sorting works on a memoised, per-snapshot sorted list of row references,
+    and only rows on the requested page are projected into new dicts. The
+    result for a snapshot and query is memoised too, so the response layer
+    keeps seeing the same object and can reuse its encoded body. Pass
+    cache=False for one-off subsets (e.g. filtered rows).
+
+    Returns (page rows, cursor for the next page or None).
+    """
+    if query.is_identity:
+        return rows, None
+    memo_key = (id(rows), query.memo_key())
+    if cache:
+        with _lock:
+            memo = _pages.get(memo_key)
+        if memo is not None and memo[0] is rows:
+            return memo[1]
+
+    result = _compute_page(rows, query, cache)
+
+    if cache:
+        with _lock:
+            _pages[memo_key] = (rows, result)
+            _pages.move_to_end(memo_key)
+            while len(_pages) > PAGES_MAX:
+                _pages.popitem(last=False)
+    return result
+
+
+def set_next_cursor(response, cursor):
+    """Advertise the next page with an X-Next-Cursor header (the body stays a plain list)."""
+    if cursor is not None:
+        response.headers['X-Next-Cursor'] = cursor
+    return response
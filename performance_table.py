@@ -0,0 +1,97 @@
+import threading
+
+
+def normalize_symbol(symbol):
+    return symbol.strip().upper()
+
+
+class PerformanceTable:
+    """One performance snapshot indexed by normalized symbol.
+
+    Secondary indexes by `sector_id` and `type` come from the company list
+    (chukul data/symbol) and are built on first use for each company list.
+    Lookups return rows in snapshot order, exactly as a linear filter would.
+    """
+
+    def __init__(self, rows):
+        self.rows = rows
+        positions = {}
+        for position, row in enumerate(rows):
+            positions.setdefault(normalize_symbol(row['symbol']), []).append(position)
+        self._positions = positions
+        self._secondary = None  # (companies, by_sector, by_type, listed_companies)
+        self._lock = threading.Lock()
+
+    def __contains__(self, symbol):
+        return symbol in self._positions
+
+    def _rows_at(self, positions):
+        return [self.rows[position] for position in sorted(positions)]
+
+    def positions_for(self, symbols):
+        """Snapshot positions of the given normalized symbols, unknown ones skipped."""
+        positions = set()
+        for symbol in symbols:
+            positions.update(self._positions.get(symbol, ()))
+        return positions
+
+    def lookup(self, symbols):
+        """Rows for the given normalized symbols; O(k) in the number of symbols."""
+        return self._rows_at(self.positions_for(symbols))
+
+    def join_companies(self, companies):
+        """Build the sector/type indexes from the company list, once per list."""
+        secondary = self._secondary
+        if secondary is not None and secondary[0] is companies:
+            return secondary
+        with self._lock:
+            secondary = self._secondary
+            if secondary is not None and secondary[0] is companies:
+                return secondary
+            by_sector = {}
+            by_type = {}
+            listed_companies = []
+            for company in companies:
+                symbol_positions = self._positions.get(normalize_symbol(company['symbol']))
+                if not symbol_positions:
+                    continue
+                listed_companies.append(company)
+                by_sector.setdefault(str(company['sector_id']), set()).update(symbol_positions)
+                by_type.setdefault(str(company['type']), set()).update(symbol_positions)
+            secondary = self._secondary = (companies, by_sector, by_type, listed_companies)
+            return secondary
+
+    def listed_companies(self, companies):
+        """Companies from `companies` that appear in this snapshot, in their original order."""
+        return self.join_companies(companies)[3]
+
+    def filter(self, companies, symbols=None, sector_id=None, company_type=None):
+        """Rows matching every given criterion, in snapshot order."""
+        _, by_sector, by_type, _ = self.join_companies(companies)
+        candidates = None
+        if symbols is not None:
+            candidates = self.positions_for(symbols)
+        for index, key in ((by_sector, sector_id), (by_type, company_type)):
+            if key is None:
+                continue
+            matches = index.get(str(key), set())
+            candidates = set(matches) if candidates is None else candidates & matches
+        if candidates is None:
+            return self.rows
+        return self._rows_at(candidates)
+
+
+_current = None
+_current_lock = threading.Lock()
+
+
+def table_for(rows):
+    """Return the PerformanceTable for a snapshot, building it once per snapshot."""
+    global _current
+    table = _current
+    if table is not None and table.rows is rows:
+        return table
+    with _current_lock:
+        if _current is None or _current.rows is not rows:
+            _current = PerformanceTable(rows)
+        return _current
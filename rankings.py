@@ -0,0 +1,94 @@
+import heapq
+import threading
+from collections import OrderedDict
+
+from performance_table import table_for
+
+# indicator -> (performance field ranked, largest first, only rows that moved that way)
+RANKINGS = {
+    'gainers': ('percentage_change', True, True),
+    'losers': ('percentage_change', False, True),
+    'turnover': ('turnover', True, False),
+    'sharestraded': ('volume', True, False),
+    'transactions': ('transactions', True, False),
+}
+
+RANKED_RESULTS_MAX = 32
+_NUMBERS = (int, float)
+_ranked_results = OrderedDict()  # (snapshot id, companies id, query) -> (snapshot, companies, ranked rows)
+_lock = threading.Lock()
+
+
+def mover_row(row, indicator):
+    """A performance row in the shape of the top-movers feed, tagged with its ranking."""
+    return {
+        "symbol": row.get('symbol'),
+        "ltp": row.get('ltp'),
+        "pointChange": row.get('change'),
+        "percentageChange": row.get('percentage_change'),
+        "turnover": row.get('turnover'),
+        "shareTraded": row.get('volume'),
+        "noOfTransactions": row.get('transactions'),
+        "type": indicator,
+    }
+
+
+def rank(rows, indicators, limit):
+    """Top `limit` rows for each indicator, concatenated in `indicators` order.
+
+    One pass over `rows` feeds a bounded heap per indicator, so the cost
+    is O(n log limit) instead of a full sort per indicator; rows that
+    cannot beat the weakest kept entry are skipped without touching the
+    heap. Ties keep snapshot order. Rows without a numeric value are left out.
+    """
+    limit = max(limit, 0)
+    heaps = {indicator: [] for indicator in indicators}
+    rankings = [(heaps[indicator], *RANKINGS[indicator]) for indicator in indicators]
+
+    if limit:
+        for position, row in enumerate(rows):
+            for heap, field, largest, movers_only in rankings:
+                value = row.get(field)
+                if type(value) not in _NUMBERS or value != value:  # bools, None, strings, NaN
+                    continue
+                if not largest:
+                    value = -value
+                if movers_only and value <= 0:
+                    continue
+                # The heap root is the weakest entry kept; on equal values the later row is weaker
+                if len(heap) < limit:
+                    heapq.heappush(heap, (value, -position, row))
+                elif value > heap[0][0]:
+                    heapq.heapreplace(heap, (value, -position, row))
+
+    ranked = []
+    for indicator in indicators:
+        ordered = sorted(heaps[indicator], key=lambda entry: entry[:2], reverse=True)
+        ranked.extend(mover_row(row, indicator) for _, _, row in ordered)
+    return ranked
+
+
+def ranked_rows(snapshot, indicators, limit, sector_id=None, companies=None):
+    """rank() over a performance snapshot, optionally one sector of it.
+
+    Sectors come from the company list (`sector_id`). Results are memoised
+    per snapshot, company list and query, so responses keep seeing the same
+    object and can reuse its encoded body.
+    """
+    if sector_id is None:
+        companies = None
+    memo_key = (id(snapshot), id(companies), tuple(indicators), limit, sector_id)
+    with _lock:
+        memo = _ranked_results.get(memo_key)
+    if memo is not None and memo[0] is snapshot and memo[1] is companies:
+        return memo[2]
+
+    rows = snapshot if sector_id is None else table_for(snapshot).filter(companies, sector_id=sector_id)
+    ranked = rank(rows, indicators, limit)
+
+    with _lock:
+        _ranked_results[memo_key] = (snapshot, companies, ranked)
+        _ranked_results.move_to_end(memo_key)
+        while len(_ranked_results) > RANKED_RESULTS_MAX:
+            _ranked_results.popitem(last=False)
+    return ranked
@@ -0,0 +1,105 @@
+import hashlib
+import mmap
+import os
+import struct
+import threading
+import time
+
+from flask import jsonify, request
+
+from config import RATE_LIMIT_ENABLED, RATE_LIMIT_SETS, RATE_LIMIT_FILE
+
+try:
+    import fcntl
+except ImportError:  # not available on Windows; limits are then per process
+    fcntl = None
+
+# One slot: key hash, tokens left, last refill time, last use time.
+_SLOT = struct.Struct('<Qddd')
+_WAYS = 4  # slots per set; the least recently used one is evicted
+_SET_SIZE = _SLOT.size * _WAYS
+
+
+class BucketTable:
+    """Fixed-size, set-associative table of token buckets in a shared mmap.
+
+    Every gunicorn worker maps the same file (under /dev/shm when
+    available), so limits apply per host rather than per worker. Memory
+    is bounded by RATE_LIMIT_SETS x 4 client slots. Each check touches
+    one set, guarded by a byte-range lock on that set only.
+    """
+
+    def __init__(self, path, sets):
+        self.sets = sets
+        size = sets * _SET_SIZE
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+        if os.fstat(self._fd).st_size != size:
+            os.ftruncate(self._fd, size)
+        self._map = mmap.mmap(self._fd, size)
+        self._lock = threading.Lock()
+
+    def take(self, key, rate, burst):
+        """Take one token from `key`'s bucket; False when the bucket is empty."""
+        key_hash = int.from_bytes(hashlib.blake2b(key.encode(), digest_size=8).digest(), 'little') or 1
+        offset = (key_hash % self.sets) * _SET_SIZE
+        now = time.time()
+
+        with self._lock:
+            if fcntl is not None:
+                fcntl.lockf(self._fd, fcntl.LOCK_EX, _SET_SIZE, offset)
+            try:
+                slots = [_SLOT.unpack_from(self._map, offset + way * _SLOT.size) for way in range(_WAYS)]
+                way = next((w for w, slot in enumerate(slots) if slot[0] == key_hash), None)
+                if way is None:
+                    # New client: take an empty slot or evict the least recently used one.
+                    way = min(range(_WAYS), key=lambda w: (slots[w][0] != 0, slots[w][3]))
+                    tokens = burst
+                else:
+                    _, tokens, refilled, _ = slots[way]
+                    tokens = min(burst, tokens + max(0.0, now - refilled) * rate)
+
+                allowed = tokens >= 1
+                if allowed:
+                    tokens -= 1
+                _SLOT.pack_into(self._map, offset + way * _SLOT.size, key_hash, tokens, now, now)
+                return allowed
+            finally:
+                if fcntl is not None:
+                    fcntl.lockf(self._fd, fcntl.LOCK_UN, _SET_SIZE, offset)
+
+
+_table = None
+_table_lock = threading.Lock()
+
+
+def _shared_table():
+    global _table
+    if _table is None:
+        with _table_lock:
+            if _table is None:
+                _table = BucketTable(RATE_LIMIT_FILE, RATE_LIMIT_SETS)
+    return _table
+
+
+class TokenBucketLimiter:
+    """`per_minute` requests per client, refilled continuously, bursting up to `burst`."""
+
+    def __init__(self, name, per_minute, burst=None):
+        self.name = name
+        self.rate = per_minute / 60.0
+        self.burst = float(burst if burst is not None else per_minute)
+
+    def allow(self, client):
+        return _shared_table().take(f"{self.name}:{client}", self.rate, self.burst)
+
+
+def rate_limit_blueprint(blueprint, limiter, error_body):
+    """Reject requests to every route of `blueprint` with 429 once the client's bucket is empty."""
+    if not RATE_LIMIT_ENABLED:
+        return
+
+    @blueprint.before_request
+    def check_rate_limit():
+        if not limiter.allow(request.remote_addr):
+            return jsonify(error_body), 429
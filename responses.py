@@ -0,0 +1,203 @@
+import gzip
+import hashlib
+import threading
+from collections import OrderedDict, deque
+
+from flask import current_app, g, request
+
+import metrics
+from cache import set_staleness_sink
+from config import (
+    DELTA_HISTORY_VERSIONS,
+    DELTA_HISTORY_VARIANTS,
+    INDEX_KEY_FIELDS,
+    COMPRESS_MIN_BYTES,
+    GZIP_LEVEL,
+    BROTLI_QUALITY,
+)
+
+try:
+    import orjson
+except ImportError:  # fall back to Flask's JSON provider
+    orjson = None
+
+try:
+    import brotli
+except ImportError:  # gzip only
+    brotli = None
+
+
+class _Variant:
+    __slots__ = ('payload', 'body', 'version', 'encoded', 'history')
+
+    def __init__(self):
+        self.payload = None
+        self.body = None
+        self.version = None
+        self.encoded = {}  # content-coding -> compressed body of the current version
+        self.history = deque(maxlen=DELTA_HISTORY_VERSIONS)  # (version, {row key: row} or None)
+
+
+_variants = OrderedDict()  # request variant -> _Variant
+_lock = threading.Lock()
+
+
+def _variant_key():
+    args = sorted((k, v) for k, v in request.args.items(multi=True) if k not in ('since', '_'))
+    return request.path, tuple(args)
+
+
+def _get_variant(key):
+    with _lock:
+        variant = _variants.get(key)
+        if variant is None:
+            variant = _variants[key] = _Variant()
+            while len(_variants) > DELTA_HISTORY_VARIANTS:
+                _variants.popitem(last=False)
+        else:
+            _variants.move_to_end(key)
+        return variant
+
+
+@metrics.timed('serialize')
+def _serialize(payload):
+    """JSON bytes with the same keys, order and trailing newline as jsonify()."""
+    if orjson is not None:
+        try:
+            return orjson.dumps(payload, option=orjson.OPT_SORT_KEYS | orjson.OPT_APPEND_NEWLINE)
+        except TypeError:
+            pass  # e.g. non-str keys; let Flask's provider handle it
+    return current_app.json.response(payload).get_data()
+
+
+@metrics.timed('serialize')
+def _compress(body, coding):
+    if coding == 'br':
+        return brotli.compress(body, quality=BROTLI_QUALITY)
+    return gzip.compress(body, compresslevel=GZIP_LEVEL, mtime=0)
+
+
+def _encode(variant, payload, row_key):
+    """Serialize and version `payload`, reusing the last result for the same snapshot object."""
+    with _lock:
+        if variant.payload is payload:
+            return variant.body, variant.version
+    body = _serialize(payload)
+    version = hashlib.blake2b(body, digest_size=8).hexdigest()
+    with _lock:
+        variant.payload, variant.body, variant.version = payload, body, version
+        variant.encoded = {}
+        if row_key is not None and (not variant.history or variant.history[-1][0] != version):
+            variant.history.append((version, _rows_by_key(payload, row_key)))
+    return body, version
+
+
+def _rows_by_key(payload, row_key):
+    """{row key: row}, or None when two rows share a key and a keyed delta could not be applied."""
+    rows = {}
+    for row in payload:
+        key = row_key(row)
+        if key in rows:
+            return None
+        rows[key] = row
+    return rows
+
+
+def _encoded_body(variant, body, version, coding):
+    """Compressed body for `coding`, compressed at most once per version."""
+    with _lock:
+        if variant.version == version and coding in variant.encoded:
+            return variant.encoded[coding]
+    compressed = _compress(body, coding)
+    with _lock:
+        if variant.version == version:
+            variant.encoded[coding] = compressed
+    return compressed
+
+
+def _preferred_coding(body):
+    if len(body) < COMPRESS_MIN_BYTES:
+        return None
+    accepted = request.accept_encodings
+    if brotli is not None and accepted['br']:
+        return 'br'
+    if accepted['gzip']:
+        return 'gzip'
+    return None
+
+
+def _delta(variant, since, version, payload, row_key):
+    since = since.split('-')[0]  # tolerate the coding suffix of a compressed ETag
+    with _lock:
+        previous = next((rows for v, rows in variant.history if v == since), None)
+    current = _rows_by_key(payload, row_key) if previous is not None else None
+    if current is None:
+        return {"version": version, "full": True, "rows": payload, "removed": []}
+    changed = [row for key, row in current.items() if previous.get(key) != row]
+    removed = [key for key in previous if key not in current]
+    return {"version": version, "full": False, "rows": changed, "removed": removed}
+
+
+def snapshot_response(payload, row_key=None):
+    """Build a JSON response for a snapshot with ETag and `since=` delta support.
+
+    The body has the same shape as `jsonify(payload)`; it is serialized once
+    per snapshot and, when the client accepts it, served from a stored
+    brotli or gzip encoding of that serialization. A matching `If-None-Match`
+    gets `304 Not Modified`. When `row_key` is given, `?since=<version>`
+    returns only the rows that changed since that version (by key) plus
+    the keys that disappeared; unknown versions, and snapshots in which two
+    rows share a key, fall back to the full list.
+    """
+    variant = _get_variant(_variant_key())
+    body, version = _encode(variant, payload, row_key)
+
+    since = request.args.get('since')
+    if since is not None and row_key is not None:
+        response = current_app.json.response(_delta(variant, since, version, payload, row_key))
+        response.set_etag(version)
+        return response.make_conditional(request)
+
+    coding = _preferred_coding(body)
+    if coding is None:
+        response = current_app.response_class(body, mimetype='application/json')
+        response.set_etag(version)
+    else:
+        response = current_app.response_class(_encoded_body(variant, body, version, coding), mimetype='application/json')
+        response.headers['Content-Encoding'] = coding
+        response.set_etag(f"{version}-{coding}")  # each representation needs its own strong ETag
+    response.vary.add('Accept-Encoding')
+    return response.make_conditional(request)
+
+
+def field_key(*fields):
+    """Row key made from one or more fields, e.g. field_key('type', 'symbol')."""
+    if len(fields) == 1:
+        field = fields[0]
+        return lambda row: row.get(field)
+    return lambda row: "|".join(str(row.get(field)) for field in fields)
+
+
+def index_key(row):
+    """Key for a GetIndexLive / GetSubIndexLive row."""
+    for field in INDEX_KEY_FIELDS:
+        if field in row:
+            return row[field]
+    return None
+
+
+def mark_stale_responses(app):
+    """Add X-Snapshot-Stale: <age in seconds> to responses built from a last-known-good snapshot."""
+
+    @app.before_request
+    def _collect_staleness():
+        g.stale_ages = []
+        set_staleness_sink(g.stale_ages)
+
+    @app.after_request
+    def _stamp_staleness(response):
+        stale_ages = g.pop('stale_ages', None)
+        set_staleness_sink(None)
+        if stale_ages:
+            response.headers['X-Snapshot-Stale'] = str(int(max(stale_ages)))
+        return response
@@ -1,12 +1,21 @@
 
 from flask import Blueprint, jsonify, request
 import os
-import requests
 import logging
 
+import http_client
+import metrics
+from cache import cached_fetch, cache_key
+from config import RATE_LIMITS
+from rate_limiter import TokenBucketLimiter, rate_limit_blueprint
+from shared_snapshots import register_refresh
+
 auto_post_bp = Blueprint('auto_post', __name__)
 API_KEY = os.getenv('API_KEY')
 
+# Token-bucket rate limit per client IP, shared by all workers
+rate_limit_blueprint(auto_post_bp, TokenBucketLimiter('auto_post', RATE_LIMITS['auto_post']), [{ "error": "Rate limit exceeded. Try again later." }])
+
 # --- Authentication Helper ---
 def is_authenticated(req):
     return (
@@ -18,9 +27,17 @@ def is_authenticated(req):
 def fetch_nepse_summary():
     """Fetch NEPSE summary data from Nepalipaisa."""
     url = "https://nepalipaisa.com/api/GetNepseLive"
-    response = requests.get(url)
-    response.raise_for_status()
-    return response.json().get("result", {})
+
+    def load():
+        response = http_client.get(url)
+        response.raise_for_status()
+        with metrics.phase('parse'):
+            return response.json().get("result", {})
+
+    return cached_fetch('nepse_live', cache_key(url), load)
+
+# Kept fresh for every worker by the elected snapshot refresher
+register_refresh('nepse_live', fetch_nepse_summary)
 
 # --- Route: NEPSE Close Summary ---
 @auto_post_bp.route('/v2/post/nepse/close', methods=['GET'])
@@ -1,38 +1,29 @@
 from flask import Blueprint, jsonify, request
 import logging
-import requests
-from bs4 import BeautifulSoup
 import os
-import time
+
+import http_client
+import metrics
+from cache import cached_fetch, cache_key
+from config import RATE_LIMITS
+from html_parsing import parse_subtree
+from rate_limiter import TokenBucketLimiter, rate_limit_blueprint
+from shared_snapshots import register_refresh
 
 cdsc_data_bp = Blueprint('cdsc_data', __name__)
 
 API_KEY = os.getenv('API_KEY')  # Set this in Render.com env vars
 
-# --- Basic Rate Limiter (in-memory) ---
-REQUEST_LOG = {}
-MAX_REQUESTS_PER_MINUTE = 10  # You can adjust this
-
-def rate_limit(ip):
-    now = time.time()
-    window = 60  # 60 seconds
-    if ip not in REQUEST_LOG:
-        REQUEST_LOG[ip] = [now]
-        return False
-    REQUEST_LOG[ip] = [ts for ts in REQUEST_LOG[ip] if now - ts < window]
-    if len(REQUEST_LOG[ip]) >= MAX_REQUESTS_PER_MINUTE:
-        return True
-    REQUEST_LOG[ip].append(now)
-    return False
+# --- Rate Limiter (token bucket shared by all workers) ---
+rate_limit_blueprint(
+    cdsc_data_bp,
+    TokenBucketLimiter('cdsc_data', RATE_LIMITS['cdsc_data']),
+    {'success': False, 'message': 'Rate limit exceeded. Try again later.'},
+)
 
 # --- API Route ---
 @cdsc_data_bp.route('/api/v1/cdsc/data', methods=['GET'])
 def get_cdsc_data():
-    ip = request.remote_addr
-
-    if rate_limit(ip):
-        return jsonify({'success': False, 'message': 'Rate limit exceeded. Try again later.'}), 429
-
     provided_key = request.headers.get('x-api-key') or request.args.get('api_key')
     if not API_KEY or provided_key != API_KEY:
         return jsonify({'success': False, 'message': 'Unauthorized. Invalid or missing API Key.'}), 401
@@ -46,9 +37,18 @@ def get_cdsc_data():
 
 def scrape_cdsc_data():
     url = "https://www.cdsc.com.np/"
-    response = requests.get(url, verify=False)
-    html_content = response.text
-    soup = BeautifulSoup(html_content, "html.parser")
+    return cached_fetch('cdsc', cache_key(url), lambda: _scrape_cdsc_page(url))
+
+# Kept fresh for every worker by the elected snapshot refresher
+register_refresh('cdsc', scrape_cdsc_data)
+
+def _scrape_cdsc_page(url):
+    response = http_client.conditional_get(url, verify=False)
+    return parse_cdsc_html(response.text)
+
+@metrics.timed('parse')
+def parse_cdsc_html(html_content):
+    soup = parse_subtree(html_content, "div", "fun-factor-area")
     div = soup.find("div", class_="fun-factor-area")
     h4_elements = div.find_all("h4")
     data = []
@@ -0,0 +1,136 @@
+from flask import Blueprint, jsonify, request
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+from config import RATE_LIMITS, DASHBOARD_MAX_RESOURCES, DASHBOARD_MAX_WORKERS
+from fanout import fan_out, DeadlineExceeded
+from performance_table import normalize_symbol, table_for
+from rate_limiter import TokenBucketLimiter, rate_limit_blueprint
+from responses import snapshot_response
+from routes.market_insights import is_authenticated, fetch_market_status_data, fetch_live_index_data
+from routes.stock_movement_summary import breadth_engine, fetch_and_process_data
+from routes.top_performers import fetch_top_performers, parse_indicators
+from routes.watchlist import fetch_performance_data, fetch_symbol_data
+
+dashboard_bp = Blueprint('dashboard', __name__)
+
+# Token-bucket rate limit per client IP, shared by all workers
+rate_limit_blueprint(dashboard_bp, TokenBucketLimiter('dashboard', RATE_LIMITS['dashboard']), { "error": "Rate limit exceeded. Try again later." })
+
+# Resolvers may fan out on the shared pool themselves, so batches get their own pool.
+_executor = ThreadPoolExecutor(max_workers=DASHBOARD_MAX_WORKERS, thread_name_prefix='dashboard')
+
+
+class ResourceError(Exception):
+    """A resource spec that cannot be resolved; the message is returned to the client."""
+
+
+# --- Resource resolvers: resolver(args) -> JSON-ready data ---
+
+def resolve_status(args):
+    data = fetch_market_status_data()
+    return {
+        "marketOpen": data.get("is_open", False),
+        "lastUpdated": int(data.get("as_of_live_unix", 0) * 1000),  # convert to ms
+    }
+
+def resolve_index(args):
+    return fetch_live_index_data('GetIndexLive').get("result", [])
+
+def resolve_subindex(args):
+    return fetch_live_index_data('GetSubIndexLive').get("result", [])
+
+def resolve_movement(args):
+    """movement, movement:sector or movement:type"""
+    group = args[0] if args else None
+    if group not in (None, 'sector', 'type'):
+        raise ResourceError("Invalid group parameter")
+    summary = fetch_and_process_data()
+    if group is None:
+        return summary
+    companies_data = fetch_symbol_data()
+    if not companies_data:
+        raise ResourceError("Failed to fetch companies data")
+    return breadth_engine.grouped(companies_data)[group]
+
+def resolve_top(args):
+    """top:<indicator>[:<limit>[:<sectorCode>]], e.g. top:gainers:10 or top:gainers,losers:5:4"""
+    indicator = args[0] if args else 'gainers'
+    if parse_indicators(indicator) is None:
+        raise ResourceError("Invalid indicator specified")
+    try:
+        limit = int(args[1]) if len(args) > 1 else 10
+    except ValueError:
+        raise ResourceError("Invalid limit")
+    sector_code = (args[2].strip() or None) if len(args) > 2 else None
+    return fetch_top_performers(limit, indicator, sector_code)
+
+def resolve_watchlist(args):
+    """watchlist:<SYMBOL>,<SYMBOL>,..."""
+    symbols = [normalize_symbol(symbol) for symbol in (args[0] if args else '').split(',') if symbol.strip()]
+    if not symbols:
+        raise ResourceError("No symbols given")
+    performance_data = fetch_performance_data()
+    if not performance_data:
+        raise ResourceError("Failed to fetch companies performance data")
+    return table_for(performance_data).lookup(symbols)
+
+RESOLVERS = {
+    'status': resolve_status,
+    'index': resolve_index,
+    'subindex': resolve_subindex,
+    'movement': resolve_movement,
+    'top': resolve_top,
+    'watchlist': resolve_watchlist,
+}
+
+def resolve(spec):
+    name, *args = spec.split(':')
+    resolver = RESOLVERS.get(name)
+    if resolver is None:
+        raise ResourceError(f"Unknown resource '{name}'")
+    return resolver(args)
+
+
+def requested_specs():
+    """Specs from repeated ?resource= params or a JSON body {"resources": [...]}."""
+    if request.method == 'POST':
+        body = request.get_json(silent=True) or {}
+        specs = body.get('resources') if isinstance(body, dict) else None
+        if not isinstance(specs, list) or not all(isinstance(spec, str) for spec in specs):
+            return None
+    else:
+        specs = request.args.getlist('resource')
+    return list(dict.fromkeys(spec.strip() for spec in specs if spec.strip()))
+
+
+# --- Route: batched dashboard ---
+@dashboard_bp.route('/v1/dashboard', methods=['GET', 'POST'])
+def get_dashboard():
+    """Resolve several resources concurrently into one document.
+
+    Each spec maps to its data under "data" or to a message under
+    "errors"; one failing resource never fails the batch.
+    """
+    if not is_authenticated(request):
+        return jsonify({ "error": "Unauthorized. Invalid Key." }), 401
+
+    specs = requested_specs()
+    if not specs:
+        return jsonify({ "error": "No resources requested" }), 400
+    if len(specs) > DASHBOARD_MAX_RESOURCES:
+        return jsonify({ "error": f"At most {DASHBOARD_MAX_RESOURCES} resources per request" }), 400
+
+    data, errors = {}, {}
+    for spec, result in zip(specs, fan_out(resolve, [(spec,) for spec in specs], executor=_executor)):
+        if isinstance(result, ResourceError):
+            errors[spec] = str(result)
+        elif isinstance(result, DeadlineExceeded):
+            errors[spec] = "Timed out"
+        elif isinstance(result, Exception):
+            logging.error(f"[Dashboard: {spec}] {result}")
+            errors[spec] = "Failed to fetch resource."
+        else:
+            data[spec] = result
+
+    return snapshot_response({"data": data, "errors": errors})
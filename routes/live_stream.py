@@ -0,0 +1,187 @@
+from flask import Blueprint, Response, jsonify, request, stream_with_context
+import json
+import logging
+import queue
+import threading
+import time
+
+from config import (
+    STREAM_ENABLED,
+    STREAM_REFRESH_INTERVAL,
+    STREAM_HEARTBEAT_INTERVAL,
+    STREAM_QUEUE_SIZE,
+    STREAM_CHANGE_FIELDS,
+)
+from performance_table import normalize_symbol
+from routes.market_insights import is_authenticated, fetch_market_status_data, fetch_live_index_data
+from routes.watchlist import fetch_performance_data
+
+live_stream_bp = Blueprint('live_stream', __name__)
+
+# Sentinel pushed to a subscriber queue when the feed stops for the day.
+MARKET_CLOSED = object()
+
+
+class Subscriber(queue.Queue):
+    """A client's queue of pending events; `dropped` is set when it fell too far behind."""
+
+    def __init__(self, maxsize):
+        super().__init__(maxsize=maxsize)
+        self.dropped = False
+
+
+class LiveFeed:
+    """One shared refresh loop that pushes changed rows to every subscriber."""
+
+    def __init__(self, interval):
+        self.interval = interval
+        self.stocks = {}       # normalized symbol -> latest row
+        self.indices = []      # latest GetIndexLive result
+        self.market_open = None
+        self._refreshed = False
+        self._refreshed_at = 0.0  # time.monotonic() of the last refresh
+        self._subscribers = set()
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+        self._thread = None
+
+    def subscribe(self):
+        subscriber = Subscriber(STREAM_QUEUE_SIZE)
+        with self._lock:
+            self._subscribers.add(subscriber)
+            # Rows and market state are only current while the loop runs and keeps refreshing
+            stale = self._thread is None or time.monotonic() - self._refreshed_at >= self.interval
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='live-feed', daemon=True)
+                self._thread.start()
+        if stale or not self._refreshed:
+            try:
+                self.refresh()
+            except Exception:
+                self.unsubscribe(subscriber)
+                raise
+        return subscriber
+
+    def unsubscribe(self, subscriber):
+        with self._lock:
+            self._subscribers.discard(subscriber)
+
+    def _run(self):
+        while True:
+            time.sleep(self.interval)
+            with self._lock:
+                if not self._subscribers:
+                    # The next subscriber restarts the loop from a fresh snapshot
+                    self._thread = None
+                    self._refreshed = False
+                    return
+            try:
+                self.refresh()
+            except Exception as e:
+                logging.error(f"[Live Stream] refresh failed: {e}")
+
+    def refresh(self):
+        """Fetch the shared snapshots and publish whatever moved since the last refresh."""
+        with self._refresh_lock:
+            performance = fetch_performance_data() or []
+            indices = (fetch_live_index_data('GetIndexLive') or {}).get("result", [])
+            market_open = bool(fetch_market_status_data().get("is_open", False))
+
+            changed_stocks = {}
+            for row in performance:
+                symbol = normalize_symbol(row['symbol'])
+                previous = self.stocks.get(symbol)
+                if previous is None or any(previous.get(f) != row.get(f) for f in STREAM_CHANGE_FIELDS):
+                    changed_stocks[symbol] = row
+            changed_indices = [
+                row for position, row in enumerate(indices)
+                if position >= len(self.indices) or self.indices[position] != row
+            ]
+
+            self.stocks = {normalize_symbol(row['symbol']): row for row in performance}
+            self.indices = indices
+            self.market_open = market_open
+            first_refresh = not self._refreshed
+            self._refreshed = True
+            self._refreshed_at = time.monotonic()
+
+        if first_refresh:
+            return
+        if changed_stocks or changed_indices:
+            self._publish({"stocks": changed_stocks, "indices": changed_indices})
+        if not market_open:
+            self._publish(MARKET_CLOSED)
+
+    def _publish(self, event):
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for subscriber in subscribers:
+            try:
+                subscriber.put_nowait(event)
+            except queue.Full:
+                # Slow client: drop it rather than letting its backlog grow; its
+                # stream ends so the client reconnects for a fresh snapshot.
+                subscriber.dropped = True
+                self.unsubscribe(subscriber)
+
+
+live_feed = LiveFeed(STREAM_REFRESH_INTERVAL)
+
+
+def sse_event(event, data):
+    return f"event: {event}\ndata: {json.dumps(data, separators=(',', ':'))}\n\n"
+
+
+@live_stream_bp.route('/v1/market/stream', methods=['GET'])
+def stream_market_updates():
+    """Server-Sent Events: initial snapshot, then only rows that moved."""
+    if not is_authenticated(request):
+        return jsonify([{ "error": "Unauthorized. Invalid Key." }]), 401
+    if not STREAM_ENABLED:
+        return jsonify([{ "error": "Market stream is only available with SERVER_MODE=async." }]), 503
+
+    stocks_param = request.args.get('stocks', default='all', type=str)
+    include_indices = request.args.get('indices', default='true', type=str).lower() != 'false'
+    symbols = None
+    if stocks_param != 'all' and stocks_param:
+        symbols = {normalize_symbol(symbol) for symbol in stocks_param.split(',')}
+
+    try:
+        subscriber = live_feed.subscribe()
+    except Exception as e:
+        logging.error(f"[Live Stream] subscribe failed: {e}")
+        return jsonify([{ "error": "Unable to start market stream." }]), 500
+
+    def select(stocks, indices):
+        rows = [row for symbol, row in stocks.items() if symbols is None or symbol in symbols]
+        return {"stocks": rows, "indices": indices if include_indices else []}
+
+    def generate():
+        try:
+            yield sse_event("snapshot", dict(select(live_feed.stocks, live_feed.indices), marketOpen=live_feed.market_open))
+            if not live_feed.market_open:
+                yield sse_event("close", {"marketOpen": False})
+                return
+            while True:
+                if subscriber.dropped:
+                    # Updates were lost while the client lagged; its view cannot be patched up.
+                    yield sse_event("error", {"message": "Stream fell behind. Reconnect for a fresh snapshot."})
+                    return
+                try:
+                    event = subscriber.get(timeout=STREAM_HEARTBEAT_INTERVAL)
+                except queue.Empty:
+                    yield ": heartbeat\n\n"
+                    continue
+                if event is MARKET_CLOSED:
+                    yield sse_event("close", {"marketOpen": False})
+                    return
+                update = select(event["stocks"], event["indices"])
+                if update["stocks"] or update["indices"]:
+                    yield sse_event("update", update)
+        finally:
+            live_feed.unsubscribe(subscriber)
+
+    response = Response(stream_with_context(generate()), mimetype='text/event-stream')
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['X-Accel-Buffering'] = 'no'  # keep reverse proxies from buffering the stream
+    return response
@@ -0,0 +1,75 @@
+from flask import Blueprint, jsonify, request
+import logging
+import re
+
+from cache import on_refresh
+from config import TICK_MAX_POINTS
+from performance_table import normalize_symbol
+from responses import index_key
+from routes.market_insights import is_authenticated
+from tick_store import tick_recorder, trading_day
+
+market_history_bp = Blueprint('market_history', __name__)
+
+# --- Recorder: append every freshly fetched snapshot to today's tick store ---
+
+def record_performance(key, rows):
+    tick_recorder.record('stocks', {normalize_symbol(row['symbol']): row for row in rows})
+
+def record_indices(key, data):
+    series = 'sub_indices' if 'GetSubIndexLive' in key else 'indices'
+    rows = {}
+    for row in data.get("result", []):
+        name = index_key(row)
+        if name is not None:
+            rows[str(name)] = row
+    tick_recorder.record(series, rows)
+
+on_refresh('performance', record_performance)
+on_refresh('index_live', record_indices)
+
+# --- Route: intraday series for a symbol or index ---
+@market_history_bp.route('/v1/market/history', methods=['GET'])
+def get_intraday_history():
+    """Return one symbol's or index's intraday series as parallel arrays."""
+    if not is_authenticated(request):
+        return jsonify([{ "error": "Unauthorized. Invalid Key." }]), 401
+
+    symbol = request.args.get('symbol', type=str)
+    index = request.args.get('index', type=str)
+    day = request.args.get('date', default=trading_day(), type=str)
+    start_ms = request.args.get('from', default=None, type=int)
+    end_ms = request.args.get('to', default=None, type=int)
+    points = request.args.get('points', default=TICK_MAX_POINTS, type=int)
+
+    if bool(symbol) == bool(index):
+        return jsonify({"error": "Specify exactly one of symbol or index"}), 400
+    if not re.fullmatch(r"\d{4}-\d{2}-\d{2}", day):
+        return jsonify({"error": "Invalid date parameter"}), 400
+    points = max(1, min(points, TICK_MAX_POINTS))
+
+    try:
+        if symbol:
+            key = normalize_symbol(symbol)
+            result = tick_recorder.query(day, 'stocks', key, start_ms, end_ms, points)
+        else:
+            key = index
+            result = None
+            for series in ('indices', 'sub_indices'):
+                result = tick_recorder.query(day, series, key, start_ms, end_ms, points)
+                if result is not None:
+                    break
+
+        if result is None:
+            return jsonify({"error": f"No intraday data for {key} on {day}"}), 404
+
+        timestamps, columns = result
+        data = {"key": key, "date": day, "timestamps": timestamps.tolist()}
+        for field, values in columns.items():
+            # NaN marks snapshots where the key was absent
+            data[field] = [None if value != value else value for value in values.tolist()]
+        return jsonify(data)
+
+    except Exception as e:
+        logging.error(f"[Market History] {e}")
+        return jsonify([{ "error": "Unable to fetch intraday history." }]), 500
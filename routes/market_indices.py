@@ -1,8 +1,13 @@
 from flask import Blueprint, jsonify, request
 import logging
-import requests
 import time
 
+import http_client
+import metrics
+from cache import cached_fetch, cache_key
+from fanout import fan_out
+from responses import snapshot_response, index_key
+
 market_indices_bp = Blueprint('market_indices', __name__)
 
 @market_indices_bp.route('/get_market_indices', methods=['GET'])
@@ -14,13 +19,17 @@ def get_market_indices():
             api_endpoint = 'GetIndexLive' if indices_type == 'indices' else 'GetSubIndexLive'
             data = fetch_market_indices(api_endpoint)
         elif indices_type == 'all_indices':
-            index_data = fetch_market_indices('GetIndexLive')
-            subindex_data = fetch_market_indices('GetSubIndexLive')
+            index_data, subindex_data = fan_out(fetch_market_indices, [('GetIndexLive',), ('GetSubIndexLive',)])
+            for result in (index_data, subindex_data):
+                if isinstance(result, Exception):
+                    raise result
             data = index_data + subindex_data if index_data and subindex_data else None
         else:
             return jsonify({"error": "Invalid type parameter"}), 400
         
-        return jsonify(data)
+        if data is None:
+            raise Exception("No index data from upstream")
+        return snapshot_response(data, row_key=index_key)
     except Exception as e:
         logging.error(f"An error occurred while fetching market indices: {str(e)}")
         return jsonify({'success': False, 'message': 'Failed to fetch market indices.'}), 500
@@ -28,9 +37,15 @@ def get_market_indices():
 def fetch_market_indices(api_endpoint):
     current_time_ms = int(round(time.time() * 1000))
     url = f"https://nepalipaisa.com/api/{api_endpoint}?_={current_time_ms}"
-    response = requests.get(url)
 
-    if response.status_code == 200:
-        return response.json()['result']
-    else:
-        return None
+    def load():
+        response = http_client.get(url)
+
+        if response.status_code == 200:
+            with metrics.phase('parse'):
+                return response.json()
+        else:
+            return None
+
+    data = cached_fetch('index_live', cache_key(url), load)
+    return data['result'] if data is not None else None
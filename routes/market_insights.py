@@ -1,8 +1,15 @@
 from flask import Blueprint, jsonify, request
 import os
-import requests
 import time
 import logging
+from functools import partial
+
+import http_client
+import metrics
+from cache import cached_fetch, cache_key
+from config import RATE_LIMITS
+from rate_limiter import TokenBucketLimiter, rate_limit_blueprint
+from shared_snapshots import register_refresh
 
 # Blueprint setup
 market_insights_bp = Blueprint('market_insights', __name__)
@@ -10,6 +17,9 @@ market_insights_bp = Blueprint('market_insights', __name__)
 # Load secure API key from environment (e.g., "light")
 API_KEY = os.getenv('API_KEY')
 
+# Token-bucket rate limit per client IP, shared by all workers
+rate_limit_blueprint(market_insights_bp, TokenBucketLimiter('market_insights', RATE_LIMITS['market_insights']), [{ "error": "Rate limit exceeded. Try again later." }])
+
 # --- Helper Functions ---
 
 def is_authenticated(req):
@@ -22,9 +32,32 @@ def is_authenticated(req):
 def fetch_market_status_data():
     """Fetch live market status from Chukul."""
     url = "https://chukul.com/api/tools/market/status/"
-    response = requests.get(url)
-    response.raise_for_status()
-    return response.json()
+
+    def load():
+        response = http_client.get(url)
+        response.raise_for_status()
+        with metrics.phase('parse'):
+            return response.json()
+
+    return cached_fetch('market_status', cache_key(url), load)
+
+def fetch_live_index_data(api_endpoint):
+    """Fetch a live index list (GetIndexLive / GetSubIndexLive) from Nepalipaisa."""
+    timestamp = int(time.time() * 1000)
+    url = f"https://nepalipaisa.com/api/{api_endpoint}?_={timestamp}"
+
+    def load():
+        response = http_client.get(url)
+        response.raise_for_status()
+        with metrics.phase('parse'):
+            return response.json()
+
+    return cached_fetch('index_live', cache_key(url), load)
+
+# Kept fresh for every worker by the elected snapshot refresher
+register_refresh('market_status', fetch_market_status_data)
+register_refresh('index_live', partial(fetch_live_index_data, 'GetIndexLive'))
+register_refresh('index_live', partial(fetch_live_index_data, 'GetSubIndexLive'))
 
 # --- Route Insights > Status  ---
 @market_insights_bp.route('/v1/market/insights/status', methods=['GET'])
@@ -54,12 +87,7 @@ def get_index_list():
         return jsonify([{ "error": "Unauthorized. Invalid Key." }]), 401
 
     try:
-        # Dynamic timestamp in milliseconds
-        timestamp = int(time.time() * 1000)
-        url = f"https://nepalipaisa.com/api/GetIndexLive?_={timestamp}"
-        response = requests.get(url)
-        response.raise_for_status()
-        data = response.json()
+        data = fetch_live_index_data('GetIndexLive')
 
         index_list = data.get("result", [])
         return jsonify(index_list)
@@ -76,11 +104,7 @@ def get_subindex_list():
         return jsonify([{ "error": "Unauthorized. Invalid Key." }]), 401
 
     try:
-        timestamp = int(time.time() * 1000)
-        url = f"https://nepalipaisa.com/api/GetSubIndexLive?_={timestamp}"
-        response = requests.get(url)
-        response.raise_for_status()
-        data = response.json()
+        data = fetch_live_index_data('GetSubIndexLive')
 
         subindex_list = data.get("result", [])
         return jsonify(subindex_list)
@@ -0,0 +1,15 @@
+from flask import Blueprint, Response, jsonify, request
+
+import metrics
+from routes.market_insights import is_authenticated
+
+metrics_bp = Blueprint('metrics', __name__)
+
+# --- Route: Prometheus metrics (scrape with the view-mode key as a header or param) ---
+@metrics_bp.route('/metrics', methods=['GET'])
+def get_metrics():
+    """Per-route, per-phase and upstream metrics of all workers in Prometheus text format."""
+    if not is_authenticated(request):
+        return jsonify([{ "error": "Unauthorized. Invalid Key." }]), 401
+
+    return Response(metrics.render(), mimetype='text/plain; version=0.0.4')
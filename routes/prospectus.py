@@ -1,53 +1,157 @@
 from flask import Blueprint, jsonify, request
 import logging
-import requests
-from bs4 import BeautifulSoup
+import os
+import sqlite3
+import threading
+import time
+
+import http_client
+import metrics
+from cache import cached_fetch, cache_key
+from config import DATA_DIR, PROSPECTUS_SIZE_DB, PROSPECTUS_MAX_PAGE, PROSPECTUS_MAX_PAGES_PER_REQUEST
+from fanout import fan_out
+from html_parsing import parse_subtree
+from shared_snapshots import register_refresh
 
 prospectus_bp = Blueprint('prospectus', __name__)
 
 @prospectus_bp.route('/get_prospectus', methods=['GET'])
 def get_prospectus():
+    pages = parse_pages(request.args.get('pages', '1,2,3'))
+    if pages is None:
+        return jsonify({'success': False, 'message': f'Invalid pages parameter (at most {PROSPECTUS_MAX_PAGES_PER_REQUEST} '
+                                                     f'pages between 1 and {PROSPECTUS_MAX_PAGE})'}), 400
     try:
-        pages_str = request.args.get('pages', '1,2,3')
-        pages = [int(page) for page in pages_str.split(',')]
         data = scrape_prospectus(pages)
         return jsonify(data)
     except Exception as e:
         logging.error(f"An error occurred: {str(e)}")
         return jsonify({'success': False, 'message': 'Failed to retrieve prospectus data.'}), 500
 
+def parse_pages(pages_str):
+    """Distinct page numbers from "1,2,3", or None unless all are within 1..PROSPECTUS_MAX_PAGE."""
+    pages = [page.strip() for page in pages_str.split(',')]
+    if not all(page.isdigit() for page in pages):
+        return None
+    pages = list(dict.fromkeys(int(page) for page in pages))
+    if len(pages) > PROSPECTUS_MAX_PAGES_PER_REQUEST or not all(1 <= page <= PROSPECTUS_MAX_PAGE for page in pages):
+        return None
+    return pages
+
 def scrape_prospectus(page_numbers):
+    page_results = fan_out(fetch_prospectus_page, [(page_number,) for page_number in page_numbers])
+
+    combined_rows = []
+    for page_number, page_rows in zip(page_numbers, page_results):
+        if isinstance(page_rows, Exception):
+            logging.error(f"Failed to retrieve page {page_number}: {page_rows}")
+        elif page_rows:
+            combined_rows.extend(page_rows)
+
+    file_sizes = get_prospectus_sizes([row["fileUrl"] for row in combined_rows if row["fileUrl"]])
+
     combined_data = []
+    with metrics.phase('transform'):
+        for row in combined_rows:
+            data = {key: value for key, value in row.items() if key != "fileUrl"}
+            data["fileSize"] = file_sizes.get(row["fileUrl"], "N/A") if row["fileUrl"] else "N/A"
+            combined_data.append(data)
+    return combined_data
+
+def fetch_prospectus_page(page_number):
+    url = f"https://www.sebon.gov.np/prospectus?page={page_number}"
+    return cached_fetch('prospectus', cache_key(url), lambda: scrape_prospectus_page(url, page_number))
+
+def prefetch_prospectus_pages():
+    """Refresh the pages the route serves by default."""
+    for page_number in (1, 2, 3):
+        fetch_prospectus_page(page_number)
+
+# Kept fresh for every worker by the elected snapshot refresher
+register_refresh('prospectus', prefetch_prospectus_pages)
 
-    def get_prospectus_size(url):
+def scrape_prospectus_page(url, page_number):
+    response = http_client.conditional_get(url)
+    if response.status_code == 200:
+        return parse_prospectus_rows(response.content)
+    else:
+        logging.error(f"Failed to retrieve page {page_number}. Status code: {response.status_code}")
+        return None
+
+@metrics.timed('parse')
+def parse_prospectus_rows(content):
+    page_data = []
+    soup = parse_subtree(content, 'table', 'table')
+    table = soup.find('table', class_='table')
+    table_rows = table.select('tbody tr')
+    for row in table_rows:
+        row_data = row.find_all('td')
+        if len(row_data) == 4:
+            file_url = row_data[3].find('a').get('href', '') if row_data[3].find('a') else row_data[2].find('a').get('href', '')
+            data = {
+                "title": row_data[0].get_text(strip=True),
+                "date": row_data[1].get_text(strip=True),
+                "english": row_data[2].find('a').get('href', '') if row_data[2].find('a') else '',
+                "nepali": row_data[3].find('a').get('href', '') if row_data[3].find('a') else '',
+                "fileUrl": file_url
+            }
+            page_data.append(data)
+    return page_data
+
+# --- Persistent file-size cache (prospectus PDFs never change once published) ---
+_size_memo = {}
+_size_db_lock = threading.Lock()
+_size_conn = None  # one connection per worker, only used under _size_db_lock
+
+def _size_db():
+    """The worker's connection to the size cache, opened on first use; call with _size_db_lock held."""
+    global _size_conn
+    if _size_conn is None:
+        os.makedirs(DATA_DIR, exist_ok=True)
+        conn = sqlite3.connect(PROSPECTUS_SIZE_DB, timeout=5, check_same_thread=False)
+        conn.execute("CREATE TABLE IF NOT EXISTS prospectus_sizes (url TEXT PRIMARY KEY, size_mb REAL NOT NULL, checked_at REAL NOT NULL)")
+        _size_conn = conn
+    return _size_conn
+
+def get_prospectus_sizes(urls):
+    """Return {url: size in MB or "N/A"}, probing only URLs never seen before."""
+    urls = list(dict.fromkeys(urls))
+    sizes = {url: _size_memo[url] for url in urls if url in _size_memo}
+    missing = [url for url in urls if url not in sizes]
+    if missing:
         try:
-            response = requests.head(url)
-            file_size_bytes = int(response.headers.get('content-length', 0))
-            file_size_mb = round(file_size_bytes / (1024 * 1024), 2)  # Convert bytes to MB
-            return file_size_mb
-        except Exception:
-            return "N/A"  # Return "N/A" if size can't be calculated
-
-    for page_number in page_numbers:
-        url = f"https://www.sebon.gov.np/prospectus?page={page_number}"
-        response = requests.get(url)
-        if response.status_code == 200:
-            soup = BeautifulSoup(response.content, 'html.parser')
-            table = soup.find('table', class_='table')
-            table_rows = table.select('tbody tr')
-            for row in table_rows:
-                row_data = row.find_all('td')
-                if len(row_data) == 4:
-                    file_url = row_data[3].find('a').get('href', '') if row_data[3].find('a') else row_data[2].find('a').get('href', '')
-                    file_size = get_prospectus_size(file_url) if file_url else "N/A"
-                    data = {
-                        "title": row_data[0].get_text(strip=True),
-                        "date": row_data[1].get_text(strip=True),
-                        "english": row_data[2].find('a').get('href', '') if row_data[2].find('a') else '',
-                        "nepali": row_data[3].find('a').get('href', '') if row_data[3].find('a') else '',
-                        "fileSize": file_size
-                    }
-                    combined_data.append(data)
+            with _size_db_lock:
+                conn = _size_db()
+                placeholders = ",".join("?" * len(missing))
+                for url, size_mb in conn.execute(f"SELECT url, size_mb FROM prospectus_sizes WHERE url IN ({placeholders})", missing):
+                    sizes[url] = _size_memo[url] = size_mb
+        except sqlite3.Error as e:
+            logging.error(f"Prospectus size cache unavailable: {e}")
+
+    to_probe = [url for url in urls if url not in sizes]
+    probed = []
+    for url, result in zip(to_probe, fan_out(probe_prospectus_size, [(url,) for url in to_probe])):
+        if isinstance(result, Exception) or result is None:
+            sizes[url] = "N/A"  # Return "N/A" if size can't be calculated
         else:
-            logging.error(f"Failed to retrieve page {page_number}. Status code: {response.status_code}")
-    return combined_data
+            size_mb, persist = result
+            sizes[url] = size_mb
+            if persist:
+                probed.append((url, size_mb, time.time()))
+                _size_memo[url] = size_mb
+
+    if probed:
+        try:
+            with _size_db_lock, _size_db() as conn:  # commits on success, rolls back on error
+                conn.executemany("INSERT OR REPLACE INTO prospectus_sizes (url, size_mb, checked_at) VALUES (?, ?, ?)", probed)
+        except sqlite3.Error as e:
+            logging.error(f"Failed to persist prospectus sizes: {e}")
+    return sizes
+
+def probe_prospectus_size(url):
+    """HEAD the PDF; returns (size in MB, whether the answer is worth persisting)."""
+    response = http_client.head(url)
+    content_length = response.headers.get('content-length')
+    file_size_bytes = int(content_length or 0)
+    file_size_mb = round(file_size_bytes / (1024 * 1024), 2)  # Convert bytes to MB
+    return file_size_mb, response.status_code == 200 and content_length is not None
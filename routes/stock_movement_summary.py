@@ -1,51 +1,49 @@
-from flask import Blueprint, jsonify
+from flask import Blueprint, jsonify, request
 import logging
-import requests
+
+import http_client
+import metrics
+from breadth import BreadthEngine
+from cache import cached_fetch, cache_key
+from responses import snapshot_response, field_key
+from routes.watchlist import fetch_symbol_data
 
 stock_movement_summary_bp = Blueprint('stock_movement_summary', __name__)
 
+breadth_engine = BreadthEngine()
+
 @stock_movement_summary_bp.route('/get_stock_movement_summary', methods=['GET'])
 def get_stock_movement_summary():
+    group = request.args.get('group', default=None, type=str)
+    if group not in (None, 'sector', 'type'):
+        return jsonify({"error": "Invalid group parameter"}), 400
+
     try:
         data = fetch_and_process_data()
-        return jsonify(data)
+        if group is None:
+            return snapshot_response(data, row_key=field_key('category'))
+
+        companies_data = fetch_symbol_data()
+        if not companies_data:
+            return jsonify({"error": "Failed to fetch companies data"}), 500
+        with metrics.phase('transform'):
+            grouped = breadth_engine.grouped(companies_data)[group]
+        return snapshot_response(grouped, row_key=field_key('sectorId' if group == 'sector' else 'type'))
     except Exception as e:
         logging.error(f"An error occurred while fetching stock movement summary data: {str(e)}")
         return jsonify([{'success': False, 'message': 'Failed to fetch stock movement data.'}]), 500
 
 def fetch_and_process_data():
     url = "https://chukul.com/api/data/intrahistorydata/performance/?type=stock"
-    response = requests.get(url)
-    response.raise_for_status()
-    data = response.json()
-
-    advanced = 0
-    declined = 0
-    unchanged = 0
-    positive_circuit = 0
-    negative_circuit = 0
-
-    for item in data:
-        percentage_change = item.get('percentage_change')
-        if percentage_change is None:
-            unchanged += 1
-        elif percentage_change > 9.9:
-            positive_circuit += 1
-        elif -10.0 < percentage_change <= -9.9:
-            negative_circuit += 1
-        elif percentage_change > 0:
-            advanced += 1
-        elif percentage_change < 0:
-            declined += 1
-        elif percentage_change == 0:
-            unchanged += 1
-
-    result = [
-        {"id": 0, "label": "Advanced", "category": "advanced", "count": advanced},
-        {"id": 1, "label": "Declined", "category": "declined", "count": declined},
-        {"id": 2, "label": "Unchanged", "category": "unchanged", "count": unchanged},
-        {"id": 3, "label": "+ve Circuit", "category": "positiveCircuit", "count": positive_circuit},
-        {"id": 4, "label": "-ve Circuit", "category": "negativeCircuit", "count": negative_circuit}
-    ]
-    
-    return result
+
+    def load():
+        response = http_client.get(url)
+        response.raise_for_status()
+        with metrics.phase('parse'):
+            return response.json()
+
+    data = cached_fetch('performance', cache_key(url), load)
+
+    with metrics.phase('transform'):
+        breadth_engine.apply(data)
+        return breadth_engine.summary()
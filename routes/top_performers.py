@@ -1,52 +1,55 @@
 from flask import Blueprint, jsonify, request
 import logging
-import requests
-import time
+
+import metrics
+from rankings import RANKINGS, ranked_rows
+from responses import snapshot_response, field_key
+from routes.watchlist import fetch_performance_data, fetch_symbol_data
 
 top_performers_bp = Blueprint('top_performers', __name__)
 
+# Rankings returned for indicator=all, in response order
+ALL_INDICATORS = ['turnover', 'gainers', 'losers', 'sharestraded']
+
 @top_performers_bp.route('/get_top_performers', methods=['GET'])
 def get_top_performers():
     limit = request.args.get('limit', default=100, type=int)
     indicator = request.args.get('indicator', default='gainers', type=str)
-    
-    if indicator not in ['turnover', 'gainers', 'losers', 'sharestraded', 'transactions', 'all']:
+    sector_code = request.args.get('sectorCode', default='', type=str).strip() or None
+
+    if parse_indicators(indicator) is None:
         return jsonify({'success': False, 'message': 'Invalid indicator specified'}), 400
-    
+
     try:
-        data = fetch_top_performers(limit, indicator)
-        return jsonify(data)
+        data = fetch_top_performers(limit, indicator, sector_code)
+        return snapshot_response(data, row_key=field_key('type', 'symbol'))
     except Exception as e:
         logging.error(f"Error fetching top performers: {str(e)}")
         return jsonify({'success': False, 'message': 'Failed to retrieve top performers data.'}), 500
 
-def fetch_top_performers(limit, specific_indicator):
-    result_data = []
-    current_timestamp = int(time.time() * 1000)
-    
-    if specific_indicator == 'all':
-        indicators = ['turnover', 'gainers', 'losers', 'sharestraded']
-    else:
-        indicators = [specific_indicator]
-    
-    for indicator in indicators:
-        url = f"https://nepalipaisa.com/api/GetTopMarketMovers?indicator={indicator}&sectorCode=&limit={limit}&_={current_timestamp}"
-        try:
-            response = requests.get(url)
-            response.raise_for_status()  # Raise an error for HTTP errors
-            
-            data = response.json()
-            fetched_data = data.get('result', [])  # Extract only the 'result' part
-            for item in fetched_data:
-                item['type'] = indicator
-            result_data.extend(fetched_data)  # Combine data from all indicators
-            
-        except requests.exceptions.HTTPError as http_err:
-            logging.error(f"HTTP error occurred for {indicator}: {http_err}")
-            logging.error(f"Response content: {response.text}")
-        except Exception as err:
-            logging.error(f"Other error occurred for {indicator}: {err}")
-            if response is not None:
-                logging.error(f"Response content: {response.text}")
-    
-    return result_data
+def parse_indicators(indicator):
+    """'all', one indicator or several comma-separated ones; None if any is unknown."""
+    if indicator == 'all':
+        return ALL_INDICATORS
+    indicators = list(dict.fromkeys(name.strip() for name in indicator.split(',') if name.strip()))
+    if not indicators or not all(name in RANKINGS for name in indicators):
+        return None
+    return indicators
+
+def fetch_top_performers(limit, specific_indicator, sector_code=None):
+    """Rank the performance snapshot locally, optionally within one sector (the company list's sector_id)."""
+    indicators = parse_indicators(specific_indicator)
+    if indicators is None:
+        raise ValueError(f"Invalid indicator: {specific_indicator}")
+
+    performance_data = fetch_performance_data()
+    if not performance_data:
+        raise Exception("Failed to fetch companies performance data")
+    companies_data = None
+    if sector_code is not None:
+        companies_data = fetch_symbol_data()
+        if not companies_data:
+            raise Exception("Failed to fetch companies data")
+
+    with metrics.phase('transform'):
+        return ranked_rows(performance_data, indicators, limit, sector_code, companies_data)
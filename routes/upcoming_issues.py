@@ -1,95 +1,198 @@
 from flask import Blueprint, jsonify, request
+import hashlib
+import json
 import logging
-import requests
+import re
+import threading
 import time
-from datetime import datetime
-from pyBSDate import convert_AD_to_BS
+from collections import OrderedDict
+
+import http_client
+import metrics
+from bs_dates import convert_ad_string_to_bs
+from cache import cached_fetch, cache_key
+from config import UPCOMING_PAGE_SIZE, UPCOMING_MAX_ROWS, UPCOMING_FULL_SYNC_INTERVAL
+from fanout import fan_out
+from issue_store import issue_store
+from responses import snapshot_response, field_key
+from shared_snapshots import register_refresh
 
 upcoming_issues_bp = Blueprint('upcoming_issues', __name__)
 
+ISSUE_TYPES = {
+    'ipo': 1,
+    'right': 3,
+    'fpo': 2,
+    'local': 5,
+    'debenture': 7,
+    'migrant': 8,
+}
+
+STATUS_FILTERS = {'open': "Open", 'closed': "Closed", 'in_progress': "In Progress", 'unknown': "Unknown"}
+
+ISO_DATE = re.compile(r"\d{4}-\d{2}-\d{2}")
+
+QUERY_RESULTS_MAX = 32
+_query_results = OrderedDict()  # query -> (refresh summaries it was read after, issues)
+_query_lock = threading.Lock()
+
+EXISTING_ISSUES_URL = "https://www.sharesansar.com/existing-issues"
+HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/115.0.0.0 Safari/537.36",
+    "Accept": "application/json, text/javascript, */*; q=0.01",
+    "Referer": "https://www.sharesansar.com/existing-issues",
+    "X-Requested-With": "XMLHttpRequest",
+}
+
 @upcoming_issues_bp.route('/get_upcoming_issues', methods=['GET'])
 def get_upcoming_issues():
-    issue_type_map = {
-        'ipo': 1,
-        'right': 3,
-        'fpo': 2,
-        'local': 5,
-        'debenture': 7,
-        'migrant': 8,
-        'all': 'all'
-    }
+    """Upcoming issues served from the local store.
 
+    Optional filters: status=open,closed,in_progress,unknown and
+    from= / to= (YYYY-MM-DD, inclusive) on the AD opening date. limit=
+    (1 to UPCOMING_MAX_ROWS, default 20) applies per issue type.
+    """
     issue_type = request.args.get('type', default='all', type=str)
     limit = request.args.get('limit', default=20, type=int)
 
+    if issue_type != 'all' and issue_type not in ISSUE_TYPES:
+        return jsonify({"error": "Invalid type parameter"}), 400
+    if not 1 <= limit <= UPCOMING_MAX_ROWS:
+        return jsonify({"error": "Invalid limit parameter"}), 400
+    statuses = None
+    if request.args.get('status'):
+        names = [name.strip().lower() for name in request.args['status'].split(',') if name.strip()]
+        if not all(name in STATUS_FILTERS for name in names):
+            return jsonify({"error": "Invalid status parameter"}), 400
+        statuses = [STATUS_FILTERS[name] for name in names]
+    opening_from = request.args.get('from', default=None, type=str)
+    opening_to = request.args.get('to', default=None, type=str)
+    for name, value in (('from', opening_from), ('to', opening_to)):
+        if value is not None and not ISO_DATE.fullmatch(value):
+            return jsonify({"error": f"Invalid {name} parameter"}), 400
+
     try:
-        if issue_type == 'all':
-            all_data = []
-            for key, value in issue_type_map.items():
-                if key != 'all':
-                    data = fetch_upcoming_issues(value, limit=limit)
-                    for item in data:
-                        item['issueType'] = key
-                    all_data.extend(data)
-            data_to_update = all_data
+        issue_types = list(ISSUE_TYPES) if issue_type == 'all' else [issue_type]
+        refreshes = fan_out(refresh_upcoming_issues, [(name,) for name in issue_types])
+        for name, result in zip(issue_types, refreshes):
+            if isinstance(result, Exception):
+                if issue_store.sync_state(name) is None:
+                    raise result
+                logging.warning(f"Upcoming {name} issues refresh failed ({result}); serving stored issues")
+
+        # Re-query only after a refresh, so unchanged results keep their encoded body
+        query = (issue_type, tuple(statuses or ()), opening_from, opening_to, limit)
+        with _query_lock:
+            memo = _query_results.get(query)
+        if memo is not None and all(a is b for a, b in zip(memo[0], refreshes)):
+            data = memo[1]
         else:
-            if issue_type in issue_type_map:
-                type_value = issue_type_map[issue_type]
-                data = fetch_upcoming_issues(type_value, limit=limit)
-                for item in data:
-                    item['issueType'] = issue_type
-            else:
-                return jsonify({"error": "Invalid type parameter"}), 400
-
-        return jsonify(data)
+            with metrics.phase('transform'):
+                data = issue_store.query(issue_types, statuses, opening_from, opening_to, limit)
+            if not any(isinstance(result, Exception) for result in refreshes):
+                with _query_lock:
+                    _query_results[query] = (refreshes, data)
+                    _query_results.move_to_end(query)
+                    while len(_query_results) > QUERY_RESULTS_MAX:
+                        _query_results.popitem(last=False)
+        return snapshot_response(data, row_key=field_key('issueType', 'companySymbol'))
     except Exception as e:
         logging.error(f"An error occurred while fetching upcoming issues: {str(e)}")
         return jsonify({'success': False, 'message': 'Failed to fetch upcoming issues.'}), 500
 
-def fetch_upcoming_issues(issue_type, limit=20):
-    url = "https://www.sharesansar.com/existing-issues"
-    headers = {
-        "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/115.0.0.0 Safari/537.36",
-        "Accept": "application/json, text/javascript, */*; q=0.01",
-        "Referer": "https://www.sharesansar.com/existing-issues",
-        "X-Requested-With": "XMLHttpRequest",
-    }
+def refresh_upcoming_issues(type_name):
+    """Bring the store up to date for one issue type at most once per TTL."""
+    return cached_fetch(
+        'upcoming_issues',
+        cache_key(EXISTING_ISSUES_URL, {"type": ISSUE_TYPES[type_name]}),
+        lambda: sync_upcoming_issues(type_name),
+    )
+
+def prefetch_upcoming_issues():
+    """Refresh every issue type."""
+    for type_name in ISSUE_TYPES:
+        refresh_upcoming_issues(type_name)
 
-    current_timestamp = int(time.time() * 1000)
+# Kept fresh for every worker by the elected snapshot refresher
+register_refresh('upcoming_issues', prefetch_upcoming_issues)
+
+def sync_upcoming_issues(type_name):
+    """Fetch the listing page by page and store new or changed entries.
+
+    Pages are read until one holds nothing new or changed, or through the
+    whole listing (up to UPCOMING_MAX_ROWS) on a full refresh, which runs
+    every UPCOMING_FULL_SYNC_INTERVAL. Only new or changed entries are
+    formatted. Returns a small summary; the issues themselves are read
+    from the store.
+    """
+    state = issue_store.sync_state(type_name)
+    full = state is None or time.time() - state[1] >= UPCOMING_FULL_SYNC_INTERVAL
+    known = issue_store.fingerprints(type_name)
+
+    seen, seen_set, pending = [], set(), {}
+    start = 0
+    while start < UPCOMING_MAX_ROWS:
+        entries, total = fetch_issues_page(ISSUE_TYPES[type_name], start, UPCOMING_PAGE_SIZE)
+        page_changed = False
+        for entry in entries:
+            symbol = link_text(entry["company"]["symbol"])
+            if symbol in seen_set:
+                continue  # an older issue of the same type; the store keeps the latest
+            seen.append(symbol)
+            seen_set.add(symbol)
+            fingerprint = entry_fingerprint(entry)
+            if known.get(symbol) != fingerprint:
+                pending[symbol] = (fingerprint, entry)
+                page_changed = True
+        start += len(entries)
+        if len(entries) < UPCOMING_PAGE_SIZE or start >= total or not (full or page_changed):
+            break
+
+    with metrics.phase('transform'):
+        changed = {
+            symbol: (fingerprint, dict(format_issue(entry), issueType=type_name))
+            for symbol, (fingerprint, entry) in pending.items()
+        }
+    issue_store.apply(type_name, seen, changed, full)
+    return {"issueType": type_name, "seen": len(seen), "changed": len(changed), "full": full}
+
+def fetch_issues_page(issue_type, start, length):
+    """One page of the DataTables listing: (raw entries, total rows)."""
     payload = {
         "draw": 1,
-        "start": 0,
-        "length": limit,
+        "start": start,
+        "length": length,
         "search[value]": "",
         "search[regex]": "false",
         "type": issue_type,
-        "_": current_timestamp,
+        "_": int(time.time() * 1000),
     }
-
-    response = requests.get(url, headers=headers, params=payload)
-    if response.status_code == 200:
-        data = response.json().get("data", [])
-        formatted_data = []
-        for entry in data:
-            opening_date_bs = convert_date_to_bs(entry.get("opening_date"))
-            closing_date_bs = convert_date_to_bs(entry.get("closing_date"))
-            extended_closing_date_bs = convert_date_to_bs(entry.get("final_date"))
-            status = format_status(entry.get("status"))
-            formatted_entry = format_entry(entry, opening_date_bs, closing_date_bs, extended_closing_date_bs, status)
-            formatted_data.append(formatted_entry)
-        return formatted_data
-    else:
+    response = http_client.get(EXISTING_ISSUES_URL, headers=HEADERS, params=payload)
+    if response.status_code != 200:
         raise Exception(f"Error fetching data: {response.status_code}")
+    with metrics.phase('parse'):
+        body = response.json()
+    entries = body.get("data", [])
+    return entries, body.get("recordsTotal", start + len(entries))
+
+def entry_fingerprint(entry):
+    return hashlib.blake2b(json.dumps(entry, sort_keys=True).encode('utf-8'), digest_size=16).hexdigest()
+
+def link_text(fragment):
+    """Text of an `<a ...>text</a>` fragment."""
+    return fragment.split('>')[1].split('<')[0]
+
+def format_issue(entry):
+    opening_date_bs = convert_date_to_bs(entry.get("opening_date"))
+    closing_date_bs = convert_date_to_bs(entry.get("closing_date"))
+    extended_closing_date_bs = convert_date_to_bs(entry.get("final_date"))
+    status = format_status(entry.get("status"))
+    return format_entry(entry, opening_date_bs, closing_date_bs, extended_closing_date_bs, status)
 
 def convert_date_to_bs(date_str):
     if not date_str:
         return "In Progress"
-    ad_date = datetime.strptime(date_str, "%Y-%m-%d")
-    try:
-        bs_date_tuple = convert_AD_to_BS(ad_date.year, ad_date.month, ad_date.day)
-        return datetime(*bs_date_tuple).strftime("%Y-%m-%d")
-    except ValueError:
-        return "Invalid Date"
+    return convert_ad_string_to_bs(date_str)
 
 def format_status(status_code):
     status_map = {0: "Open", 1: "Closed", -2: "In Progress"}
@@ -97,8 +200,8 @@ def format_status(status_code):
 
 def format_entry(entry, opening_date_bs, closing_date_bs, extended_closing_date_bs, status):
     return {
-        "companyName": entry["company"]["companyname"].split('>')[1].split('<')[0],
-        "companySymbol": entry["company"]["symbol"].split('>')[1].split('<')[0],
+        "companyName": link_text(entry["company"]["companyname"]),
+        "companySymbol": link_text(entry["company"]["symbol"]),
         "units": format_number(entry.get("total_units")),
         "price": format_number(entry.get("issue_price")),
         "openingDateAd": entry.get("opening_date", "In Progress"),
@@ -1,19 +1,35 @@
 from flask import Blueprint, jsonify, request
 import logging
-import requests
 import time
 
+import http_client
+import metrics
+from cache import cached_fetch, cache_key
+from config import RATE_LIMITS
+from pagination import PageQueryError, parse_page_query, page_rows, set_next_cursor
+from performance_table import normalize_symbol, table_for
+from rate_limiter import TokenBucketLimiter, rate_limit_blueprint
+from responses import snapshot_response, field_key
+from shared_snapshots import register_refresh
+
 # Blueprint for watchlist data
 watchlist_bp = Blueprint('watchlist', __name__)
 
+# Token-bucket rate limit per client IP, shared by all workers
+rate_limit_blueprint(watchlist_bp, TokenBucketLimiter('watchlist', RATE_LIMITS['watchlist']), {"error": "Rate limit exceeded. Try again later."})
+
 # Function to fetch symbol data (symbol, name, type, sector_id)
 def fetch_symbol_data():
     current_time_ms = int(round(time.time() * 1000))
     url = f"https://chukul.com/api/data/symbol/?_={current_time_ms}"  # Endpoint for symbol data
-    response = requests.get(url)
+    return cached_fetch('symbols', cache_key(url), lambda: _load_symbol_data(url))
+
+def _load_symbol_data(url):
+    response = http_client.get(url)
 
     if response.status_code == 200:
-        companies = response.json()
+        with metrics.phase('parse'):
+            companies = response.json()
         company_list = []
 
         # Extract company name, symbol, type, and sector_id
@@ -36,14 +52,30 @@ def fetch_symbol_data():
 def fetch_performance_data():
     current_time_ms = int(round(time.time() * 1000))
     url = f"https://chukul.com/api/data/intrahistorydata/performance/?type=stock&_={current_time_ms}"  # Endpoint for performance data
-    response = requests.get(url)
 
-    if response.status_code == 200:
-        return response.json()  # List of companies with performance data
-    else:
-        return None
+    def load():
+        response = http_client.get(url)
+
+        if response.status_code == 200:
+            with metrics.phase('parse'):
+                return response.json()  # List of companies with performance data
+        else:
+            return None
+
+    return cached_fetch('performance', cache_key(url), load)
+
+
+# Kept fresh for every worker by the elected snapshot refresher
+register_refresh('symbols', fetch_symbol_data)
+register_refresh('performance', fetch_performance_data)
 
 
+# Project, sort and paginate a company list (fields=, sort=, order=, limit=, after=)
+def paged_response(rows, query, cache=True):
+    with metrics.phase('transform'):
+        page, next_cursor = page_rows(rows, query, cache=cache)
+    return set_next_cursor(snapshot_response(page, row_key=field_key('symbol')), next_cursor)
+
 # Endpoint to get basic company data (symbol, name, type, sector_id)
 @watchlist_bp.route('/watchlist/get_companies_symbol', methods=['GET'])
 def get_companies_symbol():
@@ -51,6 +83,11 @@ def get_companies_symbol():
         # Get the 'stocks' parameter from the request
         stocks_param = request.args.get('stocks', default='all', type=str)
 
+        try:
+            page_query = parse_page_query(request.args)
+        except PageQueryError as e:
+            return jsonify({"error": str(e)}), 400
+
         # Fetch the list of companies from the external API
         companies_data = fetch_symbol_data()
         if not companies_data:
@@ -58,7 +95,9 @@ def get_companies_symbol():
 
         # If 'stocks' is 'all', return all symbol data
         if stocks_param == 'all' or not stocks_param:
-            return jsonify(companies_data)
+            if page_query.is_identity:
+                return jsonify(companies_data)
+            return paged_response(companies_data, page_query)
 
         # If 'stocks' is 'watchlist', filter based on the watchlist symbols
         elif stocks_param == 'watchlist':
@@ -68,17 +107,16 @@ def get_companies_symbol():
             if not performance_data:
                 return jsonify({"error": "Failed to fetch performance data"}), 500
 
-            # Create a set of symbols from the performance data for faster lookup
-            performance_symbols = set(company['symbol'].strip().upper() for company in performance_data)
-
-            # Filter the symbol data to include only those present in performance data using the set for faster lookups
-            filtered_companies_data = [
-                company for company in companies_data
-                if company['symbol'].strip().upper() in performance_symbols
-            ]
+            # Companies present in the performance snapshot (indexed once per snapshot)
+            with metrics.phase('transform'):
+                filtered_companies_data = table_for(performance_data).listed_companies(companies_data)
 
-            return jsonify(filtered_companies_data)
+            if page_query.is_identity:
+                return jsonify(filtered_companies_data)
+            return paged_response(filtered_companies_data, page_query)
 
+    except PageQueryError as e:
+        return jsonify({"error": str(e)}), 400
     except Exception as e:
         logging.error(f"An error occurred while fetching companies data: {str(e)}")
         return jsonify({'success': False, 'message': 'Failed to fetch companies data.'}), 500
@@ -93,28 +131,44 @@ def get_companies_data():
         if not all_companies_data:
             return jsonify({"error": "Failed to fetch companies performance data"}), 500
 
-        # Get 'stocks' query parameter from the request
+        # Get 'stocks', 'sector' and 'type' query parameters from the request
         stocks_param = request.args.get('stocks', default='all', type=str)
+        sector_id = request.args.get('sector', default=None, type=str)
+        company_type = request.args.get('type', default=None, type=str)
 
-        # If 'stocks' is 'all' or not provided, return all data
-        if stocks_param == 'all' or not stocks_param:
-            return jsonify(all_companies_data)
+        try:
+            page_query = parse_page_query(request.args)
+        except PageQueryError as e:
+            return jsonify({"error": str(e)}), 400
 
         # Split the stocks parameter by comma and clean up whitespace and case
-        stocks_list = [symbol.strip().upper() for symbol in stocks_param.split(',')]
+        stocks_list = None
+        if stocks_param != 'all' and stocks_param:
+            stocks_list = [normalize_symbol(symbol) for symbol in stocks_param.split(',')]
+
+        with metrics.phase('transform'):
+            table = table_for(all_companies_data)
+
+        # Without sector/type filters only the symbol index is needed
+        if sector_id is None and company_type is None:
+            if stocks_list is None:
+                return paged_response(all_companies_data, page_query)
+            with metrics.phase('transform'):
+                selected = table.lookup(stocks_list)
+            return paged_response(selected, page_query, cache=False)
+
+        companies_data = fetch_symbol_data()
+        if not companies_data:
+            return jsonify({"error": "Failed to fetch companies data"}), 500
 
-        # Fetch the symbols for which we have data in performance
-        valid_symbols = [company['symbol'].strip().upper() for company in all_companies_data]
-        
-        # Filter the companies' performance data based on the cleaned symbols that exist
-        filtered_data = [
-            company for company in all_companies_data
-            if company['symbol'].strip().upper() in stocks_list and company['symbol'].strip().upper() in valid_symbols
-        ]
+        with metrics.phase('transform'):
+            filtered_data = table.filter(companies_data, symbols=stocks_list, sector_id=sector_id, company_type=company_type)
 
         # Return only the filtered data
-        return jsonify(filtered_data)
+        return paged_response(filtered_data, page_query, cache=filtered_data is all_companies_data)
 
+    except PageQueryError as e:
+        return jsonify({"error": str(e)}), 400
     except Exception as e:
         logging.error(f"An error occurred while fetching companies data: {str(e)}")
         return jsonify({'success': False, 'message': 'Failed to fetch companies data.'}), 500
@@ -0,0 +1,253 @@
+import hashlib
+import json
+import logging
+import mmap
+import os
+import struct
+import threading
+import time
+from collections import OrderedDict
+
+from cache import forced_refresh, use_shared_store
+from config import (
+    CACHE_TTLS,
+    LAST_GOOD_MAX_AGE,
+    SHARED_SNAPSHOTS_ENABLED,
+    SHARED_SNAPSHOT_DIR,
+    SHARED_SNAPSHOT_FEEDS,
+    SHARED_SNAPSHOT_MAX_ENTRIES,
+    SHARED_SNAPSHOT_PRUNE_INTERVAL,
+)
+from market_hours import PrefetchSchedule
+
+try:
+    import fcntl
+except ImportError:  # no flock on Windows: every worker fetches for itself
+    fcntl = None
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Segment header: magic, version stamp (ns), published at and expires at (epoch s), body length.
+_HEADER = struct.Struct('<4sQddQ')
+_MAGIC = b'HSM2'
+
+
+def _dumps(value):
+    return orjson.dumps(value) if orjson is not None else json.dumps(value).encode('utf-8')
+
+
+def _loads(body):
+    return orjson.loads(body) if orjson is not None else json.loads(body)
+
+
+class SharedSnapshotStore:
+    """Latest parsed upstream snapshots, shared by every worker on the host.
+
+    Each cache key is one memory-mapped segment file (a header with a
+    version stamp, publish and expiry times, then the JSON body), replaced
+    atomically on publish. A worker decodes a segment once per version and
+    keeps the decoded object, so repeat reads cost one stat() call. Both are
+    bounded: workers keep the `max_entries` most recently read snapshots and
+    prune() removes segments beyond that or too old to serve at all.
+    """
+
+    def __init__(self, directory, feeds, max_entries=SHARED_SNAPSHOT_MAX_ENTRIES):
+        self.directory = directory
+        self.feeds = set(feeds)
+        self.max_entries = max_entries
+        self._decoded = OrderedDict()  # key -> (file identity, version, published_at, expires_at, value), LRU
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key):
+        return os.path.join(self.directory, hashlib.sha1(key.encode('utf-8')).hexdigest() + '.snap')
+
+    def read(self, feed, key, max_age=None):
+        """Return (value, age, seconds until expiry) for an unexpired snapshot, else None.
+
+        With `max_age`, any snapshot younger than that is returned, expired or not.
+        """
+        if feed not in self.feeds:
+            return None
+        path = self._path(key)
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            with self._lock:
+                self._decoded.pop(key, None)  # pruned
+            return None
+        identity = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+
+        with self._lock:
+            decoded = self._decoded.get(key)
+            if decoded is not None:
+                self._decoded.move_to_end(key)
+        if decoded is None or decoded[0] != identity:
+            try:
+                with open(path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as segment:
+                    magic, version, published_at, expires_at, length = _HEADER.unpack_from(segment, 0)
+                    if magic != _MAGIC:
+                        return None
+                    value = _loads(segment[_HEADER.size:_HEADER.size + length])
+            except (OSError, ValueError, struct.error) as e:
+                logging.warning(f"[Shared Snapshots] unreadable segment for {key}: {e}")
+                return None
+            decoded = (identity, version, published_at, expires_at, value)
+            with self._lock:
+                self._decoded[key] = decoded
+                self._decoded.move_to_end(key)
+                while len(self._decoded) > self.max_entries:
+                    self._decoded.popitem(last=False)
+
+        now = time.time()
+        age, remaining = now - decoded[2], decoded[3] - now
+        if (remaining <= 0) if max_age is None else (age >= max_age):
+            return None
+        return decoded[4], age, remaining
+
+    def publish(self, feed, key, value, ttl=None):
+        if feed not in self.feeds:
+            return
+        try:
+            body = _dumps(value)
+        except (TypeError, ValueError) as e:
+            logging.warning(f"[Shared Snapshots] cannot share {key}: {e}")
+            return
+        path = self._path(key)
+        tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp, 'wb') as f:
+                now = time.time()
+                ttl = CACHE_TTLS[feed] if ttl is None else ttl
+                f.write(_HEADER.pack(_MAGIC, time.time_ns(), now, now + ttl, len(body)))
+                f.write(body)
+            os.replace(tmp, path)
+        except OSError as e:
+            logging.warning(f"[Shared Snapshots] failed to publish {key}: {e}")
+
+    def prune(self, now=None):
+        """Remove segments too old to serve even as a fallback, then the oldest beyond max_entries."""
+        now = time.time() if now is None else now
+        segments = []  # (published_at, path)
+        for name in os.listdir(self.directory):
+            if not name.endswith('.snap'):
+                continue
+            path = os.path.join(self.directory, name)
+            try:
+                with open(path, 'rb') as f:
+                    magic, _, published_at, _, _ = _HEADER.unpack(f.read(_HEADER.size))
+            except (OSError, struct.error):
+                continue
+            segments.append((published_at if magic == _MAGIC else 0, path))
+        segments.sort(reverse=True)
+        removed = 0
+        for index, (published_at, path) in enumerate(segments):
+            if index >= self.max_entries or now - published_at >= LAST_GOOD_MAX_AGE:
+                try:
+                    os.remove(path)
+                    removed += 1
+                except OSError:
+                    pass
+        if removed:
+            logging.info(f"[Shared Snapshots] pruned {removed} segment(s)")
+        return removed
+
+    def versions(self):
+        """Version stamp of each snapshot this worker has decoded."""
+        with self._lock:
+            return {key: decoded[1] for key, decoded in self._decoded.items()}
+
+
+# --- Refresher election and loop ---
+
+_tasks = []  # (feed, fetch function)
+_refresher_pid = None
+_lock_file = None
+_start_lock = threading.Lock()
+
+
+def register_refresh(feed, fetch):
+    """Have the elected refresher keep `fetch()`'s snapshot of `feed` fresh."""
+    _tasks.append((feed, fetch))
+
+
+def is_refresher():
+    return _refresher_pid == os.getpid()
+
+
+def _try_elect():
+    """Take the host-wide refresher lock without blocking; True if this process holds it."""
+    global _lock_file, _refresher_pid
+    if fcntl is None:
+        return False
+    if _lock_file is None or _refresher_pid not in (None, os.getpid()):
+        # First attempt, or a forked child that inherited the parent's descriptor.
+        _lock_file = open(os.path.join(SHARED_SNAPSHOT_DIR, 'refresher.lock'), 'a')
+    try:
+        fcntl.flock(_lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        return False
+    _refresher_pid = os.getpid()
+    return True
+
+
+def _refresh_loop():
+    schedule = PrefetchSchedule()
+    due = {}
+    market_open = schedule.is_open()
+    next_prune = 0
+    while True:
+        now = time.monotonic()
+        if _store is not None and now >= next_prune:
+            next_prune = now + SHARED_SNAPSHOT_PRUNE_INTERVAL
+            try:
+                _store.prune()
+            except OSError as e:
+                logging.error(f"[Shared Snapshots] pruning failed: {e}")
+        for position, (feed, fetch) in enumerate(_tasks):
+            if due.get(position, 0) > now:
+                continue
+            interval, ttl = schedule.plan(position, feed)
+            due[position] = now + interval
+            if ttl is None:
+                continue  # holding the closing snapshot
+            try:
+                with forced_refresh(ttl):
+                    value = fetch()
+                schedule.fetched(position)
+                schedule.observe(feed, value)
+            except Exception as e:
+                logging.error(f"[Shared Snapshots] refresh of {feed} failed: {e}")
+        if schedule.is_open() != market_open:
+            market_open = schedule.is_open()
+            due.clear()  # switch every task to the new cadence right away
+        time.sleep(0.5)
+
+
+def _election_loop():
+    # Followers keep trying so a new refresher takes over if the current one exits.
+    while not _try_elect():
+        time.sleep(5)
+    logging.info(f"[Shared Snapshots] process {os.getpid()} is the snapshot refresher")
+    _refresh_loop()
+
+
+_started_pid = None
+_store = None
+
+
+def start():
+    """Share snapshots across workers and join the refresher election (once per process)."""
+    global _started_pid, _store
+    if not SHARED_SNAPSHOTS_ENABLED:
+        return
+    with _start_lock:
+        if _started_pid == os.getpid():
+            return
+        _started_pid = os.getpid()
+        _store = SharedSnapshotStore(SHARED_SNAPSHOT_DIR, SHARED_SNAPSHOT_FEEDS)
+        use_shared_store(_store)
+        threading.Thread(target=_election_loop, name='snapshot-refresher', daemon=True).start()
@@ -0,0 +1,21 @@
+import os
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+FIXTURES = os.path.join(ROOT, 'benchmarks', 'fixtures')
+
+# config reads the environment at import, so this runs before any app module is imported.
+# Every store lives in a throwaway directory and nothing can reach a real upstream.
+_state_dir = tempfile.mkdtemp(prefix='hsm-tests-')
+os.environ.update(
+    API_KEY='test',
+    DATA_DIR=_state_dir,
+    RATE_LIMIT_FILE=os.path.join(_state_dir, 'ratelimit.bin'),
+    SHARED_SNAPSHOTS_ENABLED='0',
+    SHARED_SNAPSHOT_DIR=os.path.join(_state_dir, 'snapshots'),
+    METRICS_DIR=os.path.join(_state_dir, 'metrics'),
+    UPSTREAM_BASE_URL='http://127.0.0.1:9',
+    WARMUP_ON_START='0',
+)
+sys.path.insert(0, ROOT)
@@ -0,0 +1,96 @@
+import json
+import os
+import random
+from collections import Counter
+
+import pytest
+
+from breadth import BreadthEngine, classify, summarize
+from conftest import FIXTURES
+from performance_table import normalize_symbol
+
+
+def load_fixture(name):
+    with open(os.path.join(FIXTURES, name)) as f:
+        return json.load(f)
+
+
+PERFORMANCE = load_fixture('chukul_performance.json')
+COMPANIES = load_fixture('chukul_symbols.json')
+
+
+def full_summary(rows):
+    return summarize(Counter(classify(row.get('percentage_change')) for row in rows))
+
+
+def full_grouped(rows, companies):
+    groups = {normalize_symbol(c['symbol']): (str(c['sector_id']), str(c['type'])) for c in companies}
+    by_sector, by_type = {}, {}
+    for row in rows:
+        sector_id, company_type = groups.get(normalize_symbol(row['symbol']), ("unknown", "unknown"))
+        category = classify(row.get('percentage_change'))
+        by_sector.setdefault(sector_id, Counter())[category] += 1
+        by_type.setdefault(company_type, Counter())[category] += 1
+    return {
+        "sector": {sector_id: summarize(counts) for sector_id, counts in by_sector.items()},
+        "type": {company_type: summarize(counts) for company_type, counts in by_type.items()},
+    }
+
+
+def non_empty(entries, name):
+    # Groups whose rows all left the snapshot keep zeroed counters in the engine
+    return {entry[name]: entry["summary"] for entry in entries if any(item["count"] for item in entry["summary"])}
+
+
+def mutate(rows, rng):
+    """Next snapshot: some prices move, a few rows vanish or come back, order is kept."""
+    changes = [None, 0.0, 0.5, -0.5, 9.95, -9.95, -10.0, 3.2, -4.1, float('nan')]
+    next_rows = []
+    for row in rows:
+        if rng.random() < 0.03:
+            continue
+        if rng.random() < 0.2:
+            row = dict(row, percentage_change=rng.choice(changes))
+        next_rows.append(row)
+    return next_rows + [row for row in PERFORMANCE if rng.random() < 0.02]
+
+
+@pytest.mark.parametrize('seed', range(5))
+def test_incremental_counts_match_a_full_recompute(seed):
+    rng = random.Random(seed)
+    engine = BreadthEngine()
+    rows = PERFORMANCE
+    for step in range(40):
+        engine.apply(rows)
+        assert engine.summary() == full_summary(rows), f"step {step}"
+        if step % 10 == 5:  # group counters join partway through and are maintained from then on
+            expected = full_grouped(rows, COMPANIES)
+            grouped = engine.grouped(COMPANIES)
+            assert non_empty(grouped["sector"], "sectorId") == expected["sector"]
+            assert non_empty(grouped["type"], "type") == expected["type"]
+        rows = mutate(rows, rng)
+
+
+def test_same_snapshot_is_a_no_op():
+    engine = BreadthEngine()
+    engine.apply(PERFORMANCE)
+    summary = engine.summary()
+    engine.apply(PERFORMANCE)
+    assert engine.summary() is summary
+
+
+def test_symbols_missing_from_the_company_list_are_grouped_as_unknown():
+    engine = BreadthEngine()
+    engine.apply(PERFORMANCE)
+    grouped = engine.grouped([company for company in COMPANIES if company['sector_id'] != 4])
+    unknown = non_empty(grouped["sector"], "sectorId")["unknown"]
+    assert sum(item["count"] for item in unknown) == sum(
+        1 for row in PERFORMANCE if row['symbol'] in {c['symbol'] for c in COMPANIES if c['sector_id'] == 4})
+
+
+@pytest.mark.parametrize('change, category', [
+    (None, "unchanged"), (0.0, "unchanged"), (0.01, "advanced"), (9.9, "advanced"), (9.91, "positiveCircuit"),
+    (-0.01, "declined"), (-9.9, "negativeCircuit"), (-10.0, "declined"), (float('nan'), None),
+])
+def test_classify(change, category):
+    assert classify(change) == category
@@ -0,0 +1,75 @@
+from datetime import date, datetime, timedelta
+
+import pytest
+from pyBSDate import convert_AD_to_BS
+from pyBSDate.DateMap import DATE_MAP
+
+from bs_dates import convert_ad_string_to_bs
+from routes.upcoming_issues import convert_date_to_bs
+
+BS_YEARS = sorted(int(year) for year in DATE_MAP)
+FIRST_AD_YEAR, LAST_AD_YEAR = BS_YEARS[0] - 57, BS_YEARS[-1] - 57
+
+
+def pybsdate_convert(date_str):
+    """The conversion the lookup table replaced."""
+    ad_date = datetime.strptime(date_str, "%Y-%m-%d")
+    try:
+        bs_date_tuple = convert_AD_to_BS(ad_date.year, ad_date.month, ad_date.day)
+        return datetime(*bs_date_tuple).strftime("%Y-%m-%d")
+    except ValueError:
+        return "Invalid Date"
+
+
+def outcome(fn, date_str):
+    try:
+        return fn(date_str)
+    except Exception as e:
+        return type(e).__name__
+
+
+def days(start, end, step=1):
+    day = start
+    while day <= end:
+        yield day.isoformat()
+        day += timedelta(days=step)
+
+
+def sample_dates():
+    # Every 7th day (all weekdays, all month positions) plus every day of the
+    # first and last convertible AD years and the years just outside them
+    yield from days(date(FIRST_AD_YEAR - 1, 1, 1), date(LAST_AD_YEAR + 1, 12, 31), step=7)
+    for year in (FIRST_AD_YEAR - 1, FIRST_AD_YEAR, LAST_AD_YEAR, LAST_AD_YEAR + 1):
+        yield from days(date(year, 1, 1), date(year, 12, 31))
+    # The days around each 1 Baisakh anchor, where the table switches walks
+    for bs_year in BS_YEARS:
+        anchor = date(*map(int, DATE_MAP[str(bs_year)]['1stbaisakh'].split('-')))
+        yield from days(anchor - timedelta(days=3), anchor + timedelta(days=3))
+
+
+def test_table_matches_pybsdate():
+    mismatches = [(date_str, outcome(convert_ad_string_to_bs, date_str), outcome(pybsdate_convert, date_str))
+                  for date_str in sample_dates()
+                  if outcome(convert_ad_string_to_bs, date_str) != outcome(pybsdate_convert, date_str)]
+    assert mismatches == []
+
+
+def test_sample_includes_invalid_and_out_of_range_dates():
+    outcomes = {outcome(pybsdate_convert, date_str) for date_str in sample_dates()}
+    assert {"Invalid Date", "LookupError"} <= outcomes
+
+
+def test_repeated_lookups_give_the_same_answer():
+    for date_str in ('2024-01-01', f'{FIRST_AD_YEAR - 1}-06-01'):
+        assert outcome(convert_ad_string_to_bs, date_str) == outcome(convert_ad_string_to_bs, date_str)
+    assert convert_ad_string_to_bs('2024-01-01') == pybsdate_convert('2024-01-01')
+
+
+@pytest.mark.parametrize('date_str', ['2023-02-30', '2023-1-5', '2023-13-01', '20230101', 'not a date', ' 2023-01-01'])
+def test_malformed_input_matches_pybsdate(date_str):
+    assert outcome(convert_ad_string_to_bs, date_str) == outcome(pybsdate_convert, date_str)
+
+
+@pytest.mark.parametrize('date_str', ['', None])
+def test_missing_dates_are_in_progress(date_str):
+    assert convert_date_to_bs(date_str) == "In Progress"
@@ -0,0 +1,191 @@
+import threading
+import time
+
+import pytest
+
+import cache
+from cache import TTLCache, cache_key, cached_fetch
+from config import CACHE_TTLS, LAST_GOOD_MAX_AGE
+
+FEED = 'performance'
+KEY = 'https://chukul.com/api/data/intrahistorydata/performance'
+
+
+class FakeClock:
+    """Stands in for the time module inside cache; advance() moves both clocks."""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self):
+        return self.now
+
+    def time(self):
+        return self.now
+
+    def advance(self, seconds):
+        self.now += seconds
+
+
+@pytest.fixture(autouse=True)
+def fresh_cache(monkeypatch):
+    monkeypatch.setattr(cache, 'snapshot_cache', TTLCache(8))
+    monkeypatch.setattr(cache, 'inflight', cache.SingleFlight())
+    monkeypatch.setattr(cache, '_last_good', type(cache._last_good)())
+    monkeypatch.setattr(cache, '_shared_store', None)
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(cache, 'time', clock)
+    return clock
+
+
+class Loader:
+    def __init__(self, *results):
+        self.results = list(results)
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+        result = self.results.pop(0) if len(self.results) > 1 else self.results[0]
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+
+def test_hit_within_ttl_reuses_the_snapshot(clock):
+    loader = Loader(['first'], ['second'])
+    assert cached_fetch(FEED, KEY, loader) == ['first']
+    clock.advance(CACHE_TTLS[FEED] - 0.1)
+    assert cached_fetch(FEED, KEY, loader) == ['first']
+    assert loader.calls == 1
+
+
+def test_expired_snapshot_is_reloaded(clock):
+    loader = Loader(['first'], ['second'])
+    cached_fetch(FEED, KEY, loader)
+    clock.advance(CACHE_TTLS[FEED])
+    assert cached_fetch(FEED, KEY, loader) == ['second']
+    assert loader.calls == 2
+
+
+def test_none_is_never_cached(clock):
+    loader = Loader(None, ['data'])
+    assert cached_fetch(FEED, KEY, loader) is None
+    assert cached_fetch(FEED, KEY, loader) == ['data']
+
+
+def test_hits_and_misses_are_counted_per_feed(clock):
+    loader = Loader(['data'])
+    for _ in range(3):
+        cached_fetch(FEED, KEY, loader)
+    assert cache.cache_stats()["feeds"][FEED] == {"hits": 2, "misses": 1}
+
+
+def test_least_recently_used_entry_is_evicted():
+    lru = TTLCache(2)
+    lru.set('a', 1, 60)
+    lru.set('b', 2, 60)
+    assert lru.get(FEED, 'a') == (True, 1)  # b is now the oldest
+    lru.set('c', 3, 60)
+    assert lru.get(FEED, 'b') == (False, None)
+    assert lru.get(FEED, 'a') == (True, 1)
+    assert lru.stats()["evictions"] == 1
+
+
+def test_cache_key_ignores_the_cache_buster_and_parameter_order():
+    assert cache_key('https://x.test/api?b=2&a=1&_=123') == cache_key('https://x.test/api?a=1&b=2&_=456')
+    assert cache_key('https://x.test/api', {'a': 1, '_': 5}) == cache_key('https://x.test/api?a=1')
+    assert cache_key('https://x.test/api?a=1') != cache_key('https://x.test/api?a=2')
+
+
+def concurrent_fetches(count, loader):
+    results, errors = [], []
+
+    def fetch():
+        try:
+            results.append(cached_fetch(FEED, KEY, loader))
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=fetch) for _ in range(count)]
+    for thread in threads:
+        thread.start()
+    return threads, results, errors
+
+
+def test_concurrent_misses_share_one_load():
+    release = threading.Event()
+    loader = Loader(['data'])
+
+    def slow_loader():
+        release.wait(5)
+        return loader()
+
+    threads, results, errors = concurrent_fetches(8, slow_loader)
+    deadline = time.monotonic() + 5
+    while cache.inflight.coalesced < 7 and time.monotonic() < deadline:
+        time.sleep(0.001)
+    release.set()
+    for thread in threads:
+        thread.join()
+    assert loader.calls == 1
+    assert results == [['data']] * 8 and not errors
+    assert cache.cache_stats()["coalesced"] == 7
+
+
+def test_waiters_see_the_leaders_error():
+    release = threading.Event()
+
+    def failing_loader():
+        release.wait(5)
+        raise ConnectionError("upstream down")
+
+    threads, results, errors = concurrent_fetches(4, failing_loader)
+    deadline = time.monotonic() + 5
+    while cache.inflight.coalesced < 3 and time.monotonic() < deadline:
+        time.sleep(0.001)
+    release.set()
+    for thread in threads:
+        thread.join()
+    assert not results
+    assert len(errors) == 4 and all(isinstance(e, ConnectionError) for e in errors)
+
+
+def test_failed_reload_serves_the_last_good_snapshot(clock):
+    loader = Loader(['good'], ConnectionError("upstream down"))
+    cached_fetch(FEED, KEY, loader)
+    clock.advance(CACHE_TTLS[FEED] + 30)
+    stale_ages = []
+    with cache.collect_staleness(stale_ages):
+        assert cached_fetch(FEED, KEY, loader) == ['good']
+    assert stale_ages == [CACHE_TTLS[FEED] + 30]
+
+
+def test_empty_reload_serves_the_last_good_snapshot(clock):
+    loader = Loader(['good'], None)
+    cached_fetch(FEED, KEY, loader)
+    clock.advance(CACHE_TTLS[FEED])
+    assert cached_fetch(FEED, KEY, loader) == ['good']
+
+
+def test_last_good_snapshot_expires(clock):
+    loader = Loader(['good'], ConnectionError("upstream down"))
+    cached_fetch(FEED, KEY, loader)
+    clock.advance(LAST_GOOD_MAX_AGE + 1)
+    with pytest.raises(ConnectionError):
+        cached_fetch(FEED, KEY, loader)
+
+
+def test_failure_without_a_last_good_snapshot_raises(clock):
+    with pytest.raises(ConnectionError):
+        cached_fetch(FEED, KEY, Loader(ConnectionError("upstream down")))
+
+
+def test_forced_refresh_surfaces_failures(clock):
+    loader = Loader(['good'], ConnectionError("upstream down"))
+    cached_fetch(FEED, KEY, loader)
+    with cache.forced_refresh(), pytest.raises(ConnectionError):
+        cached_fetch(FEED, KEY, loader)
@@ -0,0 +1,78 @@
+import importlib.util
+import os
+
+import pytest
+from bs4 import BeautifulSoup
+
+import html_parsing
+from conftest import FIXTURES
+from routes.cdsc_data import parse_cdsc_html
+from routes.prospectus import parse_prospectus_rows
+
+
+# --- The original scrapers, parsing the whole page with html.parser ---
+
+def full_tree_cdsc(html_content):
+    soup = BeautifulSoup(html_content, "html.parser")
+    div = soup.find("div", class_="fun-factor-area")
+    h4_elements = div.find_all("h4")
+    data = []
+    important_positions = [8, 10, 11, 12, 13]
+    for i in range(0, len(h4_elements), 2):
+        imp_value = "true" if int(i / 2) in important_positions else "false"
+        data.append({
+            "id": str(int(i / 2)),
+            "dataKey": h4_elements[i + 1].text.strip(),
+            "dataValue": h4_elements[i].text.strip(),
+            "imp": imp_value
+        })
+    data.sort(key=lambda x: x['imp'], reverse=True)
+    return data
+
+
+def full_tree_prospectus(content):
+    page_data = []
+    soup = BeautifulSoup(content, 'html.parser')
+    table = soup.find('table', class_='table')
+    for row in table.select('tbody tr'):
+        row_data = row.find_all('td')
+        if len(row_data) == 4:
+            file_url = row_data[3].find('a').get('href', '') if row_data[3].find('a') else row_data[2].find('a').get('href', '')
+            page_data.append({
+                "title": row_data[0].get_text(strip=True),
+                "date": row_data[1].get_text(strip=True),
+                "english": row_data[2].find('a').get('href', '') if row_data[2].find('a') else '',
+                "nepali": row_data[3].find('a').get('href', '') if row_data[3].find('a') else '',
+                "fileUrl": file_url
+            })
+    return page_data
+
+
+def read_fixture(name, mode):
+    with open(os.path.join(FIXTURES, name), mode) as f:
+        return f.read()
+
+
+CASES = {
+    'cdsc': (read_fixture('cdsc_home.html', 'r'), full_tree_cdsc, parse_cdsc_html),
+    'prospectus': (read_fixture('sebon_prospectus.html', 'rb'), full_tree_prospectus, parse_prospectus_rows),
+}
+PARSERS = ['html.parser', pytest.param('lxml', marks=pytest.mark.skipif(
+    importlib.util.find_spec('lxml') is None, reason='lxml is not installed'))]
+
+
+@pytest.mark.parametrize('parser', PARSERS)
+@pytest.mark.parametrize('case', CASES)
+def test_targeted_parse_matches_full_tree(case, parser, monkeypatch):
+    markup, full_tree, targeted = CASES[case]
+    monkeypatch.setattr(html_parsing, 'HTML_PARSER', parser)
+    expected = full_tree(markup)
+    assert expected  # the fixture still holds the scraped section
+    assert targeted(markup) == expected
+
+
+@pytest.mark.parametrize('case', CASES)
+def test_missing_parser_falls_back_to_html_parser(case, monkeypatch):
+    markup, full_tree, targeted = CASES[case]
+    monkeypatch.setattr(html_parsing, 'HTML_PARSER', 'no-such-parser')
+    assert targeted(markup) == full_tree(markup)
@@ -0,0 +1,113 @@
+import time
+
+import pytest
+
+from routes import live_stream
+from routes.live_stream import MARKET_CLOSED, LiveFeed
+
+PERFORMANCE = [
+    {"symbol": "NABIL", "ltp": 500.0, "percentage_change": 1.0, "volume": 10},
+    {"symbol": "NICA", "ltp": 300.0, "percentage_change": -0.5, "volume": 20},
+]
+
+
+@pytest.fixture
+def upstream(monkeypatch):
+    state = {"is_open": True, "performance": [dict(row) for row in PERFORMANCE]}
+    monkeypatch.setattr(live_stream, 'fetch_performance_data', lambda: state["performance"])
+    monkeypatch.setattr(live_stream, 'fetch_live_index_data', lambda name: {"result": []})
+    monkeypatch.setattr(live_stream, 'fetch_market_status_data', lambda: {"is_open": state["is_open"]})
+    return state
+
+
+def wait_for_loop_exit(feed, timeout=5):
+    deadline = time.monotonic() + timeout
+    while feed._thread is not None:
+        assert time.monotonic() < deadline, "refresh loop did not stop"
+        time.sleep(0.01)
+
+
+def test_first_subscriber_gets_a_snapshot(upstream):
+    feed = LiveFeed(60)
+    subscriber = feed.subscribe()
+    assert feed.market_open is True
+    assert set(feed.stocks) == {"NABIL", "NICA"}
+    assert subscriber.empty()  # the snapshot is not replayed as an update
+    feed.unsubscribe(subscriber)
+
+
+def test_resubscribe_after_close_sees_reopened_market(upstream):
+    feed = LiveFeed(0.05)
+    upstream["is_open"] = False
+    subscriber = feed.subscribe()
+    assert feed.market_open is False
+    feed.unsubscribe(subscriber)
+    wait_for_loop_exit(feed)
+
+    upstream["is_open"] = True
+    upstream["performance"][0]["ltp"] = 510.0
+    subscriber = feed.subscribe()
+    try:
+        assert feed.market_open is True
+        assert feed.stocks["NABIL"]["ltp"] == 510.0
+        assert subscriber.empty()
+    finally:
+        feed.unsubscribe(subscriber)
+
+
+def test_subscribe_refreshes_a_stale_snapshot_while_the_loop_runs(upstream):
+    feed = LiveFeed(0.2)
+    first = feed.subscribe()
+    try:
+        feed._refreshed_at -= 1  # e.g. the loop's refreshes have been failing
+        upstream["is_open"] = False
+        second = feed.subscribe()
+        assert feed.market_open is False
+        assert second.get(timeout=1) is MARKET_CLOSED
+        feed.unsubscribe(second)
+    finally:
+        feed.unsubscribe(first)
+
+
+def test_failed_subscribe_does_not_stay_registered(upstream, monkeypatch):
+    def fail():
+        raise RuntimeError("upstream down")
+
+    monkeypatch.setattr(live_stream, 'fetch_performance_data', fail)
+    feed = LiveFeed(60)
+    with pytest.raises(RuntimeError):
+        feed.subscribe()
+    assert not feed._subscribers
+
+
+def test_slow_subscriber_is_dropped(upstream):
+    feed = LiveFeed(60)
+    subscriber = feed.subscribe()
+    for _ in range(subscriber.maxsize + 1):
+        feed._publish({"stocks": {}, "indices": []})
+    assert subscriber.dropped
+    assert subscriber not in feed._subscribers
+
+
+@pytest.fixture
+def client():
+    from app import create_app
+    return create_app().test_client()
+
+
+def test_stream_is_refused_under_sync_workers(client, monkeypatch):
+    monkeypatch.setattr(live_stream, 'STREAM_ENABLED', False)
+    response = client.get('/api/v1/market/stream', headers={'view-mode': 'test'})
+    assert response.status_code == 503
+
+
+def test_stream_sends_snapshot_under_async_workers(client, upstream, monkeypatch):
+    monkeypatch.setattr(live_stream, 'STREAM_ENABLED', True)
+    monkeypatch.setattr(live_stream, 'live_feed', LiveFeed(60))
+    upstream["is_open"] = False
+    response = client.get('/api/v1/market/stream?stocks=NABIL', headers={'view-mode': 'test'})
+    body = response.get_data(as_text=True)
+    assert response.status_code == 200
+    assert body.startswith("event: snapshot\n")
+    assert '"symbol":"NABIL"' in body and '"NICA"' not in body
+    assert body.endswith('event: close\ndata: {"marketOpen":false}\n\n')
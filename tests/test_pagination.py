@@ -0,0 +1,93 @@
+import json
+import os
+
+import pytest
+from werkzeug.datastructures import MultiDict
+
+from conftest import FIXTURES
+from pagination import PageQuery, PageQueryError, encode_cursor, page_rows, parse_page_query
+
+with open(os.path.join(FIXTURES, 'chukul_performance.json')) as f:
+    PERFORMANCE = json.load(f)  # includes repeated symbols and null percentage_change
+
+
+def expected_order(rows, field):
+    """Numbers, then strings, then missing values; ties by symbol, then snapshot position."""
+    def key(position):
+        value = rows[position].get(field)
+        if value is None:
+            group = (2, 0)
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            group = (0, value)
+        else:
+            group = (1, str(value))
+        return group + (rows[position]['symbol'], position)
+    return sorted(range(len(rows)), key=key)
+
+
+def walk(rows, sort, descending, limit, cache=True):
+    """Positions of the rows returned page by page until there is no next cursor."""
+    positions = {id(row): position for position, row in enumerate(rows)}
+    seen, cursor = [], None
+    for _ in range(len(rows) + 2):
+        page, cursor = page_rows(rows, PageQuery(sort=sort, descending=descending, limit=limit, after=cursor), cache)
+        assert len(page) <= limit
+        seen.extend(positions[id(row)] for row in page)
+        if cursor is None:
+            return seen
+        cursor = parse_page_query(MultiDict({'after': cursor})).after
+    pytest.fail("pagination did not terminate")
+
+
+@pytest.mark.parametrize('field', ['symbol', 'ltp', 'percentage_change', 'volume'])
+@pytest.mark.parametrize('limit', [1, 7, 50, 1000])
+@pytest.mark.parametrize('descending', [False, True])
+def test_cursor_walk_visits_every_row_once_in_order(field, limit, descending):
+    expected = expected_order(PERFORMANCE, field)
+    if descending:
+        expected.reverse()
+    assert walk(PERFORMANCE, field, descending, limit) == expected
+
+
+def test_uncached_subset_walk_matches():
+    subset = PERFORMANCE[::3]
+    assert walk(subset, 'ltp', False, 9, cache=False) == expected_order(subset, 'ltp')
+
+
+def test_last_page_has_no_cursor():
+    page, cursor = page_rows(PERFORMANCE, PageQuery(sort='symbol', limit=len(PERFORMANCE)))
+    assert len(page) == len(PERFORMANCE) and cursor is None
+
+
+def test_projection_keeps_symbol_and_requested_fields():
+    query = parse_page_query(MultiDict({'fields': 'ltp,volume', 'limit': '5'}))
+    page, _ = page_rows(PERFORMANCE, query)
+    assert [set(row) for row in page] == [{'symbol', 'ltp', 'volume'}] * 5
+    assert [row['symbol'] for row in page] == sorted(row['symbol'] for row in PERFORMANCE)[:5]
+
+
+def test_identity_query_returns_the_snapshot_itself():
+    assert page_rows(PERFORMANCE, parse_page_query(MultiDict()))[0] is PERFORMANCE
+
+
+@pytest.mark.parametrize('args', [
+    {'order': 'sideways'},
+    {'limit': '0'},
+    {'limit': '-3'},
+    {'limit': 'ten'},
+    {'after': 'not-a-cursor'},
+])
+def test_invalid_parameters_are_rejected(args):
+    with pytest.raises(PageQueryError):
+        parse_page_query(MultiDict(args))
+
+
+def test_unknown_sort_field_is_rejected():
+    with pytest.raises(PageQueryError):
+        page_rows(PERFORMANCE, PageQuery(sort='no_such_field', limit=5))
+
+
+def test_cursor_with_a_mismatched_value_type_is_rejected():
+    after = parse_page_query(MultiDict({'after': encode_cursor([0, 'text', 'NABIL', 0])})).after
+    with pytest.raises(PageQueryError):
+        page_rows(PERFORMANCE, PageQuery(sort='ltp', limit=5, after=after))
@@ -0,0 +1,92 @@
+import json
+import os
+import random
+
+import pytest
+
+from conftest import FIXTURES
+from rankings import RANKINGS, mover_row, rank, ranked_rows
+
+
+def load_fixture(name):
+    with open(os.path.join(FIXTURES, name)) as f:
+        return json.load(f)
+
+
+PERFORMANCE = load_fixture('chukul_performance.json')
+# A recorded GetTopMarketMovers response: the shape rankings replaces
+TOP_MOVERS = load_fixture('nepalipaisa_top_movers.json')['result']
+
+
+def performance_rows(symbol):
+    return [row for row in PERFORMANCE if row['symbol'] == symbol]
+
+
+@pytest.mark.parametrize('indicator', RANKINGS)
+def test_mover_row_has_the_top_movers_fields(indicator):
+    expected_keys = set(TOP_MOVERS[0]) | {'type'}
+    for row in PERFORMANCE:
+        assert set(mover_row(row, indicator)) == expected_keys
+    assert mover_row(PERFORMANCE[0], indicator)['type'] == indicator
+
+
+def test_mover_row_values_match_the_recorded_top_movers():
+    for recorded in TOP_MOVERS:
+        candidates = [mover_row(row, 'gainers') for row in performance_rows(recorded['symbol'])]
+        assert candidates, recorded['symbol']
+        assert dict(recorded, type='gainers') in candidates
+
+
+COMPANIES = load_fixture('chukul_symbols.json')
+
+
+def brute_force(rows, indicators, limit):
+    """Filter and fully sort each ranking; stable sorts keep ties in snapshot order."""
+    ranked = []
+    for indicator in indicators:
+        field, largest, movers_only = RANKINGS[indicator]
+        candidates = [row for row in rows
+                      if type(row.get(field)) in (int, float) and row[field] == row[field]
+                      and (not movers_only or (row[field] > 0 if largest else row[field] < 0))]
+        candidates.sort(key=lambda row: row[field], reverse=largest)
+        ranked.extend(mover_row(row, indicator) for row in candidates[:max(limit, 0)])
+    return ranked
+
+
+def noisy_rows(rng, count):
+    """Rows with many ties plus the values rank must skip: None, bools, strings and NaN."""
+    odd_values = [None, True, False, 'n/a', float('nan')]
+    rows = []
+    for position in range(count):
+        row = {'symbol': f"S{position % (count // 2)}"}
+        for field in ('percentage_change', 'turnover', 'volume', 'transactions'):
+            row[field] = rng.choice(odd_values) if rng.random() < 0.1 else rng.choice(
+                [rng.randint(-5, 5), round(rng.uniform(-10, 10), 1), 0, 0.0])
+        rows.append(row)
+    return rows
+
+
+@pytest.mark.parametrize('seed', range(10))
+@pytest.mark.parametrize('limit', [0, 1, 5, 30, 500])
+def test_rank_matches_a_brute_force_sort(seed, limit):
+    rows = noisy_rows(random.Random(seed), 200)
+    indicators = ['gainers', 'losers', 'turnover', 'sharestraded', 'transactions']
+    assert rank(rows, indicators, limit) == brute_force(rows, indicators, limit)
+
+
+@pytest.mark.parametrize('limit', [1, 10, 100, 1000])
+def test_rank_matches_a_brute_force_sort_on_the_fixture(limit):
+    indicators = ['turnover', 'gainers', 'losers', 'sharestraded']
+    assert rank(PERFORMANCE, indicators, limit) == brute_force(PERFORMANCE, indicators, limit)
+
+
+def test_negative_limit_ranks_nothing():
+    assert rank(PERFORMANCE, ['gainers'], -5) == []
+
+
+def test_sector_ranking_only_uses_that_sectors_rows():
+    sector_symbols = {company['symbol'] for company in COMPANIES if company['sector_id'] == 4}
+    sector_rows = [row for row in PERFORMANCE if row['symbol'] in sector_symbols]
+    ranked = ranked_rows(PERFORMANCE, ['gainers', 'losers'], 10, '4', COMPANIES)
+    assert ranked == brute_force(sector_rows, ['gainers', 'losers'], 10)
+    assert ranked_rows(PERFORMANCE, ['gainers', 'losers'], 10, '4', COMPANIES) is ranked
@@ -0,0 +1,120 @@
+import pytest
+from flask import Blueprint, Flask, request
+
+import app as app_module
+import rate_limiter
+from rate_limiter import BucketTable, TokenBucketLimiter, rate_limit_blueprint
+
+
+def client_ip_app(monkeypatch, hops):
+    monkeypatch.setattr(app_module, 'TRUSTED_PROXY_HOPS', hops)
+    app = app_module.create_app()
+
+    @app.route('/client-ip')
+    def client_ip():
+        return request.remote_addr
+
+    return app.test_client()
+
+
+def get_client_ip(client, forwarded_for=None):
+    headers = {'X-Forwarded-For': forwarded_for} if forwarded_for else {}
+    return client.get('/client-ip', headers=headers, environ_base={'REMOTE_ADDR': '10.0.0.1'}).get_data(as_text=True)
+
+
+def test_forwarded_for_is_ignored_by_default(monkeypatch):
+    client = client_ip_app(monkeypatch, 0)
+    assert get_client_ip(client, '6.6.6.6') == '10.0.0.1'
+
+
+@pytest.mark.parametrize('forwarded_for, expected', [
+    ('1.2.3.4', '1.2.3.4'),
+    ('6.6.6.6, 1.2.3.4', '1.2.3.4'),  # entries left of the trusted hop are client-supplied
+    (None, '10.0.0.1'),
+])
+def test_one_trusted_hop_takes_the_proxy_supplied_address(monkeypatch, forwarded_for, expected):
+    client = client_ip_app(monkeypatch, 1)
+    assert get_client_ip(client, forwarded_for) == expected
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def time(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(rate_limiter, 'time', clock)
+    return clock
+
+
+def take_all(table, key, rate=1.0, burst=3.0):
+    """Tokens taken from `key`'s bucket until it refuses (capped to catch runaways)."""
+    taken = 0
+    while taken < 100 and table.take(key, rate, burst):
+        taken += 1
+    return taken
+
+
+def test_bucket_allows_a_burst_then_refills(tmp_path, clock):
+    table = BucketTable(str(tmp_path / 'buckets'), 16)
+    assert take_all(table, 'client') == 3
+    clock.now += 1
+    assert take_all(table, 'client') == 1
+    clock.now += 2.5
+    assert take_all(table, 'client') == 2
+
+
+def test_refill_is_capped_at_the_burst(tmp_path, clock):
+    table = BucketTable(str(tmp_path / 'buckets'), 16)
+    take_all(table, 'client')
+    clock.now += 3600
+    assert take_all(table, 'client') == 3
+
+
+def test_clients_have_separate_buckets(tmp_path, clock):
+    table = BucketTable(str(tmp_path / 'buckets'), 16)
+    assert take_all(table, 'a') == 3
+    assert take_all(table, 'b') == 3
+
+
+def test_workers_mapping_the_same_file_share_buckets(tmp_path, clock):
+    path = str(tmp_path / 'buckets')
+    first, second = BucketTable(path, 16), BucketTable(path, 16)
+    assert take_all(first, 'client') == 3
+    assert not second.take('client', 1.0, 3.0)
+
+
+def test_full_set_evicts_the_least_recently_used_client(tmp_path, clock):
+    table = BucketTable(str(tmp_path / 'buckets'), 1)  # one set: every client competes for its 4 slots
+    for client in ('a', 'b', 'c', 'd'):
+        take_all(table, client)
+        clock.now += 0.001
+    assert not table.take('a', 1.0, 3.0)  # a is now the most recently used
+    clock.now += 0.001
+    assert take_all(table, 'e') == 3      # evicts b
+    clock.now += 0.001
+    assert take_all(table, 'b') == 3      # b starts over with a full bucket (evicting c)
+    assert not table.take('a', 1.0, 3.0)  # a kept its empty bucket
+
+
+def test_blueprint_answers_429_once_the_bucket_is_empty(monkeypatch, tmp_path, clock):
+    monkeypatch.setattr(rate_limiter, 'RATE_LIMIT_ENABLED', True)
+    monkeypatch.setattr(rate_limiter, '_table', BucketTable(str(tmp_path / 'buckets'), 16))
+    blueprint = Blueprint('limited', __name__)
+    rate_limit_blueprint(blueprint, TokenBucketLimiter('limited', per_minute=2), {"error": "slow down"})
+
+    @blueprint.route('/limited')
+    def limited():
+        return 'ok'
+
+    app = Flask(__name__)
+    app.register_blueprint(blueprint)
+    client = app.test_client()
+    assert [client.get('/limited').status_code for _ in range(3)] == [200, 200, 429]
+    assert client.get('/limited').get_json() == {"error": "slow down"}
+    assert client.get('/limited', environ_base={'REMOTE_ADDR': '10.0.0.2'}).status_code == 200
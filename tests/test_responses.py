@@ -0,0 +1,145 @@
+import gzip
+import json
+import os
+
+import pytest
+from flask import Flask
+
+import responses
+from conftest import FIXTURES
+from responses import field_key, snapshot_response
+
+with open(os.path.join(FIXTURES, 'chukul_performance.json')) as f:
+    PERFORMANCE = json.load(f)
+
+ROWS = [
+    {"symbol": "NABIL", "ltp": 500.0},
+    {"symbol": "NICA", "ltp": 300.0},
+    {"symbol": "SBI", "ltp": 400.0},
+]
+
+
+@pytest.fixture
+def snapshot(monkeypatch):
+    """The payload served by /rows; replace snapshot['payload'] to publish a new snapshot."""
+    monkeypatch.setattr(responses, '_variants', type(responses._variants)())
+    return {"payload": ROWS}
+
+
+@pytest.fixture
+def client(snapshot):
+    app = Flask(__name__)
+
+    @app.route('/rows')
+    def rows():
+        return snapshot_response(snapshot["payload"], row_key=field_key('symbol'))
+
+    return app.test_client()
+
+
+def test_body_matches_jsonify_and_carries_an_etag(client):
+    response = client.get('/rows')
+    assert response.status_code == 200
+    assert response.get_json() == ROWS
+    assert response.headers['ETag']
+
+
+def test_matching_if_none_match_gets_304(client, snapshot):
+    etag = client.get('/rows').headers['ETag']
+    assert client.get('/rows', headers={'If-None-Match': etag}).status_code == 304
+
+    snapshot["payload"] = ROWS[:2]
+    response = client.get('/rows', headers={'If-None-Match': etag})
+    assert response.status_code == 200
+    assert response.headers['ETag'] != etag
+
+
+def test_since_current_version_is_an_empty_delta(client):
+    version = client.get('/rows').get_etag()[0]
+    delta = client.get(f'/rows?since={version}').get_json()
+    assert delta == {"version": version, "full": False, "rows": [], "removed": []}
+
+
+def test_since_returns_changed_and_removed_rows(client, snapshot):
+    version = client.get('/rows').get_etag()[0]
+    snapshot["payload"] = [dict(ROWS[0], ltp=510.0), ROWS[1], {"symbol": "HBL", "ltp": 200.0}]
+    delta = client.get(f'/rows?since={version}').get_json()
+    assert delta["full"] is False
+    assert delta["rows"] == [dict(ROWS[0], ltp=510.0), {"symbol": "HBL", "ltp": 200.0}]
+    assert delta["removed"] == ["SBI"]
+
+
+def test_since_unknown_version_is_a_full_list(client):
+    delta = client.get('/rows?since=0000000000000000').get_json()
+    assert delta["full"] is True
+    assert delta["rows"] == ROWS
+
+
+def test_duplicate_row_keys_fall_back_to_a_full_list(client, snapshot):
+    # The performance feed lists PMW and TPZ twice; keyed rows would collapse
+    snapshot["payload"] = PERFORMANCE
+    version = client.get('/rows').get_etag()[0]
+    delta = client.get(f'/rows?since={version}').get_json()
+    assert delta["full"] is True
+    assert delta["rows"] == PERFORMANCE
+
+    snapshot["payload"] = ROWS
+    delta = client.get(f'/rows?since={version}').get_json()
+    assert delta["full"] is True
+
+
+@pytest.fixture
+def large_client(snapshot):
+    snapshot["payload"] = PERFORMANCE  # well above COMPRESS_MIN_BYTES
+    app = Flask(__name__)
+
+    @app.route('/large')
+    def large():
+        return snapshot_response(snapshot["payload"], row_key=field_key('symbol'))
+
+    return app.test_client()
+
+
+def test_gzip_body_decodes_to_the_plain_body(large_client):
+    plain = large_client.get('/large')
+    coded = large_client.get('/large', headers={'Accept-Encoding': 'gzip'})
+    assert 'Content-Encoding' not in plain.headers
+    assert coded.headers['Content-Encoding'] == 'gzip'
+    assert gzip.decompress(coded.get_data()) == plain.get_data()
+    assert coded.headers['ETag'] == plain.headers['ETag'][:-1] + '-gzip"'
+    assert 'Accept-Encoding' in coded.headers['Vary']
+
+
+@pytest.mark.skipif(responses.brotli is None, reason='brotli is not installed')
+def test_brotli_is_preferred_when_accepted(large_client):
+    plain = large_client.get('/large')
+    coded = large_client.get('/large', headers={'Accept-Encoding': 'gzip, br'})
+    assert coded.headers['Content-Encoding'] == 'br'
+    assert responses.brotli.decompress(coded.get_data()) == plain.get_data()
+
+
+def test_each_encoding_is_compressed_once_per_version(large_client, snapshot, monkeypatch):
+    calls = []
+    compress = responses._compress
+    monkeypatch.setattr(responses, '_compress', lambda body, coding: calls.append(coding) or compress(body, coding))
+    for _ in range(3):
+        large_client.get('/large', headers={'Accept-Encoding': 'gzip'})
+    assert calls == ['gzip']
+
+    snapshot["payload"] = PERFORMANCE[:-1]
+    large_client.get('/large', headers={'Accept-Encoding': 'gzip'})
+    assert calls == ['gzip', 'gzip']
+
+
+def test_compressed_etag_revalidates_and_feeds_since(large_client):
+    coded = large_client.get('/large', headers={'Accept-Encoding': 'gzip'})
+    etag = coded.headers['ETag']
+    revalidated = large_client.get('/large', headers={'Accept-Encoding': 'gzip', 'If-None-Match': etag})
+    assert revalidated.status_code == 304
+    assert large_client.get(f'/large?since={coded.get_etag()[0]}').get_json()["version"] == coded.get_etag()[0].split('-')[0]
+
+
+def test_small_bodies_are_sent_uncompressed(client):
+    response = client.get('/rows', headers={'Accept-Encoding': 'gzip, br'})
+    assert 'Content-Encoding' not in response.headers
+    assert response.get_json() == ROWS
@@ -0,0 +1,35 @@
+import json
+import os
+
+import pytest
+
+from app import create_app
+from config import UPCOMING_MAX_ROWS
+from conftest import FIXTURES
+from routes import upcoming_issues
+
+with open(os.path.join(FIXTURES, 'sharesansar_existing_issues.json')) as f:
+    ENTRIES = json.load(f)['data']
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr(upcoming_issues, 'fetch_issues_page',
+                        lambda issue_type, start, length: (ENTRIES[start:start + length], len(ENTRIES)))
+    return create_app().test_client()
+
+
+@pytest.mark.parametrize('limit', ['-1', '0', str(UPCOMING_MAX_ROWS + 1)])
+def test_out_of_range_limit_is_rejected(client, limit):
+    response = client.get(f'/get_upcoming_issues?type=ipo&limit={limit}')
+    assert response.status_code == 400
+    assert response.get_json() == {"error": "Invalid limit parameter"}
+
+
+@pytest.mark.parametrize('limit', [1, 5, UPCOMING_MAX_ROWS])
+def test_limit_caps_rows_per_type(client, limit):
+    response = client.get(f'/get_upcoming_issues?type=ipo&limit={limit}')
+    assert response.status_code == 200
+    issues = response.get_json()
+    assert len(issues) == min(limit, len(ENTRIES))
+    assert all(issue['issueType'] == 'ipo' for issue in issues)
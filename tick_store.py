@@ -0,0 +1,197 @@
+import json
+import logging
+import math
+import os
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+import pytz
+
+from config import TICK_DIR, TICK_TIMEZONE, TICK_MIN_INTERVAL, TICK_SERIES
+
+try:
+    import fcntl
+except ImportError:  # not available on Windows; fall back to in-process locking only
+    fcntl = None
+
+_tz = pytz.timezone(TICK_TIMEZONE)
+
+
+def trading_day(timestamp_ms=None):
+    """Nepal-time date (YYYY-MM-DD) a timestamp belongs to."""
+    seconds = time.time() if timestamp_ms is None else timestamp_ms / 1000
+    return datetime.fromtimestamp(seconds, _tz).strftime("%Y-%m-%d")
+
+
+class TickSeries:
+    """Append-only columnar store for one series on one trading day.
+
+    Layout under TICK_DIR/<day>/<series>/:
+      timestamps.i8   int64 epoch ms, one per snapshot
+      <field>.f8      float64 rows of `max_keys` slots, one row per snapshot
+      slots.json      key -> slot (column) number
+
+    Each field file is a (snapshots x max_keys) matrix, so a key's series
+    is a strided column view of the memory-mapped file: no copy until the
+    caller serializes it. Writers from several processes are serialized
+    with an flock on the series directory; the timestamp is written last
+    and defines how many rows are committed.
+    """
+
+    def __init__(self, day, series):
+        fields, max_keys = TICK_SERIES[series]
+        self.fields = fields
+        self.max_keys = max_keys
+        self.path = os.path.join(TICK_DIR, day, series)
+        self._slots = {}
+        self._slots_mtime = None
+        self._maps = {}  # file name -> (rows, memmap)
+        self._lock = threading.Lock()
+
+    def _file(self, name):
+        return os.path.join(self.path, name)
+
+    @contextmanager
+    def _write_lock(self):
+        os.makedirs(self.path, exist_ok=True)
+        with self._lock, open(self._file('.lock'), 'a') as lock_file:
+            if fcntl is not None:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _load_slots(self):
+        try:
+            mtime = os.stat(self._file('slots.json')).st_mtime_ns
+        except FileNotFoundError:
+            return self._slots
+        if mtime != self._slots_mtime:
+            with open(self._file('slots.json')) as f:
+                self._slots = json.load(f)
+            self._slots_mtime = mtime
+        return self._slots
+
+    def _rows(self):
+        try:
+            return os.path.getsize(self._file('timestamps.i8')) // 8
+        except FileNotFoundError:
+            return 0
+
+    def append(self, timestamp_ms, rows):
+        """Append one snapshot given as {key: row dict}; returns False if skipped."""
+        import numpy as np  # deferred: only recording and history queries need it
+        with self._write_lock():
+            committed = self._rows()
+            timestamps = self._map('timestamps.i8', np.int64, committed)
+            if committed and timestamp_ms - int(timestamps[committed - 1]) < TICK_MIN_INTERVAL * 1000:
+                return False  # another worker recorded this refresh already
+
+            slots = dict(self._load_slots())
+            new_keys = [key for key in rows if key not in slots]
+            for key in new_keys:
+                if len(slots) >= self.max_keys:
+                    logging.warning(f"[Ticks] {self.path} is full; dropping key {key}")
+                    break
+                slots[key] = len(slots)
+
+            matrix = np.full((len(self.fields), self.max_keys), np.nan)
+            for key, row in rows.items():
+                slot = slots.get(key)
+                if slot is None:
+                    continue
+                for f, field in enumerate(self.fields):
+                    value = row.get(field)
+                    if isinstance(value, (int, float)):
+                        matrix[f, slot] = value
+
+            if committed:
+                last = np.stack([self._map(f"{field}.f8", np.float64, committed)[committed - 1] for field in self.fields])
+                if np.array_equal(last, matrix, equal_nan=True):
+                    return False  # nothing moved (e.g. market closed)
+
+            if new_keys:
+                tmp = self._file('slots.json.tmp')
+                with open(tmp, 'w') as f:
+                    json.dump(slots, f)
+                os.replace(tmp, self._file('slots.json'))
+
+            for f, field in enumerate(self.fields):
+                with open(self._file(f"{field}.f8"), 'r+b' if committed else 'wb') as out:
+                    out.seek(committed * self.max_keys * 8)
+                    out.write(matrix[f].tobytes())
+                    out.truncate()
+            with open(self._file('timestamps.i8'), 'r+b' if committed else 'wb') as out:
+                out.seek(committed * 8)
+                out.write(np.int64(timestamp_ms).tobytes())
+                out.truncate()
+            return True
+
+    def _map(self, name, dtype, rows):
+        """Read-only memmap of the first `rows` rows of a column file."""
+        import numpy as np
+        if rows == 0:
+            return np.empty((0,) if dtype is np.int64 else (0, self.max_keys), dtype=dtype)
+        cached = self._maps.get(name)
+        if cached is None or cached[0] != rows:
+            shape = (rows,) if dtype is np.int64 else (rows, self.max_keys)
+            cached = (rows, np.memmap(self._file(name), dtype=dtype, mode='r', shape=shape))
+            self._maps[name] = cached
+        return cached[1]
+
+    def query(self, key, start_ms=None, end_ms=None, points=None):
+        """Series for `key` between two epoch-ms bounds, optionally downsampled.
+
+        Returns (timestamps, {field: values}) as NumPy views, or None when
+        the key was never recorded on this day.
+        """
+        import numpy as np
+        with self._lock:
+            slot = self._load_slots().get(key)
+            if slot is None:
+                return None
+            rows = self._rows()
+            timestamps = self._map('timestamps.i8', np.int64, rows)
+            columns = {field: self._map(f"{field}.f8", np.float64, rows) for field in self.fields}
+
+        first = 0 if start_ms is None else int(np.searchsorted(timestamps, start_ms, side='left'))
+        last = rows if end_ms is None else int(np.searchsorted(timestamps, end_ms, side='right'))
+        step = 1
+        if points and last - first > points:
+            step = math.ceil((last - first) / points)
+        window = slice(first, last, step)
+        return timestamps[window], {field: column[window, slot] for field, column in columns.items()}
+
+
+class TickRecorder:
+    """Keeps one TickSeries per (day, series) and appends refreshed snapshots."""
+
+    def __init__(self):
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def series(self, day, name):
+        with self._lock:
+            series = self._series.get((day, name))
+            if series is None:
+                # Only the current day is appended to; keep a handful of days for reads.
+                if len(self._series) > 2 * len(TICK_SERIES) * 4:
+                    self._series.clear()
+                series = self._series[(day, name)] = TickSeries(day, name)
+            return series
+
+    def record(self, name, rows, timestamp_ms=None):
+        timestamp_ms = int(time.time() * 1000) if timestamp_ms is None else timestamp_ms
+        return self.series(trading_day(timestamp_ms), name).append(timestamp_ms, rows)
+
+    def query(self, day, name, key, start_ms=None, end_ms=None, points=None):
+        if not os.path.isdir(os.path.join(TICK_DIR, day, name)):
+            return None
+        return self.series(day, name).query(key, start_ms, end_ms, points)
+
+
+tick_recorder = TickRecorder()